@@ -0,0 +1,46 @@
+"""
+Benchmarks of WFCDClient.fetch_all_data against a local HTTP stand-in
+serving the synthetic corpus
+"""
+
+import tempfile
+
+import pytest
+
+from api_client.wfcd_client import WFCDClient
+from http_standin import HTTPStandIn
+
+# Per-request delay of the stand-in, enough for concurrency to matter
+LATENCY = 0.05
+
+
+@pytest.fixture(scope='module')
+def standin(corpus_dir):
+    with HTTPStandIn(corpus_dir, latency=LATENCY) as server:
+        yield server
+
+
+@pytest.fixture
+def fresh_client(standin, tmp_path):
+    """Makes clients with an empty cache directory, so every round downloads everything"""
+    def make():
+        client = WFCDClient(cache_dir=tempfile.mkdtemp(dir=str(tmp_path)), verbosity=0)
+        client.base_url = standin.base_url
+        return (client,), {}
+    return make
+
+
+@pytest.mark.group('fetch')
+@pytest.mark.parametrize('use_async', [False, True], ids=['sequential', 'async'])
+def bench_fetch_all_data(bench, fresh_client, use_async):
+    data = bench.pedantic(lambda client: client.fetch_all_data(force_refresh=True, use_async=use_async),
+                          setup=fresh_client, rounds=3)
+    bench.extra_info.update(latency=LATENCY, categories=len(data))
+
+
+@pytest.mark.group('fetch')
+def bench_fetch_all_data_cached(bench, fresh_client):
+    # Second run over a warm cache: no downloads, only the category split
+    (client,), _ = fresh_client()
+    client.fetch_all_data(use_async=True)
+    bench(client.fetch_all_data)
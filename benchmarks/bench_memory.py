@@ -0,0 +1,145 @@
+"""
+Memory benchmarks, recorded in bytes next to the timings
+
+Peak RSS of a processing run is measured in a fresh interpreter per mode,
+so each gets its own high-water mark:
+
+- load only: the parsed raw categories, the floor every mode shares
+- materialized: what process_warframes used to do, extracted and cleaned
+  lists of every output at once
+- streaming: process_warframes, which keeps the raw categories and one list
+  of references per classification bucket, but streams the cleaned records
+  to disk
+
+The record sizes are what tracemalloc sees allocated by each structure, so
+the cleaned items' strings (shared with the raw items) aren't counted twice.
+"""
+
+import gc
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+
+import pytest
+
+from api_client.classifier import classify_items, rules_for_source
+from api_client.data_processor import (PROCESSED_OUTPUTS, LazyRawData, WarframeDataProcessor, output_sources,
+                                       required_sources)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, '..', 'src')
+SOURCES = required_sources(PROCESSED_OUTPUTS)
+
+
+def run_load_only(raw_dir: str, out_dir: str) -> None:
+    WarframeDataProcessor(raw_dir, out_dir, verbosity=0).load_raw_data(SOURCES)
+
+
+def run_materialized(raw_dir: str, out_dir: str) -> None:
+    processor = WarframeDataProcessor(raw_dir, out_dir, verbosity=0)
+    processor.load_raw_data(SOURCES)
+
+    classified = {category: classify_items(processor.raw_data[category], rules_for_source(category))
+                  for category in SOURCES}
+    extracted = {}
+    for output in PROCESSED_OUTPUTS:
+        items = []
+        if 'bucket' in output:
+            for category in output_sources(output):
+                items.extend(classified[category].get(output['bucket'], []))
+        extracted[output['file']] = items
+
+    cleaned = {}
+    for output in PROCESSED_OUTPUTS:
+        clean = getattr(processor, output['clean'])
+        cleaned[output['file']] = [clean(item).to_dict() for item in extracted[output['file']]]
+
+    for filename, items in cleaned.items():
+        with open(os.path.join(out_dir, filename), 'w', encoding='utf-8') as f:
+            json.dump(items, f, indent=2, ensure_ascii=False)
+
+
+def run_streaming(raw_dir: str, out_dir: str) -> None:
+    WarframeDataProcessor(raw_dir, out_dir, verbosity=0).process_warframes(force=True)
+
+
+MODES = {'load_only': run_load_only, 'materialized': run_materialized, 'streaming': run_streaming}
+
+
+def peak_rss_bytes() -> int:
+    # Linux keeps ru_maxrss across exec, so a child of the (much bigger)
+    # pytest process would report the parent's peak; VmHWM starts afresh
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and KiB elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def child(mode: str, raw_dir: str, out_dir: str) -> None:
+    """Run one mode and print its peak RSS in bytes; called in a fresh interpreter"""
+    MODES[mode](raw_dir, out_dir)
+    print(peak_rss_bytes())
+
+
+def peak_rss(mode: str, raw_dir: str, out_dir: str) -> int:
+    code = f"import bench_memory; bench_memory.child({mode!r}, {raw_dir!r}, {out_dir!r})"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([BENCH_DIR, SRC_DIR]))
+    result = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True, env=env)
+    return int(result.stdout.strip().splitlines()[-1])
+
+
+def traced(build):
+    """Bytes still allocated by what build() returns, and the value itself"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        value = build()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return size, value
+
+
+@pytest.fixture(scope='module')
+def streamed_outputs(corpus_dir, tmp_path_factory):
+    """(raw items, clean function) of every processed output"""
+    processor = WarframeDataProcessor(corpus_dir, str(tmp_path_factory.mktemp('processed')), verbosity=0)
+    processor.load_raw_data(SOURCES, parallel=False)
+    return [(list(processor.stream_output(output)), getattr(processor, output['clean']))
+            for output in PROCESSED_OUTPUTS]
+
+
+@pytest.mark.group('memory')
+@pytest.mark.parametrize('mode', list(MODES))
+def bench_process_peak_rss(bench, corpus_dir, tmp_path, mode):
+    pytest.importorskip('resource')
+    bench.record(peak_rss(mode, corpus_dir, str(tmp_path)), 'bytes')
+
+
+@pytest.mark.group('memory')
+@pytest.mark.parametrize('as_records', [False, True], ids=['dicts', 'records'])
+def bench_cleaned_items_size(bench, streamed_outputs, as_records):
+    convert = (lambda record: record) if as_records else (lambda record: record.to_dict())
+    size, items = traced(lambda: [convert(clean(item)) for raw_items, clean in streamed_outputs
+                                  for item in raw_items])
+    bench.record(size, 'bytes')
+    bench.extra_info['items'] = len(items)
+
+
+@pytest.mark.group('memory')
+@pytest.mark.parametrize('discard_raw_nested', [False, True], ids=['whole', 'discard_nested'])
+def bench_raw_data_size(bench, corpus_dir, discard_raw_nested):
+    raw_data = LazyRawData(corpus_dir, verbosity=0, discard_raw_nested=discard_raw_nested)
+    size, _ = traced(lambda: raw_data.preload(SOURCES, parallel=False, report=False) or raw_data)
+    bench.record(size, 'bytes')
+    bench.extra_info['items'] = sum(len(raw_data[category]) for category in SOURCES)
@@ -0,0 +1,78 @@
+"""
+Benchmarks of the processing pipeline: loading raw files, streaming each
+output's raw items, the clean functions, the write phase and a full rebuild
+"""
+
+import os
+
+import pytest
+
+from api_client.data_processor import PROCESSED_OUTPUTS, WarframeDataProcessor, output_name, required_sources
+from api_client.path_index import PathIndex
+from utils.helpers import write_json_stream
+
+SOURCES = required_sources(PROCESSED_OUTPUTS)
+
+
+@pytest.fixture(scope='module')
+def loaded_processor(corpus_dir, tmp_path_factory):
+    """A processor with every raw category already parsed"""
+    processor = WarframeDataProcessor(corpus_dir, str(tmp_path_factory.mktemp('processed')), verbosity=0)
+    processor.load_raw_data(parallel=False)
+    return processor
+
+
+def cold(processor: WarframeDataProcessor):
+    """Forget classification and path-index results so a stream does the full work"""
+    processor._classified = {}
+    processor.path_index = PathIndex()
+    return (), {}
+
+
+@pytest.mark.group('load')
+@pytest.mark.parametrize('parallel', [False, True], ids=['sequential', 'parallel'])
+def bench_load_raw_data(bench, corpus_dir, tmp_path, parallel):
+    processor = WarframeDataProcessor(corpus_dir, str(tmp_path), verbosity=0)
+    bench(processor.load_raw_data, SOURCES, parallel=parallel)
+    bench.extra_info['items'] = sum(len(processor.raw_data[category]) for category in SOURCES)
+
+
+@pytest.mark.group('stream')
+@pytest.mark.parametrize('output', PROCESSED_OUTPUTS, ids=output_name)
+def bench_stream_output(bench, loaded_processor, output):
+    items = bench.pedantic(lambda: list(loaded_processor.stream_output(output)), setup=lambda: cold(loaded_processor))
+    bench.extra_info['items'] = len(items)
+
+
+@pytest.mark.group('stream')
+def bench_stream_all_outputs(bench, loaded_processor):
+    # Every output in one pass, as process_warframes runs them: each raw category is classified once
+    counts = bench.pedantic(lambda: [sum(1 for _ in loaded_processor.stream_output(output))
+                                     for output in PROCESSED_OUTPUTS], setup=lambda: cold(loaded_processor))
+    bench.extra_info.update(outputs=len(counts), items=sum(counts))
+
+
+@pytest.mark.group('clean')
+@pytest.mark.parametrize('clean', ['clean_warframe_data', 'clean_weapon_data'])
+def bench_clean(bench, loaded_processor, clean):
+    clean = getattr(loaded_processor, clean)
+    items = [item for category in SOURCES for item in loaded_processor.raw_data[category]]
+    bench(lambda: [clean(item) for item in items])
+    bench.extra_info['items'] = len(items or [])
+
+
+@pytest.mark.group('write')
+@pytest.mark.parametrize('fmt', ['json', 'jsonl'])
+def bench_write(bench, loaded_processor, tmp_path, fmt):
+    records = [loaded_processor.clean_weapon_data(item) for category in SOURCES
+               for item in loaded_processor.raw_data[category]]
+    path = os.path.join(str(tmp_path), f"bench.{fmt}")
+    bench(write_json_stream, path, records, fmt)
+    bench.extra_info.update(items=len(records), bytes=os.path.getsize(path))
+
+
+@pytest.mark.group('process')
+def bench_process_warframes(bench, corpus_dir, tmp_path):
+    processor = WarframeDataProcessor(corpus_dir, str(tmp_path), verbosity=0)
+    bench(processor.process_warframes, force=True)
+    bench.extra_info['outputs'] = len(PROCESSED_OUTPUTS)
@@ -0,0 +1,48 @@
+"""
+Benchmarks of the raw cache formats: load time of the largest raw files in
+every serializer, against the indent=2 JSON fetch_json used to write
+"""
+
+import json
+import os
+
+import pytest
+
+from api_client.raw_cache import SERIALIZERS, get_serializer, load_cache_file, write_cache_file
+
+DOCUMENTS = ['Mods.json', 'Misc.json', 'Primary.json', 'Warframes.json']
+
+LEGACY = 'indent=2 json'
+
+
+@pytest.fixture(scope='module')
+def documents(corpus_dir):
+    return [(name, load_cache_file(os.path.join(corpus_dir, name))) for name in DOCUMENTS]
+
+
+def load_legacy(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_legacy(path: str, data) -> int:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    return os.path.getsize(path)
+
+
+@pytest.mark.group('raw_cache')
+@pytest.mark.parametrize('format_name', [LEGACY] + list(SERIALIZERS))
+def bench_load_cache_file(bench, documents, tmp_path, format_name):
+    paths, size = [], 0
+    for name, data in documents:
+        path = os.path.join(str(tmp_path), name)
+        if format_name == LEGACY:
+            size += write_legacy(path, data)
+        else:
+            size += write_cache_file(path, data, serializer=get_serializer(format_name))
+        paths.append(path)
+
+    loader = load_legacy if format_name == LEGACY else load_cache_file
+    bench(lambda: [loader(path) for path in paths])
+    bench.extra_info.update(files=len(paths), items=sum(len(data) for _, data in documents), bytes=size)
@@ -0,0 +1,65 @@
+"""
+Compare two benchmark result files written by the benchmark suite
+
+Usage: python benchmarks/compare_results.py OLD.json NEW.json [--threshold 10]
+Benchmarks whose median got slower (or, for memory, bigger) by more than
+the threshold (percent) are flagged, and the exit status is 1 if there
+are any.
+"""
+
+import argparse
+import json
+import sys
+
+
+def format_value(value: float, unit: str = 's') -> str:
+    """A median for display: timings in ms, byte counts in MiB"""
+    if unit == 's':
+        return f"{value * 1000:10.2f} ms"
+    if unit == 'bytes':
+        return f"{value / 1024 / 1024:10.2f} MiB"
+    return f"{value:10.2f} {unit}"
+
+
+def load(path: str):
+    with open(path, encoding='utf-8') as f:
+        report = json.load(f)
+    return report, {result['name']: result for result in report['benchmarks']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10.0, help="percent slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    old_report, old = load(args.old)
+    new_report, new = load(args.new)
+    print(f"{old_report.get('commit')} ({old_report['datetime']}) -> {new_report.get('commit')} "
+          f"({new_report['datetime']})")
+    if old_report.get('scale') != new_report.get('scale'):
+        print(f"Warning: corpus scale differs ({old_report.get('scale')} vs {new_report.get('scale')})")
+
+    regressions = 0
+    for name, result in new.items():
+        if name not in old:
+            print(f"  {'new':>8}  {format_value(result['median'], result.get('unit', 's'))}  {name}")
+            continue
+        before, after = old[name]['median'], result['median']
+        change = (after - before) * 100.0 / before if before else 0.0
+        unit = result.get('unit', 's')
+        flag = ''
+        if change > args.threshold:
+            regressions += 1
+            flag = '  <- slower' if unit == 's' else '  <- bigger'
+        print(f"  {change:+7.1f}%  {format_value(before, unit)} -> {format_value(after, unit)}  {name}{flag}")
+    for name in old:
+        if name not in new:
+            print(f"  {'removed':>8}  {name}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
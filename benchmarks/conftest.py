@@ -0,0 +1,143 @@
+"""
+Fixtures for the benchmark suite: a scalable synthetic WFCD corpus and a
+small pytest-benchmark style `bench` fixture whose results are written
+to benchmarks/results/ as JSON, one file per run
+
+Environment:
+    WF_BENCH_SCALE   corpus size as a multiple of the real catalogue (default 1)
+    WF_BENCH_ROUNDS  timed rounds per benchmark (default 5)
+    WF_BENCH_SEED    corpus seed (default 0)
+    WF_BENCH_OUTPUT  results file (default benchmarks/results/<timestamp>.json)
+"""
+
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import pytest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from compare_results import format_value
+from utils.helpers import generate_wfcd_corpus
+
+
+SCALE = float(os.environ.get('WF_BENCH_SCALE', '1'))
+ROUNDS = int(os.environ.get('WF_BENCH_ROUNDS', '5'))
+SEED = int(os.environ.get('WF_BENCH_SEED', '0'))
+
+_results = []
+
+
+class Bench:
+    """Times a callable over several rounds, like pytest-benchmark's fixture
+
+        result = bench(fn, *args)                      # ROUNDS timed calls after one warm-up
+        result = bench.pedantic(fn, setup=make_args)   # fresh (args, kwargs) for every round
+        bench.record(peak_rss, 'bytes')                # a measured quantity other than time
+    """
+
+    def __init__(self, name: str, group: str = None):
+        self.name = name
+        self.group = group
+        self.extra_info = {}
+
+    def __call__(self, fn, *args, **kwargs):
+        return self.pedantic(fn, args=args, kwargs=kwargs)
+
+    def pedantic(self, fn, args=(), kwargs=None, setup=None, rounds: int = None, warmup_rounds: int = 1):
+        rounds = rounds or ROUNDS
+        kwargs = kwargs or {}
+        timings = []
+        result = None
+        for round_number in range(warmup_rounds + rounds):
+            if setup is not None:
+                args, kwargs = setup()
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            if round_number >= warmup_rounds:
+                timings.append(elapsed)
+
+        self._add(timings, 's')
+        return result
+
+    def record(self, value: float, unit: str) -> None:
+        """Store one measurement, compared across runs like a timing (lower is better)"""
+        self._add([value], unit)
+
+    def _add(self, values, unit: str) -> None:
+        _results.append({
+            'name': self.name,
+            'group': self.group,
+            'unit': unit,
+            'rounds': len(values),
+            'min': min(values),
+            'max': max(values),
+            'mean': statistics.mean(values),
+            'median': statistics.median(values),
+            'stddev': statistics.stdev(values) if len(values) > 1 else 0.0,
+            'extra_info': self.extra_info,
+        })
+
+
+@pytest.fixture
+def bench(request):
+    marker = request.node.get_closest_marker('group')
+    return Bench(request.node.nodeid, marker.args[0] if marker else request.module.__name__)
+
+
+@pytest.fixture(scope='session')
+def corpus_dir(tmp_path_factory):
+    """Synthetic WFCD raw files at WF_BENCH_SCALE times the real item counts"""
+    directory = str(tmp_path_factory.mktemp('raw'))
+    generate_wfcd_corpus(directory, SCALE, SEED)
+    return directory
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'group(name): group benchmarks in the results file')
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+    started = datetime.datetime.now()
+    path = os.environ.get('WF_BENCH_OUTPUT') or os.path.join(
+        BENCH_DIR, 'results', started.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    report = {
+        'datetime': started.isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'scale': SCALE,
+        'seed': SEED,
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'cpus': os.cpu_count()},
+        'benchmarks': _results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.write_sep('-', f"benchmarks (scale {SCALE:g}, median of {ROUNDS} rounds)")
+    for result in _results:
+        terminalreporter.write_line(f"{format_value(result['median'], result['unit'])}  {result['name']}")
@@ -0,0 +1,46 @@
+"""
+Local HTTP stand-in for the WFCD raw data host
+Serves a directory of JSON files with an artificial per-request latency
+"""
+
+import functools
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+class SlowHandler(SimpleHTTPRequestHandler):
+    """Static file handler that sleeps before every response"""
+
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        # Keep benchmark output readable
+        pass
+
+
+class HTTPStandIn:
+    """Threaded static file server running in the background"""
+
+    def __init__(self, directory: str, latency: float = 0.2):
+        handler = type('Handler', (SlowHandler,), {'latency': latency})
+        handler = functools.partial(handler, directory=directory)
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
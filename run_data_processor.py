@@ -3,6 +3,7 @@ expected_files = ['Warframes.json', 'Primary.json', 'Secondary.json', 'Melee.jso
 Script to run the data processor
 """
 
+import argparse
 import sys
 import os
 
@@ -11,14 +12,44 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 try:
     from api_client.data_processor import WarframeDataProcessor
+    from utils.helpers import DEBUG, NORMAL, QUIET, configure_logging
+    from utils.profiling import DEFAULT_SAMPLE_INTERVAL, PROFILE_MODES, profile_call
 except ImportError as e:
     print(f"Import error: {e}")
     print("Make sure data_processor.py is saved in src/api_client/")
     sys.exit(1)
 
 def main():
-    print("Warframe Data Processor")
-    print("=" * 40)
+    parser = argparse.ArgumentParser(description="Process raw WFCD data into data/processed")
+    parser.add_argument('-v', '--verbose', action='store_true', help="show explore passes and per-item debug output")
+    parser.add_argument('-q', '--quiet', action='store_true', help="no output unless something fails")
+    parser.add_argument('--log-json', action='store_true', help="emit log records as JSON lines")
+    parser.add_argument('--force', action='store_true', help="rebuild every output, even the up-to-date ones")
+    parser.add_argument('--format', choices=['json', 'jsonl'], default='json',
+                        help="write processed outputs as compact JSON arrays or JSON Lines")
+    parser.add_argument('--columnar', choices=['auto', 'parquet', 'npz'],
+                        help="also export the catalogue as Parquet (needs pyarrow) or NumPy .npz")
+    parser.add_argument('--discard-raw-nested', action='store_true',
+                        help="drop nested raw fields (drop tables, components) right after loading to save memory")
+    parser.add_argument('--metrics-file', help="also write per-stage metrics as a Prometheus text file")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="record each stage's peak tracemalloc memory in the run report (slower)")
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=PROFILE_MODES,
+                        help="profile the run with cProfile (default) or the low-overhead sampling profiler; "
+                        "the run report then also times classify and clean item by item")
+    parser.add_argument('--profile-out',
+                        help="where to write the profile (default data/profile.pstats or data/profile.folded)")
+    parser.add_argument('--profile-top', type=int, default=25, help="hot functions shown in the profile summary")
+    parser.add_argument('--profile-interval', type=float, default=DEFAULT_SAMPLE_INTERVAL,
+                        help="seconds between samples in sampling mode")
+    args = parser.parse_args()
+    
+    verbosity = QUIET if args.quiet else DEBUG if args.verbose else NORMAL
+    configure_logging(verbosity, structured=args.log_json)
+    
+    if verbosity >= NORMAL:
+        print("Warframe Data Processor")
+        print("=" * 40)
     
     # Check if raw data exists
     raw_data_dir = "data/raw"
@@ -40,19 +71,29 @@ def main():
         print("Please run the WFCD client first to fetch all data.")
         return
     
-    print("✓ Raw data files found")
-    print("\nStarting data processing...")
+    if verbosity >= NORMAL:
+        print("✓ Raw data files found")
+        print("\nStarting data processing...")
     
     # Create and run processor
-    processor = WarframeDataProcessor()
+    processor = WarframeDataProcessor(verbosity=verbosity, output_format=args.format,
+                                      columnar_format=args.columnar, discard_raw_nested=args.discard_raw_nested,
+                                      metrics_file=args.metrics_file, trace_memory=args.trace_memory,
+                                      profile_stages=bool(args.profile))
     
     try:
-        # Process warframes only for now
-        processor.process_warframes()
+        if args.profile:
+            _, summary = profile_call(processor.process_warframes, force=args.force, mode=args.profile,
+                                      out=args.profile_out, top=args.profile_top, interval=args.profile_interval)
+            print(f"\nProfile ({args.profile}):")
+            print(summary)
+        else:
+            processor.process_warframes(force=args.force)
         
-        print("\n" + "=" * 40)
-        print("Data processing completed successfully!")
-        print("Check the 'data/processed/' directory for cleaned data files.")
+        if verbosity >= NORMAL:
+            print("\n" + "=" * 40)
+            print("Data processing completed successfully!")
+            print("Check the 'data/processed/' directory for cleaned data files.")
         
     except Exception as e:
         print(f"\n✗ Error during processing: {e}")
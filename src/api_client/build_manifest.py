@@ -0,0 +1,96 @@
+"""
+Build manifest for incremental processing
+Records a content hash of every raw input and, for every processed output,
+the input hashes and rule fingerprint it was built from. An output whose
+recorded hashes still match doesn't need to be rebuilt.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from utils.helpers import atomic_write
+
+MANIFEST_VERSION = 1
+
+def fingerprint(value: Any) -> str:
+    """Stable short hash of a JSON-serializable value (rules, output settings)"""
+    encoded = json.dumps(value, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+class BuildManifest:
+    """Input hashes and output dependencies of the last processor run"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.inputs = {}
+        self.outputs = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            # A broken manifest just means everything gets rebuilt
+            return
+        if manifest.get('version') == MANIFEST_VERSION:
+            self.inputs = manifest.get('inputs', {})
+            self.outputs = manifest.get('outputs', {})
+
+    def save(self) -> None:
+        """Write the manifest through a temp file so it's never half-written"""
+        with atomic_write(self.path) as f:
+            json.dump({'version': MANIFEST_VERSION, 'inputs': self.inputs, 'outputs': self.outputs},
+                      f, indent=2, sort_keys=True)
+
+    def hash_input(self, path: str) -> Optional[str]:
+        """sha256 of a raw file, or None if it's missing
+
+        Files whose mtime and size match the previous run reuse the recorded
+        hash instead of being read again.
+        """
+        name = os.path.basename(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.inputs.pop(name, None)
+            return None
+
+        previous = self.inputs.get(name)
+        if previous and previous['mtime_ns'] == stat.st_mtime_ns and previous['size'] == stat.st_size:
+            return previous['sha256']
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+
+        self.inputs[name] = {'sha256': digest.hexdigest(), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        return digest.hexdigest()
+
+    def stale_reason(self, output: str, output_path: str, input_hashes: Dict[str, Optional[str]],
+                     rules: str) -> Optional[str]:
+        """Why an output needs rebuilding, or None if it's up to date"""
+        previous = self.outputs.get(output)
+        if previous is None:
+            return "not built before"
+        if not os.path.exists(output_path):
+            return "output missing"
+        if previous.get('rules') != rules:
+            return "rules changed"
+
+        changed = [name for name, digest in input_hashes.items() if previous['inputs'].get(name) != digest]
+        if changed:
+            return f"{', '.join(changed)} changed"
+        return None
+
+    def record_output(self, output: str, input_hashes: Dict[str, Optional[str]], rules: str, items: int) -> None:
+        self.outputs[output] = {'inputs': dict(input_hashes), 'rules': rules, 'items': items}
+
+    def dependencies(self, output: str) -> List[str]:
+        """Raw files an output was last built from"""
+        return sorted(self.outputs.get(output, {}).get('inputs', {}))
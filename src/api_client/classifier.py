@@ -0,0 +1,121 @@
+"""
+Rule-based item classification for the data processor
+Each raw category is walked once and every item is routed to all the
+output buckets whose rules it matches.
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+from api_client.path_index import PathInfo, path_info
+
+NECRAMECH_PATH = '/Lotus/Powersuits/EntratiMech/'
+
+# Each rule routes matching items from the listed raw categories to a bucket.
+# A bucket collects items in the order its sources are listed.
+# Supported conditions (all given conditions must hold):
+#   type           item type equals this value
+#   type_lower     lowercased item type equals this value
+#   require_type   item has a non-empty type
+#   exclude_types  item type is none of these
+#   name_contains  lowercased item name contains this text
+#   path_contains  uniqueName contains this path anywhere
+#   exclude_path_contains uniqueName doesn't contain this path
+#   folders        uniqueName has a folder segment named one of these
+#   exclude_folders uniqueName has no folder segment named one of these
+#   exclude_pvp    uniqueName doesn't contain 'pvp' (any case)
+CLASSIFICATION_RULES = [
+    {'bucket': 'warframes', 'sources': ['warframes'],
+     'type': 'Warframe', 'exclude_path_contains': NECRAMECH_PATH},
+    {'bucket': 'necramechs', 'sources': ['warframes'],
+     'path_contains': NECRAMECH_PATH},
+    {'bucket': 'melee_weapons', 'sources': ['melee'],
+     'require_type': True, 'exclude_types': ['Zaw Component']},
+    {'bucket': 'zaws', 'sources': ['melee'],
+     'type': 'Zaw Component', 'exclude_pvp': True, 'folders': ['Tip', 'Tips']},
+    {'bucket': 'kitguns', 'sources': ['misc', 'primary', 'secondary'],
+     'folders': ['Barrel', 'Barrels'], 'exclude_folders': ['OperatorAmplifiers'], 'exclude_pvp': True},
+    {'bucket': 'arch_guns', 'sources': ['arch-gun'],
+     'require_type': True, 'exclude_pvp': True},
+    {'bucket': 'arch_melees', 'sources': ['arch-melee'],
+     'require_type': True, 'exclude_pvp': True},
+    {'bucket': 'companions', 'sources': ['pets'],
+     'type': 'Pets', 'exclude_pvp': True},
+    {'bucket': 'companions', 'sources': ['sentinels'],
+     'require_type': True, 'exclude_pvp': True},
+    {'bucket': 'sentinel_weapons', 'sources': ['sentinelweapons']},
+    {'bucket': 'incarnon_weapons', 'sources': ['misc'],
+     'type_lower': 'equipment adapter', 'name_contains': 'incarnon'},
+    {'bucket': 'amps', 'sources': ['misc'],
+     'type_lower': 'amp', 'name_contains': 'prism'},
+]
+
+def compile_rule(rule: Dict[str, Any]) -> Callable[[str, str, str, str, PathInfo], bool]:
+    """Turn a rule into a predicate over (type, type_lower, unique_name, name_lower, path_info)"""
+    checks = []
+
+    if 'type' in rule:
+        expected = rule['type']
+        checks.append(lambda t, tl, un, nl, info: t == expected)
+    if 'type_lower' in rule:
+        expected_lower = rule['type_lower']
+        checks.append(lambda t, tl, un, nl, info: tl == expected_lower)
+    if rule.get('require_type'):
+        checks.append(lambda t, tl, un, nl, info: bool(t))
+    if 'exclude_types' in rule:
+        excluded_types = frozenset(rule['exclude_types'])
+        checks.append(lambda t, tl, un, nl, info: t not in excluded_types)
+    if 'name_contains' in rule:
+        text = rule['name_contains']
+        checks.append(lambda t, tl, un, nl, info: text in nl)
+    if 'path_contains' in rule:
+        path = rule['path_contains']
+        checks.append(lambda t, tl, un, nl, info: path in un)
+    if 'exclude_path_contains' in rule:
+        excluded_path = rule['exclude_path_contains']
+        checks.append(lambda t, tl, un, nl, info: excluded_path not in un)
+    if 'folders' in rule:
+        folders = frozenset(rule['folders'])
+        checks.append(lambda t, tl, un, nl, info: not folders.isdisjoint(info.folders))
+    if 'exclude_folders' in rule:
+        excluded_folders = frozenset(rule['exclude_folders'])
+        checks.append(lambda t, tl, un, nl, info: excluded_folders.isdisjoint(info.folders))
+    if rule.get('exclude_pvp'):
+        checks.append(lambda t, tl, un, nl, info: not info.is_pvp)
+
+    return lambda t, tl, un, nl, info: all(check(t, tl, un, nl, info) for check in checks)
+
+def rules_for_source(source: str, rules: List[Dict[str, Any]] = CLASSIFICATION_RULES) -> List[Dict[str, Any]]:
+    """All rules that read items from a raw category"""
+    return [rule for rule in rules if source in rule['sources']]
+
+def bucket_sources(bucket: str, rules: List[Dict[str, Any]] = CLASSIFICATION_RULES) -> List[str]:
+    """Raw categories feeding a bucket, in the order their items are collected"""
+    sources = []
+    for rule in rules:
+        if rule['bucket'] == bucket:
+            sources.extend(source for source in rule['sources'] if source not in sources)
+    return sources
+
+def classify_items(items: List[Dict[str, Any]], rules: List[Dict[str, Any]],
+                   infos: Optional[Dict[int, PathInfo]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Route every item of one raw category to its buckets in a single pass
+    
+    infos maps id(item) to its precomputed PathInfo (see PathIndex.source_info);
+    items missing from it have their PathInfo computed on the spot.
+    """
+    buckets = {rule['bucket']: [] for rule in rules}
+    compiled = [(compile_rule(rule), buckets[rule['bucket']]) for rule in rules]
+    infos = infos or {}
+
+    for item in items:
+        item_type = item.get('type') or ''
+        unique_name = item.get('uniqueName') or ''
+        type_lower = item_type.lower()
+        name_lower = (item.get('name') or '').lower()
+        info = infos.get(id(item)) or path_info(unique_name)
+
+        for matches, bucket in compiled:
+            if matches(item_type, type_lower, unique_name, name_lower, info):
+                bucket.append(item)
+
+    return buckets
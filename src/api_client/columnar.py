@@ -0,0 +1,151 @@
+"""
+Columnar export of the processed catalogue
+All categories share one schema with a category column. Parquet is written
+through pandas when a Parquet engine is installed; otherwise a compressed
+NumPy .npz holds one array per column, with each text column stored as
+int32 codes into its own string table (UTF-8 bytes plus offsets). Both can
+be read one column at a time.
+"""
+
+import importlib.util
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from utils.helpers import atomic_write
+
+COLUMNAR_FILE = 'catalogue'
+
+# Column -> NumPy dtype; fields missing from an item (e.g. weapon stats of a
+# warframe) get the zero value of their type
+COLUMNAR_SCHEMA = {
+    'category': object,
+    'name': object,
+    'unique_name': object,
+    'type': object,
+    'description': object,
+    'mastery_rank': np.int32,
+    'tradable': np.bool_,
+    'vaulted': np.bool_,
+    'total_damage': np.float64,
+    'fire_rate': np.float64,
+    'accuracy': np.float64,
+    'critical_chance': np.float64,
+    'status_chance': np.float64,
+}
+
+TEXT_COLUMNS = [column for column, dtype in COLUMNAR_SCHEMA.items() if dtype is object]
+
+def _pandas():
+    # pandas takes longer to import than a small refresh takes to run, so it
+    # is only imported once Parquet is actually read or written
+    try:
+        import pandas as pd
+    except ImportError:
+        return None
+    return pd
+
+def parquet_available() -> bool:
+    """Whether pandas can write Parquet here (it needs pyarrow or fastparquet)"""
+    if importlib.util.find_spec('pandas') is None:
+        return False
+    return any(importlib.util.find_spec(engine) is not None for engine in ('pyarrow', 'fastparquet'))
+
+def resolve_format(fmt: str = 'auto') -> str:
+    if fmt == 'auto':
+        return 'parquet' if parquet_available() else 'npz'
+    if fmt not in ('parquet', 'npz'):
+        raise ValueError(f"Unknown columnar format '{fmt}', expected auto, parquet or npz")
+    if fmt == 'parquet' and not parquet_available():
+        raise ImportError("Parquet export needs pandas with pyarrow or fastparquet installed")
+    return fmt
+
+def records_to_columns(records: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, np.ndarray]:
+    """(category, cleaned item) pairs to one array per COLUMNAR_SCHEMA column"""
+    values = {column: [] for column in COLUMNAR_SCHEMA}
+    for category, item in records:
+        values['category'].append(category)
+        for column, dtype in COLUMNAR_SCHEMA.items():
+            if column == 'category':
+                continue
+            value = item.get(column)
+            if value is None:
+                value = '' if dtype is object else 0
+            values[column].append(value)
+    return {column: np.array(values[column], dtype=dtype) for column, dtype in COLUMNAR_SCHEMA.items()}
+
+def _encode_text(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Codes into a table of the distinct values, and the table as UTF-8 bytes plus offsets"""
+    strings = {}
+    codes = np.fromiter((strings.setdefault(value, len(strings)) for value in values),
+                        dtype=np.int32, count=len(values))
+    encoded = [value.encode('utf-8') for value in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return codes, np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+def _decode_text(codes: np.ndarray, data: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    raw = data.tobytes()
+    table = np.empty(len(offsets) - 1, dtype=object)
+    table[:] = [raw[start:end].decode('utf-8') for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+    return table[codes]
+
+def _npz_arrays(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    # Each text column gets its own string table, so reading one column
+    # never decodes another column's strings
+    arrays = {}
+    for column, values in columns.items():
+        if column in TEXT_COLUMNS:
+            arrays[column], arrays[f"{column}.data"], arrays[f"{column}.offsets"] = _encode_text(values)
+        else:
+            arrays[column] = values
+    return arrays
+
+def merge_columns(parts: Iterable[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Rows of several column sets, one after the other"""
+    parts = list(parts)
+    return {column: np.concatenate([part[column] for part in parts]).astype(dtype, copy=False)
+            for column, dtype in COLUMNAR_SCHEMA.items()}
+
+def select_rows(columns: Dict[str, np.ndarray], mask: np.ndarray) -> Dict[str, np.ndarray]:
+    return {column: values[mask] for column, values in columns.items()}
+
+def write_columnar(path_base: str, records: Iterable[Tuple[str, Dict[str, Any]]], fmt: str = 'auto') -> str:
+    """Write records to path_base + '.parquet' or '.npz', returning the path written"""
+    return write_columns(path_base, records_to_columns(records), fmt)
+
+def write_columns(path_base: str, columns: Dict[str, np.ndarray], fmt: str = 'auto') -> str:
+    """Write COLUMNAR_SCHEMA columns to path_base + '.parquet' or '.npz', returning the path written"""
+    fmt = resolve_format(fmt)
+    path = f"{path_base}.{fmt}"
+
+    with atomic_write(path, 'wb') as f:
+        if fmt == 'parquet':
+            _pandas().DataFrame(columns).to_parquet(f, index=False)
+        else:
+            np.savez_compressed(f, **_npz_arrays(columns))
+    return path
+
+def read_columnar(path: str, columns: List[str] = None) -> Dict[str, np.ndarray]:
+    """Read some or all columns of an export; only the requested columns are decoded"""
+    columns = list(columns or COLUMNAR_SCHEMA)
+    unknown = [column for column in columns if column not in COLUMNAR_SCHEMA]
+    if unknown:
+        raise ValueError(f"Unknown column(s) {', '.join(unknown)}")
+
+    if path.endswith('.parquet'):
+        pd = _pandas()
+        if pd is None:
+            raise ImportError("Reading Parquet needs pandas")
+        frame = pd.read_parquet(path, columns=columns)
+        return {column: frame[column].to_numpy() for column in columns}
+
+    # NpzFile reads (and decompresses) each member only when it is accessed
+    with np.load(path, allow_pickle=False) as npz:
+        result = {}
+        for column in columns:
+            if column in TEXT_COLUMNS:
+                result[column] = _decode_text(npz[column], npz[f"{column}.data"], npz[f"{column}.offsets"])
+            else:
+                result[column] = npz[column]
+        return result
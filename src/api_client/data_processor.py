@@ -3,133 +3,397 @@ Simple Warframe Data Processor - Starting with just Warframes
 Build this step by step
 """
 
-import json
+import logging
 import os
-from typing import Dict, List, Any
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections.abc import MutableMapping
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+from api_client import pipeline
+from api_client.build_manifest import BuildManifest, fingerprint
+from api_client.classifier import CLASSIFICATION_RULES, bucket_sources, classify_items, rules_for_source
+from api_client.columnar import (COLUMNAR_FILE, merge_columns, read_columnar, records_to_columns, resolve_format,
+                                  select_rows, write_columnar, write_columns)
+from api_client.path_index import PathIndex
+from api_client.raw_cache import UnreadableCacheError, load_cache_file
+from utils.helpers import (DEBUG, JSON_FORMATS, NORMAL, WarframeRecord, WeaponRecord, configure_logging,
+                           log_stage, read_json_stream)
+from utils.instrumentation import RunInstrumentation, StageStats, timed
+from utils.search_index import SEARCH_INDEX_FILE, SearchIndex, analyze
+
+logger = logging.getLogger(__name__)
+
+# Raw category key -> file in the raw data directory
+RAW_DATA_FILES = {
+    'warframes': 'Warframes.json',
+    'primary': 'Primary.json',
+    'secondary': 'Secondary.json',
+    'melee': 'Melee.json',
+    'misc': 'Misc.json',
+    'archwing': 'Archwing.json',
+    'arch-gun': 'Arch-Gun.json',
+    'arch-melee': 'Arch-Melee.json',
+    'pets': 'Pets.json',
+    'sentinels': 'Sentinels.json',
+    'sentinelweapons': 'SentinelWeapons.json',
+    'incarnon': 'Incarnon.json',
+    'amps': 'Amps.json',
+}
+
+# Build metadata lives in a sidecar directory of the processed data, so
+# nothing globbing data/processed/*.json mistakes it for a category
+BUILD_DIR = '.build'
+BUILD_MANIFEST_FILE = os.path.join(BUILD_DIR, 'build_manifest.json')
+RUN_REPORT_FILE = os.path.join(BUILD_DIR, 'run_report.json')
+
+# Every processed output: the extract method producing its raw items, the
+# clean method applied to each item, and the label used for debug samples.
+# Outputs backed by a classification bucket read that bucket's raw categories;
+# the others list their raw categories explicitly under 'sources'.
+PROCESSED_OUTPUTS = [
+    {'file': 'warframes.json', 'extract': 'extract_warframes_only', 'clean': 'clean_warframe_data',
+     'label': 'warframe', 'bucket': 'warframes'},
+    {'file': 'necramechs.json', 'extract': 'extract_necramechs', 'clean': 'clean_warframe_data',
+     'label': 'necramech', 'bucket': 'necramechs'},
+    {'file': 'primary_weapons.json', 'extract': 'extract_primary_weapons', 'clean': 'clean_weapon_data',
+     'label': 'primary weapon', 'sources': ['primary']},
+    {'file': 'secondary_weapons.json', 'extract': 'extract_secondary_weapons', 'clean': 'clean_weapon_data',
+     'label': 'secondary weapon', 'sources': ['secondary']},
+    {'file': 'melee_weapons.json', 'extract': 'extract_melee_weapons', 'clean': 'clean_weapon_data',
+     'label': 'melee weapon', 'bucket': 'melee_weapons'},
+    {'file': 'zaws.json', 'extract': 'extract_zaws', 'clean': 'clean_weapon_data',
+     'label': 'zaw component', 'bucket': 'zaws'},
+    {'file': 'kitguns.json', 'extract': 'extract_kitguns', 'clean': 'clean_weapon_data',
+     'label': 'kitgun component', 'bucket': 'kitguns'},
+    {'file': 'archwings.json', 'extract': 'extract_archwings', 'clean': 'clean_warframe_data',
+     'label': 'archwing', 'sources': ['archwing']},
+    {'file': 'arch_guns.json', 'extract': 'extract_arch_guns', 'clean': 'clean_weapon_data',
+     'label': 'arch-gun', 'bucket': 'arch_guns'},
+    {'file': 'arch_melees.json', 'extract': 'extract_arch_melees', 'clean': 'clean_weapon_data',
+     'label': 'arch-melee', 'bucket': 'arch_melees'},
+    {'file': 'companions.json', 'extract': 'extract_companions', 'clean': 'clean_warframe_data',
+     'label': 'companion', 'bucket': 'companions'},
+    {'file': 'sentinel_weapons.json', 'extract': 'extract_sentinel_weapons', 'clean': 'clean_weapon_data',
+     'label': 'sentinel weapon', 'bucket': 'sentinel_weapons'},
+    {'file': 'incarnon_weapons.json', 'extract': 'extract_incarnon_weapons', 'clean': 'clean_weapon_data',
+     'label': 'incarnon weapon', 'bucket': 'incarnon_weapons'},
+    {'file': 'amps.json', 'extract': 'extract_amps', 'clean': 'clean_weapon_data',
+     'label': 'amp', 'bucket': 'amps'},
+]
+
+def output_name(output: Dict[str, Any]) -> str:
+    """Output key without extension, e.g. 'kitguns' for kitguns.json"""
+    return os.path.splitext(output['file'])[0]
+
+def output_sources(output: Dict[str, Any]) -> List[str]:
+    """Raw categories an output is built from"""
+    return output.get('sources') or bucket_sources(output['bucket'])
+
+def select_outputs(categories: List[str] = None) -> List[Dict[str, Any]]:
+    """PROCESSED_OUTPUTS entries for category names like 'companions', in pipeline order; all for None"""
+    if not categories:
+        return list(PROCESSED_OUTPUTS)
+    known = [output_name(output) for output in PROCESSED_OUTPUTS]
+    unknown = [category for category in categories if category not in known]
+    if unknown:
+        raise ValueError(f"Unknown categor{'ies' if len(unknown) > 1 else 'y'} {', '.join(unknown)}, "
+                         f"expected some of {', '.join(known)}")
+    return [output for output in PROCESSED_OUTPUTS if output_name(output) in categories]
+
+def required_sources(outputs: List[Dict[str, Any]]) -> List[str]:
+    """Raw categories the given outputs are built from, each once"""
+    sources = []
+    for output in outputs:
+        sources.extend(source for source in output_sources(output) if source not in sources)
+    return sources
+
+def required_raw_files(outputs: List[Dict[str, Any]]) -> List[str]:
+    """Raw files the given outputs are built from, each once"""
+    return [RAW_DATA_FILES[source] for source in required_sources(outputs)]
+
+def find_processed_file(processed_data_dir: str, output: Dict[str, Any]) -> Optional[str]:
+    """The processed file of an output in whichever format it was written, or None"""
+    for extension in JSON_FORMATS.values():
+        path = os.path.join(processed_data_dir, output_name(output) + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+def output_fingerprint(output: Dict[str, Any], output_format: str = 'json') -> str:
+    """Hash of everything besides the raw files that decides an output's content"""
+    rules = [rule for rule in CLASSIFICATION_RULES if rule['bucket'] == output.get('bucket')]
+    return fingerprint({'output': output, 'rules': rules, 'format': output_format})
+
+def discard_nested(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop the list and dict fields (drops, components, patchlogs...) of raw items in place
+    
+    Classification and the clean functions only read scalar fields, so what
+    is left is enough to build every processed output.
+    """
+    for item in items:
+        if isinstance(item, dict):
+            for key in [key for key, value in item.items() if isinstance(value, (list, dict))]:
+                del item[key]
+    return items
+
+def _load_raw_file(path: str, discard_raw_nested: bool = False) -> Tuple[Any, float]:
+    """Parse one raw file, returning the data and the seconds it took"""
+    start_time = time.perf_counter()
+    try:
+        data = load_cache_file(path)
+    except UnreadableCacheError as e:
+        raise UnreadableCacheError(f"{path}: {e}, fetch it again") from e
+    if discard_raw_nested and isinstance(data, list):
+        # In the worker, so a process pool sends back only the slimmed items
+        discard_nested(data)
+    return data, time.perf_counter() - start_time
+
+class LazyRawData(MutableMapping):
+    """Raw categories keyed like RAW_DATA_FILES, each parsed on first access
+    
+    Behaves like the plain dict self.raw_data used to be, so raw_data.get('misc')
+    loads Misc.json the first time and returns the memoized list afterwards.
+    """
+    
+    def __init__(self, raw_data_dir: str, load_workers: int = None,
+                 process_pool_min_bytes: int = 4 * 1024 * 1024, files: Dict[str, str] = None,
+                 verbosity: int = NORMAL, discard_raw_nested: bool = False):
+        self.raw_data_dir = raw_data_dir
+        self.verbosity = verbosity
+        self.discard_raw_nested = discard_raw_nested
+        self.load_workers = load_workers
+        self.process_pool_min_bytes = process_pool_min_bytes
+        self.files = dict(files or RAW_DATA_FILES)
+        self.load_timings = {}
+        self._loaded = {}
+    
+    def __getitem__(self, key: str) -> List[Dict[str, Any]]:
+        if key not in self._loaded:
+            if key not in self.files:
+                raise KeyError(key)
+            self.preload([key], parallel=False, report=False)
+        return self._loaded[key]
+    
+    def __setitem__(self, key: str, value: List[Dict[str, Any]]) -> None:
+        self._loaded[key] = value
+    
+    def __delitem__(self, key: str) -> None:
+        # Forget a loaded category; it is read from disk again on next access
+        del self._loaded[key]
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self.files or key in self._loaded
+    
+    def __iter__(self):
+        yield from self.files
+        yield from (key for key in self._loaded if key not in self.files)
+    
+    def __len__(self) -> int:
+        return len(self.files) + sum(1 for key in self._loaded if key not in self.files)
+    
+    def is_loaded(self, key: str) -> bool:
+        return key in self._loaded
+    
+    def preload(self, keys: List[str] = None, parallel: bool = True, report: bool = True) -> None:
+        """Load several categories at once, in parallel unless parallel=False
+        
+        With report=True one 'load' stage record summarises the whole batch.
+        """
+        keys = [key for key in (keys or self.files) if key not in self._loaded]
+        if not keys:
+            return
+        start_time = time.perf_counter()
+        
+        large_files = {}
+        small_files = {}
+        for key in keys:
+            filename = self.files[key]
+            path = os.path.join(self.raw_data_dir, filename)
+            if not os.path.exists(path):
+                if self.verbosity >= NORMAL:
+                    logger.warning(f"✗ {filename} not found!")
+                self._loaded[key] = []
+            elif parallel and os.path.getsize(path) >= self.process_pool_min_bytes:
+                large_files[key] = path
+            else:
+                small_files[key] = path
+        
+        results = {}
+        if not parallel:
+            for key, path in small_files.items():
+                results[key] = _load_raw_file(path, self.discard_raw_nested)
+        else:
+            if large_files:
+                try:
+                    with ProcessPoolExecutor(max_workers=self.load_workers) as executor:
+                        futures = {key: executor.submit(_load_raw_file, path, self.discard_raw_nested)
+                                   for key, path in large_files.items()}
+                        results.update({key: future.result() for key, future in futures.items()})
+                except (OSError, NotImplementedError, BrokenProcessPool) as e:
+                    # Some sandboxes can't start worker processes; threads still work
+                    if self.verbosity >= NORMAL:
+                        logger.warning(f"✗ Process pool unavailable ({e}), loading large files in threads")
+                    small_files.update({key: path for key, path in large_files.items() if key not in results})
+            
+            with ThreadPoolExecutor(max_workers=self.load_workers) as executor:
+                futures = {key: executor.submit(_load_raw_file, path, self.discard_raw_nested)
+                           for key, path in small_files.items()}
+                results.update({key: future.result() for key, future in futures.items()})
+        
+        # Report in manifest order so the output is stable
+        for key in keys:
+            if key in results:
+                self._loaded[key], self.load_timings[key] = results[key]
+                if self.verbosity >= DEBUG:
+                    logger.debug(f"✓ Loaded {len(self._loaded[key])} items from {self.files[key]} "
+                                 f"({self.load_timings[key]:.3f}s)")
+        
+        if report and self.verbosity >= NORMAL:
+            elapsed = time.perf_counter() - start_time
+            items = sum(len(self._loaded[key]) for key in keys)
+            log_stage(logger, 'load', f"Loaded {len(results)} raw files ({items} items) in {elapsed:.3f}s",
+                      files=len(results), missing=len(keys) - len(results), items=items,
+                      seconds=round(elapsed, 4),
+                      timings={key: round(self.load_timings[key], 4) for key in results})
 
 class WarframeDataProcessor:
     """Simple processor starting with just Warframes"""
     
-    def __init__(self, raw_data_dir: str = "data/raw", processed_data_dir: str = "data/processed"):
+    def __init__(self, raw_data_dir: str = "data/raw", processed_data_dir: str = "data/processed",
+                 load_workers: int = None, process_pool_min_bytes: int = 4 * 1024 * 1024,
+                 verbosity: int = NORMAL, output_format: str = 'json', columnar_format: str = None,
+                 discard_raw_nested: bool = False, report_file: str = None, metrics_file: str = None,
+                 trace_memory: bool = False, profile_stages: bool = False):
         self.raw_data_dir = raw_data_dir
         self.processed_data_dir = processed_data_dir
-        self.raw_data = {}
+        
+        # 'json' (compact array, one item per line) or 'jsonl' (JSON Lines)
+        if output_format not in JSON_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}', expected one of {', '.join(JSON_FORMATS)}")
+        self.output_format = output_format
+        
+        # Also export a columnar catalogue after processing: 'auto', 'parquet', 'npz' or None for no export
+        self.columnar_format = resolve_format(columnar_format) if columnar_format else None
+        
+        # QUIET runs emit nothing, NORMAL one record per stage, DEBUG everything
+        self.verbosity = verbosity
+        
+        # Parallel loading settings for load_raw_data
+        self.load_workers = load_workers
+        self.process_pool_min_bytes = process_pool_min_bytes
+        
+        # Drop nested raw fields (drop tables, components...) as soon as a file is parsed
+        self.discard_raw_nested = discard_raw_nested
+        
+        # Raw categories are parsed the first time they are accessed
+        self.raw_data = LazyRawData(raw_data_dir, load_workers, process_pool_min_bytes, verbosity=verbosity,
+                                    discard_raw_nested=discard_raw_nested)
+        self.load_timings = self.raw_data.load_timings
+        
+        # Classification results and uniqueName index per raw category, filled on first use
+        self._classified = {}
+        self.path_index = PathIndex()
+        
+        # Outputs rebuilt (with the reason) and skipped by the last process_warframes run
+        self.build_report = {}
+        
+        # Per-stage timings of the last run, written to report_file (and to
+        # metrics_file as Prometheus text, if given); trace_memory adds exact
+        # per-stage tracemalloc peaks at a noticeable cost. profile_stages
+        # splits the build time into classify, clean and write by timing
+        # every item, which makes the build several times slower
+        self.report_file = report_file or os.path.join(processed_data_dir, RUN_REPORT_FILE)
+        self.metrics_file = metrics_file
+        self.trace_memory = trace_memory
+        self.profile_stages = profile_stages
+        self.instrumentation = RunInstrumentation('process', trace_memory)
         
         # Create processed directory if it doesn't exist
         os.makedirs(processed_data_dir, exist_ok=True)
     
-    def load_raw_data(self) -> None:
-        """Load the raw Warframes.json and Primary.json files"""
-        # Load Warframes
-        warframes_file = os.path.join(self.raw_data_dir, 'Warframes.json')
-        if os.path.exists(warframes_file):
-            with open(warframes_file, 'r', encoding='utf-8') as f:
-                self.raw_data['warframes'] = json.load(f)
-                print(f"✓ Loaded {len(self.raw_data['warframes'])} items from Warframes.json")
-        else:
-            print("✗ Warframes.json not found!")
-            self.raw_data['warframes'] = []
-        
-        # Load Primary weapons
-        primary_file = os.path.join(self.raw_data_dir, 'Primary.json')
-        if os.path.exists(primary_file):
-            with open(primary_file, 'r', encoding='utf-8') as f:
-                self.raw_data['primary'] = json.load(f)
-                print(f"✓ Loaded {len(self.raw_data['primary'])} items from Primary.json")
-        # Load Secondary weapons
-        secondary_file = os.path.join(self.raw_data_dir, 'Secondary.json')
-        if os.path.exists(secondary_file):
-            with open(secondary_file, 'r', encoding='utf-8') as f:
-                self.raw_data['secondary'] = json.load(f)
-                print(f"✓ Loaded {len(self.raw_data['secondary'])} items from Secondary.json")
-        # Load Melee weapons
-        melee_file = os.path.join(self.raw_data_dir, 'Melee.json')
-        if os.path.exists(melee_file):
-            with open(melee_file, 'r', encoding='utf-8') as f:
-                self.raw_data['melee'] = json.load(f)
-                print(f"✓ Loaded {len(self.raw_data['melee'])} items from Melee.json")
-        # Load Misc items
-        misc_file = os.path.join(self.raw_data_dir, 'Misc.json')
-        if os.path.exists(misc_file):
-            with open(misc_file, 'r', encoding='utf-8') as f:
-                self.raw_data['misc'] = json.load(f)
-                print(f"✓ Loaded {len(self.raw_data['misc'])} items from Misc.json")
-        # Load Archwings
-        archwing_file = os.path.join(self.raw_data_dir, 'Archwing.json')
-        if os.path.exists(archwing_file):
-            with open(archwing_file, 'r', encoding='utf-8') as f:
-                self.raw_data['archwing'] = json.load(f)
-                print(f"✓ Loaded {len(self.raw_data['archwing'])} items from Archwing.json")
-        # Load Arch-Guns
-        archgun_file = os.path.join(self.raw_data_dir, 'Arch-Gun.json')
-        if os.path.exists(archgun_file):
-            with open(archgun_file, 'r', encoding='utf-8') as f:
-                self.raw_data['arch-gun'] = json.load(f)
-                print(f"✓ Loaded {len(self.raw_data['arch-gun'])} items from Arch-Gun.json")
-        else:
-            print("✗ Arch-Gun.json not found!")
-            self.raw_data['arch-gun'] = []
-            
-        # Load Arch-Melee
-        archmelee_file = os.path.join(self.raw_data_dir, 'Arch-Melee.json')
-        if os.path.exists(archmelee_file):
-            with open(archmelee_file, 'r', encoding='utf-8') as f:
-                self.raw_data['arch-melee'] = json.load(f)
-                print(f"✓ Loaded {len(self.raw_data['arch-melee'])} items from Arch-Melee.json")
-        else:
-            print("✗ Arch-Melee.json not found!")
-            self.raw_data['arch-melee'] = []
-            
-        # Load Pets
-        pets_file = os.path.join(self.raw_data_dir, 'Pets.json')
-        if os.path.exists(pets_file):
-            with open(pets_file, 'r', encoding='utf-8') as f:
-                self.raw_data['pets'] = json.load(f)
-                print(f"✓ Loaded {len(self.raw_data['pets'])} items from Pets.json")
-        else:
-            print("✗ Pets.json not found!")
-            self.raw_data['pets'] = []
-        
-        # Load Sentinels
-        sentinels_file = os.path.join(self.raw_data_dir, 'Sentinels.json')
-        if os.path.exists(sentinels_file):
-            with open(sentinels_file, 'r', encoding='utf-8') as f:
-                self.raw_data['sentinels'] = json.load(f)
-                print(f"✓ Loaded {len(self.raw_data['sentinels'])} items from Sentinels.json")
-        else:
-            print("✗ Sentinels.json not found!")
-            self.raw_data['sentinels'] = []
-            
-        # Load Sentinel Weapons
-        sentinel_weapons_file = os.path.join(self.raw_data_dir, 'SentinelWeapons.json')
-        if os.path.exists(sentinel_weapons_file):
-            with open(sentinel_weapons_file, 'r', encoding='utf-8') as f:
-                self.raw_data['sentinelweapons'] = json.load(f)
-                print(f"✓ Loaded {len(self.raw_data['sentinelweapons'])} items from SentinelWeapons.json")
-        else:
-            print("✗ SentinelWeapons.json not found!")
-            self.raw_data['sentinelweapons'] = []
-            
-        # Load Incarnon weapons
-        incarnon_file = os.path.join(self.raw_data_dir, 'Incarnon.json')
-        if os.path.exists(incarnon_file):
-            with open(incarnon_file, 'r', encoding='utf-8') as f:
-                self.raw_data['incarnon'] = json.load(f)
-                print(f"✓ Loaded {len(self.raw_data['incarnon'])} items from Incarnon.json")
-        else:
-            print("✗ Incarnon.json not found!")
-            self.raw_data['incarnon'] = []
-            
-        # Load Amps
-        amps_file = os.path.join(self.raw_data_dir, 'Amps.json')
-        if os.path.exists(amps_file):
-            with open(amps_file, 'r', encoding='utf-8') as f:
-                self.raw_data['amps'] = json.load(f)
-                print(f"✓ Loaded {len(self.raw_data['amps'])} items from Amps.json")
-        else:
-            print("✗ Amps.json not found!")
-            self.raw_data['amps'] = []
-
+    def load_raw_data(self, keys: List[str] = None, parallel: bool = True) -> None:
+        """(Re)load raw files eagerly: all of RAW_DATA_FILES, or only the given keys
+        
+        Files of at least process_pool_min_bytes are parsed in a process pool,
+        smaller ones in a thread pool. Per-file timings end up in self.load_timings.
+        Any other category is still loaded on first access through self.raw_data.
+        """
+        self.raw_data = LazyRawData(self.raw_data_dir, self.load_workers, self.process_pool_min_bytes,
+                                    verbosity=self.verbosity, discard_raw_nested=self.discard_raw_nested)
+        self.load_timings = self.raw_data.load_timings
+        self._classified = {}
+        self.path_index = PathIndex()
+        
+        self.raw_data.preload(keys, parallel)
+    
+    def processed_path(self, output: Dict[str, Any]) -> str:
+        """Where an output of PROCESSED_OUTPUTS is written in the current output format"""
+        return os.path.join(self.processed_data_dir, output_name(output) + JSON_FORMATS[self.output_format])
+    
+    def stream_output(self, output: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Raw items of one PROCESSED_OUTPUTS entry, produced lazily from its raw categories"""
+        if 'bucket' in output:
+            return pipeline.bucket_stream(self.classify_source, output['bucket'])
+        return iter(getattr(self, output['extract'])() or [])
+    
+    def classify_source(self, source: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Walk one raw category once, routing its items to every matching bucket"""
+        if source not in self._classified:
+            items = self.index_source(source)
+            infos = self.path_index.source_info(source)
+            self._classified[source] = classify_items(items, rules_for_source(source), infos)
+        return self._classified[source]
+    
+    def index_source(self, source: str) -> List[Dict[str, Any]]:
+        """Add a raw category to the uniqueName path index, returning its items"""
+        items = self.raw_data.get(source) or []
+        if not self.path_index.has_source(source):
+            self.path_index.add_source(source, items)
+        return items
+    
+    def items_under(self, prefix: str, sources: List[str] = None) -> List[Dict[str, Any]]:
+        """All raw items whose uniqueName starts with a path, e.g. '/Lotus/Powersuits/EntratiMech/'"""
+        for source in sources or list(self.raw_data):
+            self.index_source(source)
+        return self.path_index.under(prefix, sources)
+    
+    def items_in_folder(self, folder: str, sources: List[str] = None) -> List[Dict[str, Any]]:
+        """All raw items with a uniqueName folder segment named folder, e.g. 'Barrel'"""
+        for source in sources or list(self.raw_data):
+            self.index_source(source)
+        return self.path_index.with_folder(folder, sources)
+    
+    def get_bucket(self, bucket: str) -> List[Dict[str, Any]]:
+        """Items routed to a bucket, collected from all of its raw categories"""
+        items = []
+        for source in bucket_sources(bucket):
+            items.extend(self.classify_source(source).get(bucket, []))
+        return items
+    
+    def _debug(self, message: str) -> None:
+        """Emit a debug line, only when running at DEBUG verbosity"""
+        if self.verbosity >= DEBUG:
+            logger.debug(message)
+    
+    def _debug_first_items(self, category: str, count: int = 5) -> None:
+        """Debug listing of the first few raw items of a category"""
+        logger.debug(f"\n=== DEBUG: First {count} {category} items and their types ===")
+        for i, item in enumerate(self.raw_data[category][:count]):
+            logger.debug(f"{i+1}. {item.get('name', 'Unknown')} - Type: '{item.get('type', 'No Type')}'")
+    
+    def _debug_type_breakdown(self, title: str, items: List[Dict[str, Any]]) -> None:
+        """Debug listing of how many items there are of each type"""
+        type_counts = {}
+        for item in items:
+            item_type = item.get('type', 'No Type')
+            type_counts[item_type] = type_counts.get(item_type, 0) + 1
+        
+        logger.debug(title)
+        for item_type, count in sorted(type_counts.items()):
+            logger.debug(f"  '{item_type}': {count} items")
+    
     def explore_warframes(self) -> None:
         """Let's see what's actually in the Warframes data"""
         if not self.raw_data.get('warframes'):
@@ -158,43 +422,16 @@ class WarframeDataProcessor:
     
     def extract_warframes_only(self) -> List[Dict[str, Any]]:
         """Extract only actual Warframes (not Necramechs, etc.)"""
-        warframes = []
+        warframes = self.get_bucket('warframes')
         
-        if not self.raw_data.get('warframes'):
-            return warframes
-        
-        for item in self.raw_data['warframes']:
-            # Check unique_name to filter out Necramechs
-            unique_name = item.get('uniqueName', '')
-            
-            # Skip if it's a Necramech (contains the Entrati Mech path)
-            if '/Lotus/Powersuits/EntratiMech/' in unique_name:
-                continue  # Skip this item, it's a Necramech
-            
-            # Now check if it's a regular Warframe
-            item_type = item.get('type', '')
-            if item_type == 'Warframe':
-                warframes.append(item)
-        
-        print(f"✓ Found {len(warframes)} Warframes (filtered out Necramechs)")
+        self._debug(f"✓ Found {len(warframes)} Warframes (filtered out Necramechs)")
         return warframes
     
     def extract_necramechs(self) -> List[Dict[str, Any]]:
         """Extract Necramechs based on unique_name"""
-        necramechs = []
+        necramechs = self.get_bucket('necramechs')
         
-        if not self.raw_data.get('warframes'):
-            return necramechs
-        
-        for item in self.raw_data['warframes']:
-            # Check unique_name for Necramech path
-            unique_name = item.get('uniqueName', '')
-            
-            # If it contains the Entrati Mech path, it's a Necramech
-            if '/Lotus/Powersuits/EntratiMech/' in unique_name:
-                necramechs.append(item)
-        
-        print(f"✓ Found {len(necramechs)} Necramechs")
+        self._debug(f"✓ Found {len(necramechs)} Necramechs")
         return necramechs
     
     def explore_primary_weapons(self) -> None:
@@ -291,113 +528,48 @@ class WarframeDataProcessor:
     
     def extract_melee_weapons(self) -> List[Dict[str, Any]]:
         """Extract melee weapons (excluding Zaw components)"""
-        melee_weapons = []
-        
         if not self.raw_data.get('melee'):
-            return melee_weapons
+            return []
         
-        # Debug: Let's see what we're actually getting
-        print("\n=== DEBUG: First 5 melee items and their types ===")
-        for i, item in enumerate(self.raw_data['melee'][:5]):
-            print(f"{i+1}. {item.get('name', 'Unknown')} - Type: '{item.get('type', 'No Type')}'")
+        melee_weapons = self.get_bucket('melee_weapons')
         
-        for item in self.raw_data['melee']:
-            item_type = item.get('type', '')
-            
-            # Skip Zaw components - they go in their own file
-            if item_type == 'Zaw Component':
-                continue  # Skip this item, it's a Zaw component
-            
-            # Take all other items that have a type
-            if item_type:
-                melee_weapons.append(item)
-        
-        print(f"✓ Found {len(melee_weapons)} melee weapons (filtered out Zaw components)")
-        
-        # Show type breakdown
-        type_counts = {}
-        for item in melee_weapons:
-            item_type = item.get('type', 'No Type')
-            type_counts[item_type] = type_counts.get(item_type, 0) + 1
-        
-        print("Type breakdown:")
-        for item_type, count in sorted(type_counts.items()):
-            print(f"  '{item_type}': {count} items")
+        if self.verbosity >= DEBUG:
+            # Debug: Let's see what we're actually getting
+            self._debug_first_items('melee')
+            self._debug(f"✓ Found {len(melee_weapons)} melee weapons (filtered out Zaw components)")
+            self._debug_type_breakdown("Type breakdown:", melee_weapons)
         
         return melee_weapons
     
     def extract_zaws(self) -> List[Dict[str, Any]]:
         """Extract Zaw components based on type"""
-        zaws = []
+        zaws = self.get_bucket('zaws')
         
-        if not self.raw_data.get('melee'):
-            return zaws
-        
-        for item in self.raw_data['melee']:
-            # Check type for Zaw components
-            item_type = item.get('type', '')
-            unique_name = item.get('uniqueName', '')
-            # If it's a Zaw Component, it goes here
-            if item_type == 'Zaw Component':
-                
-                if 'pvp' in unique_name.lower():
-                    continue
-                
-                if any(zaw_part in unique_name for zaw_part in ['/Tip/', '/Tips/']):
-                    zaws.append(item)
-        
-        print(f"✓ Found {len(zaws)} Zaw components")
+        self._debug(f"✓ Found {len(zaws)} Zaw components")
         return zaws
     
     def extract_kitguns(self) -> List[Dict[str, Any]]:
         """Extract Kitgun barrels from misc.json based on unique_name and masterable status"""
         kitguns = []
         
-        print(f"\n=== DEBUG: Looking for kitgun barrels in Misc ===")
+        self._debug(f"\n=== DEBUG: Looking for kitgun barrels in Misc ===")
         
-        # Check misc.json for kitgun barrels
-        if self.raw_data.get('misc'):
-            found_items = []
-            for item in self.raw_data['misc']:
-                unique_name = item.get('uniqueName', '')
-                masterable = item.get('masterable', False)
-                
-                # Look for "/Barrel/" in the unique_name AND must be masterable
-                if ('/Barrel/' in unique_name or '/Barrels/' in unique_name) and '/OperatorAmplifiers/' not in unique_name:
-                    # Filter out PvP variants
-                    if 'pvp' not in unique_name.lower():
-                        found_items.append(item)
-                        kitguns.append(item)
+        # Barrels come from misc.json, and primary/secondary just in case
+        for category in bucket_sources('kitguns'):
+            if not self.raw_data.get(category):
+                continue
             
-            print(f"Found {len(found_items)} kitgun barrels in MISC:")
-            for item in found_items:
-                print(f"  • {item.get('name', 'Unknown')} - Type: '{item.get('type', 'Unknown')}'")
-                print(f"    Unique: {item.get('uniqueName', 'Unknown')}")
-                print(f"    Masterable: {item.get('masterable', False)}")
-        
-        # Also check primary and secondary just in case
-        for category in ['primary', 'secondary']:
-            if self.raw_data.get(category):
-                found_items = []
-                for item in self.raw_data[category]:
-                    unique_name = item.get('uniqueName', '')
-                    masterable = item.get('masterable', False)
-                    
-                    # Look for "/Barrel/" in the unique_name AND must be masterable
-                    if ('/Barrel/' in unique_name or '/Barrels/' in unique_name) and '/OperatorAmplifiers/' not in unique_name:
-                        # Filter out PvP variants
-                        if 'pvp' not in unique_name.lower():
-                            found_items.append(item)
-                            kitguns.append(item)
-                
-                if found_items:
-                    print(f"Found {len(found_items)} kitgun barrels in {category.upper()}:")
-                    for item in found_items:
-                        print(f"  • {item.get('name', 'Unknown')} - Type: '{item.get('type', 'Unknown')}'")
-                        print(f"    Unique: {item.get('uniqueName', 'Unknown')}")
-                        print(f"    Masterable: {item.get('masterable', False)}")
-        
-        print(f"✓ Found {len(kitguns)} total kitgun barrels")
+            found_items = self.classify_source(category)['kitguns']
+            kitguns.extend(found_items)
+            
+            if self.verbosity >= DEBUG and (found_items or category == 'misc'):
+                logger.debug(f"Found {len(found_items)} kitgun barrels in {category.upper()}:")
+                for item in found_items:
+                    logger.debug(f"  • {item.get('name', 'Unknown')} - Type: '{item.get('type', 'Unknown')}'")
+                    logger.debug(f"    Unique: {item.get('uniqueName', 'Unknown')}")
+                    logger.debug(f"    Masterable: {item.get('masterable', False)}")
+        
+        self._debug(f"✓ Found {len(kitguns)} total kitgun barrels")
         return kitguns
     
     def explore_archwings(self) -> None:
@@ -461,39 +633,16 @@ class WarframeDataProcessor:
     
     def extract_arch_guns(self) -> List[Dict[str, Any]]:
         """Extract arch-guns"""
-        arch_guns = []
-        
         if not self.raw_data.get('arch-gun'):
-            return arch_guns
+            return []
         
-        # Debug: Let's see what we're actually getting
-        print("\n=== DEBUG: First 5 arch-gun items and their types ===")
-        for i, item in enumerate(self.raw_data['arch-gun'][:5]):
-            print(f"{i+1}. {item.get('name', 'Unknown')} - Type: '{item.get('type', 'No Type')}'")
+        arch_guns = self.get_bucket('arch_guns')
         
-        for item in self.raw_data['arch-gun']:
-            item_type = item.get('type', '')
-            unique_name = item.get('uniqueName', '')
-            
-            # Filter out PvP variants
-            if 'pvp' in unique_name.lower():
-                continue
-            
-            # Take all items that have a type
-            if item_type:
-                arch_guns.append(item)
-        
-        print(f"✓ Found {len(arch_guns)} arch-guns (filtered PvP)")
-        
-        # Show type breakdown
-        type_counts = {}
-        for item in arch_guns:
-            item_type = item.get('type', 'No Type')
-            type_counts[item_type] = type_counts.get(item_type, 0) + 1
-        
-        print("Type breakdown:")
-        for item_type, count in sorted(type_counts.items()):
-            print(f"  '{item_type}': {count} items")
+        if self.verbosity >= DEBUG:
+            # Debug: Let's see what we're actually getting
+            self._debug_first_items('arch-gun')
+            self._debug(f"✓ Found {len(arch_guns)} arch-guns (filtered PvP)")
+            self._debug_type_breakdown("Type breakdown:", arch_guns)
         
         return arch_guns
     
@@ -525,39 +674,16 @@ class WarframeDataProcessor:
 
     def extract_arch_melees(self) -> List[Dict[str, Any]]:
         """Extract arch-melee"""
-        arch_melees = []
-
         if not self.raw_data.get('arch-melee'):
-            return arch_melees
-
-        # Debug: Let's see what we're actually getting
-        print("\n=== DEBUG: First 5 arch-melee items and their types ===")
-        for i, item in enumerate(self.raw_data['arch-melee'][:5]):
-            print(f"{i+1}. {item.get('name', 'Unknown')} - Type: '{item.get('type', 'No Type')}'")
-
-        for item in self.raw_data['arch-melee']:
-            item_type = item.get('type', '')
-            unique_name = item.get('uniqueName', '')
-            
-            # Filter out PvP variants
-            if 'pvp' in unique_name.lower():
-                continue
-            
-            # Take all items that have a type
-            if item_type:
-                arch_melees.append(item)
+            return []
 
-        print(f"✓ Found {len(arch_melees)} arch-melees (filtered PvP)")
+        arch_melees = self.get_bucket('arch_melees')
 
-        # Show type breakdown
-        type_counts = {}
-        for item in arch_melees:
-            item_type = item.get('type', 'No Type')
-            type_counts[item_type] = type_counts.get(item_type, 0) + 1
-        
-        print("Type breakdown:")
-        for item_type, count in sorted(type_counts.items()):
-            print(f"  '{item_type}': {count} items")
+        if self.verbosity >= DEBUG:
+            # Debug: Let's see what we're actually getting
+            self._debug_first_items('arch-melee')
+            self._debug(f"✓ Found {len(arch_melees)} arch-melees (filtered PvP)")
+            self._debug_type_breakdown("Type breakdown:", arch_melees)
 
         return arch_melees
 
@@ -607,55 +733,23 @@ class WarframeDataProcessor:
         """Extract all companions (pets + sentinels)"""
         companions = []
         
-        print(f"\n=== DEBUG: Extracting companions ===")
+        self._debug(f"\n=== DEBUG: Extracting companions ===")
         
         # Extract pets
         if self.raw_data.get('pets'):
-            pets_added = 0
-            for item in self.raw_data['pets']:
-                unique_name = item.get('uniqueName', '')
-                item_type = item.get('type', '')
-                
-                # Filter out parts
-                if item_type == 'Pets':
-                    # Filter out PvP variants
-                    if 'pvp' in unique_name.lower():
-                        continue
-                    
-                    companions.append(item)
-                    pets_added += 1
-            
-            print(f"Added {pets_added} pets to companions")
+            pets = self.classify_source('pets')['companions']
+            companions.extend(pets)
+            self._debug(f"Added {len(pets)} pets to companions")
         
         # Extract sentinels
         if self.raw_data.get('sentinels'):
-            sentinels_added = 0
-            for item in self.raw_data['sentinels']:
-                unique_name = item.get('uniqueName', '')
-                item_type = item.get('type', '')
-                
-                # Filter out PvP variants
-                if 'pvp' in unique_name.lower():
-                    continue
-                
-                # Take all items that have a type
-                if item_type:
-                    companions.append(item)
-                    sentinels_added += 1
-            
-            print(f"Added {sentinels_added} sentinels to companions")
-        
-        print(f"✓ Found {len(companions)} total companions (filtered PvP)")
-        
-        # Show type breakdown
-        type_counts = {}
-        for item in companions:
-            item_type = item.get('type', 'No Type')
-            type_counts[item_type] = type_counts.get(item_type, 0) + 1
+            sentinels = self.classify_source('sentinels')['companions']
+            companions.extend(sentinels)
+            self._debug(f"Added {len(sentinels)} sentinels to companions")
         
-        print("Combined companion type breakdown:")
-        for item_type, count in sorted(type_counts.items()):
-            print(f"  '{item_type}': {count} items")
+        if self.verbosity >= DEBUG:
+            self._debug(f"✓ Found {len(companions)} total companions (filtered PvP)")
+            self._debug_type_breakdown("Combined companion type breakdown:", companions)
         
         return companions
 
@@ -671,8 +765,8 @@ class WarframeDataProcessor:
 
     def extract_sentinel_weapons(self) -> List[Dict[str, Any]]:
         """Extract all sentinel weapons"""
-        print(f"\n=== DEBUG: Extracting Sentinel Weapons ===")
-        return self.raw_data.get('sentinelweapons', [])
+        self._debug(f"\n=== DEBUG: Extracting Sentinel Weapons ===")
+        return self.get_bucket('sentinel_weapons')
     
     def explore_incarnon_weapons(self) -> None:
         """Let's see what's actually in the Misc data for Equipment Adapters"""
@@ -727,27 +821,19 @@ class WarframeDataProcessor:
             
     def extract_incarnon_weapons(self) -> List[Dict[str, Any]]:
         """Extract Equipment Adapters from misc.json"""
-        incarnon_adapters = []
-        
         if not self.raw_data.get('misc'):
-            return incarnon_adapters
+            return []
         
-        print("\n=== DEBUG: Looking for Equipment Adapters in Misc ===")
+        incarnon_adapters = self.get_bucket('incarnon_weapons')
         
-        for item in self.raw_data['misc']:
-            name = item.get('name', '').lower()
-            item_type = item.get('type', '').lower()
+        if self.verbosity >= DEBUG:
+            logger.debug("\n=== DEBUG: Looking for Equipment Adapters in Misc ===")
+            logger.debug(f"✓ Found {len(incarnon_adapters)} Equipment Adapters")
             
-            # Look for Equipment Adapters
-            if item_type == 'equipment adapter' and 'incarnon' in name:
-                incarnon_adapters.append(item)
-        
-        print(f"✓ Found {len(incarnon_adapters)} Equipment Adapters")
-        
-        # Show what we found
-        for item in incarnon_adapters:
-            print(f"  • {item.get('name', 'Unknown')} - Type: '{item.get('type', 'Unknown')}'")
-            print(f"    Unique: {item.get('uniqueName', 'Unknown')}")
+            # Show what we found
+            for item in incarnon_adapters:
+                logger.debug(f"  • {item.get('name', 'Unknown')} - Type: '{item.get('type', 'Unknown')}'")
+                logger.debug(f"    Unique: {item.get('uniqueName', 'Unknown')}")
         
         return incarnon_adapters
     
@@ -775,288 +861,324 @@ class WarframeDataProcessor:
     
     def extract_amps(self) -> List[Dict[str, Any]]:
         """Extract Amp data"""
-        amps = []
-        
         if not self.raw_data.get('misc'):
-            return amps
+            return []
         
-        print("\n=== DEBUG: Extracting Amps ===")
+        amps = self.get_bucket('amps')
         
-        for item in self.raw_data['misc']:
-            name = item.get('name', '').lower()
-            item_type = item.get('type', '').lower()
-                       
-            # Take all items that have a type
-            if item_type == 'amp' and 'prism' in name:
-                amps.append(item)
-        
-        print(f"✓ Found {len(amps)} Amps")
+        self._debug(f"✓ Found {len(amps)} Amps")
         
         return amps
 
-    def clean_weapon_data(self, weapon: Dict[str, Any]) -> Dict[str, Any]:
+    def clean_weapon_data(self, weapon: Dict[str, Any]) -> WeaponRecord:
         """Clean and simplify weapon data"""
-        return {
-            'name': weapon.get('name', 'Unknown'),
-            'unique_name': weapon.get('uniqueName', ''),
-            'type': weapon.get('type', ''),
-            'description': weapon.get('description', ''),
-            'mastery_rank': weapon.get('masteryReq', 0),
-            'tradable': weapon.get('tradable', False),
-            'vaulted': weapon.get('vaulted', False),
+        return WeaponRecord(
+            name=weapon.get('name', 'Unknown'),
+            unique_name=weapon.get('uniqueName', ''),
+            type=weapon.get('type', ''),
+            description=weapon.get('description', ''),
+            mastery_rank=weapon.get('masteryReq', 0),
+            tradable=weapon.get('tradable', False),
+            vaulted=weapon.get('vaulted', False),
             # Weapon-specific stats
-            'total_damage': weapon.get('totalDamage', 0),
-            'fire_rate': weapon.get('fireRate', 0),
-            'accuracy': weapon.get('accuracy', 0),
-            'critical_chance': weapon.get('criticalChance', 0),
-            'status_chance': weapon.get('statusChance', 0)
-        }
+            total_damage=weapon.get('totalDamage', 0),
+            fire_rate=weapon.get('fireRate', 0),
+            accuracy=weapon.get('accuracy', 0),
+            critical_chance=weapon.get('criticalChance', 0),
+            status_chance=weapon.get('statusChance', 0)
+        )
     
-    def clean_warframe_data(self, warframe: Dict[str, Any]) -> Dict[str, Any]:
+    def clean_warframe_data(self, warframe: Dict[str, Any]) -> WarframeRecord:
         """Clean and simplify warframe data"""
-        return {
-            'name': warframe.get('name', 'Unknown'),
-            'unique_name': warframe.get('uniqueName', ''),
-            'type': warframe.get('type', ''),
-            'description': warframe.get('description', ''),
-            'mastery_rank': warframe.get('masteryReq', 0),
-            'tradable': warframe.get('tradable', False),
-            'vaulted': warframe.get('vaulted', False)
-        }
+        return WarframeRecord(
+            name=warframe.get('name', 'Unknown'),
+            unique_name=warframe.get('uniqueName', ''),
+            type=warframe.get('type', ''),
+            description=warframe.get('description', ''),
+            mastery_rank=warframe.get('masteryReq', 0),
+            tradable=warframe.get('tradable', False),
+            vaulted=warframe.get('vaulted', False)
+        )
     
-    def process_warframes(self) -> None:
-        """Process warframes, necramechs, and primary weapons"""
-        print("=== Processing Warframes and Primary Weapons ===")
-        
-        # Load data
-        self.load_raw_data()
-        
-        # Explore what we have
-        self.explore_warframes()
-        self.explore_primary_weapons()
-        self.explore_secondary_weapons()
-        self.explore_melee_weapons()
-        self.explore_archwings()
-        self.explore_arch_guns()
-        self.explore_arch_melees()
-        self.explore_companions()
-        self.explore_sentinel_weapons()
-        self.explore_incarnon_weapons()
-        self.explore_amps()
-        
-        # Extract everything
-        print("\n=== Extracting Data ===")
-        warframes = self.extract_warframes_only() or []
-        print(f"Warframes extracted: {len(warframes)}")
-        
-        necramechs = self.extract_necramechs() or []
-        print(f"Necramechs extracted: {len(necramechs)}")
-        
-        primary_weapons = self.extract_primary_weapons() or []
-        print(f"Primary weapons extracted: {len(primary_weapons)}")
-        
-        secondary_weapons = self.extract_secondary_weapons() or []
-        print(f"Secondary weapons extracted: {len(secondary_weapons)}")
-        
-        melee_weapons = self.extract_melee_weapons() or []
-        print(f"Melee weapons extracted: {len(melee_weapons)}")
-        
-        zaws = self.extract_zaws() or []
-        print(f"Zaws extracted: {len(zaws)}")
-        
-        kitguns = self.extract_kitguns() or []
-        print(f"Kitguns extracted: {len(kitguns)}")
-        
-        archwings = self.extract_archwings() or []
-        print(f"Archwings extracted: {len(archwings)}")
-        
-        arch_guns = self.extract_arch_guns() or []
-        print(f"Arch-guns extracted: {len(arch_guns)}")
-
-        arch_melees = self.extract_arch_melees() or []
-        print(f"Arch-melees extracted: {len(arch_melees)}")
-        
-        companions = self.extract_companions() or []
-        print(f"Companions extracted: {len(companions)}")
+    def process_warframes(self, force: bool = False, outputs: List[Dict[str, Any]] = None) -> None:
+        """Process every output in PROCESSED_OUTPUTS (or only outputs), skipping the ones that are up to date
+        
+        An output is rebuilt when one of its raw files changed, its rules changed,
+        it is missing, or force=True. Only the raw files of the outputs being
+        rebuilt are read. Which outputs were rebuilt and why ends up in
+        self.build_report, how long each stage took in self.report_file.
+        """
+        self.instrumentation = RunInstrumentation('process', self.trace_memory)
+        try:
+            with self.instrumentation:
+                self._process_outputs(force, outputs if outputs is not None else PROCESSED_OUTPUTS)
+        finally:
+            self.instrumentation.write_report(self.report_file)
+            if self.metrics_file:
+                self.instrumentation.write_prometheus(self.metrics_file)
+    
+    def _process_outputs(self, force: bool, outputs: List[Dict[str, Any]]) -> None:
+        run = self.instrumentation
+        start_time = time.perf_counter()
+        
+        # Work out what is stale before parsing anything
+        with run.stage('plan') as stage:
+            manifest = BuildManifest(os.path.join(self.processed_data_dir, BUILD_MANIFEST_FILE))
+            input_hashes = {}
+            plan = []
+            for output in outputs:
+                hashes = {}
+                for source in output_sources(output):
+                    filename = RAW_DATA_FILES[source]
+                    if filename not in input_hashes:
+                        input_hashes[filename] = manifest.hash_input(os.path.join(self.raw_data_dir, filename))
+                    hashes[filename] = input_hashes[filename]
+                rules = output_fingerprint(output, self.output_format)
+                reason = "forced" if force else manifest.stale_reason(output['file'], self.processed_path(output),
+                                                                       hashes, rules)
+                plan.append((output, hashes, rules, reason))
+            stage.add(items=len(plan))
+        
+        stale = [(output, hashes, rules, reason) for output, hashes, rules, reason in plan if reason]
+        self.build_report = {
+            'rebuilt': {output['file']: reason for output, _, _, reason in stale},
+            'skipped': [output['file'] for output, _, _, reason in plan if not reason],
+        }
         
-        sentinel_weapons = self.extract_sentinel_weapons() or []
-        print(f"Sentinel weapons extracted: {len(sentinel_weapons)}")
+        if self.verbosity >= NORMAL:
+            if force:
+                message = f"Rebuilding all {len(plan)} outputs (forced)"
+            elif stale:
+                reasons = ', '.join(f"{output['file']} ({reason})" for output, _, _, reason in stale)
+                message = f"Rebuilding {len(stale)} of {len(plan)} outputs: {reasons}"
+            else:
+                message = f"All {len(plan)} outputs up to date"
+            log_stage(logger, 'plan', message, rebuilt=self.build_report['rebuilt'],
+                      skipped=self.build_report['skipped'], forced=force)
+        
+        if not stale:
+            manifest.save()
+            if not os.path.exists(os.path.join(self.processed_data_dir, SEARCH_INDEX_FILE)):
+                self.build_search_index()
+            if self.columnar_format and not os.path.exists(self.columnar_path()):
+                self.export_columnar()
+            return
         
-        incarnon_weapons = self.extract_incarnon_weapons() or []
-        print(f"Incarnon weapons extracted: {len(incarnon_weapons)}")
+        # Load only the raw files the stale outputs read
+        needed_sources = []
+        for output, _, _, _ in stale:
+            needed_sources.extend(source for source in output_sources(output) if source not in needed_sources)
+        with run.stage('load') as stage:
+            self.load_raw_data(needed_sources)
+            for source in needed_sources:
+                path = os.path.join(self.raw_data_dir, RAW_DATA_FILES[source])
+                stage.add(items=len(self.raw_data[source]),
+                          bytes_read=os.path.getsize(path) if os.path.exists(path) else 0)
+        
+        # Explore what we have (debug runs only, these print a lot)
+        if self.verbosity >= DEBUG:
+            self.explore_warframes()
+            self.explore_primary_weapons()
+            self.explore_secondary_weapons()
+            self.explore_melee_weapons()
+            self.explore_archwings()
+            self.explore_arch_guns()
+            self.explore_arch_melees()
+            self.explore_companions()
+            self.explore_sentinel_weapons()
+            self.explore_incarnon_weapons()
+            self.explore_amps()
+            
+            # The extract_* methods print per-category listings of what they find
+            for output, _, _, _ in stale:
+                getattr(self, output['extract'])()
+        
+        # How many stale outputs still have to read each raw category
+        remaining = {}
+        for output, _, _, _ in stale:
+            for source in output_sources(output):
+                remaining[source] = remaining.get(source, 0) + 1
+        
+        # Stream each output through classify -> clean -> sink, recording what it was built from.
+        # The three steps run interleaved, so 'write' is timed once per output and covers all
+        # of them; only profile_stages times them item by item to give each its own share
+        with run.stage('build') as build_stats:
+            if self.profile_stages:
+                classify_stats = run.add_stage('classify')
+                clean_stats = run.add_stage('clean')
+            write_stats = run.add_stage('write')
+            
+            counts = {}
+            samples = []
+            for output, hashes, rules, _ in stale:
+                stages = [pipeline.clean(getattr(self, output['clean']))]
+                
+                output_file = self.processed_path(output)
+                with write_stats.measure():
+                    classified = self.stream_output(output)
+                    if self.profile_stages:
+                        classified = timed(classified, classify_stats)
+                    cleaned = pipeline.chain(classified, stages)
+                    if self.profile_stages:
+                        cleaned = timed(cleaned, clean_stats)
+                    # Only the first cleaned item is kept around, for the debug sample
+                    first, cleaned = pipeline.peek(cleaned)
+                    count = pipeline.sink(output_file, self.output_format)(cleaned)
+                write_stats.add(items=count, bytes_written=os.path.getsize(output_file))
+                
+                # Don't leave a copy in the other format behind for readers to pick up
+                for extension in JSON_FORMATS.values():
+                    other_file = os.path.join(self.processed_data_dir, output_name(output) + extension)
+                    if other_file != output_file and os.path.exists(other_file):
+                        os.remove(other_file)
+                
+                manifest.record_output(output['file'], hashes, rules, count)
+                counts[output_name(output)] = count
+                samples.append((output['label'], first))
+                
+                # Drop raw categories nothing else needs; they reload lazily if accessed again
+                for source in output_sources(output):
+                    remaining[source] -= 1
+                    if not remaining[source] and self.raw_data.is_loaded(source):
+                        del self.raw_data[source]
+                        self._classified.pop(source, None)
+                        self.path_index.remove_source(source)
+            
+            # Each stage's own share: write includes clean includes classify
+            if self.profile_stages:
+                write_stats.exclude(clean_stats)
+                clean_stats.exclude(classify_stats)
+            build_stats.add(items=write_stats.items, bytes_written=write_stats.bytes_written)
+        
+        manifest.save()
+        
+        if self.verbosity >= NORMAL:
+            elapsed = build_stats.wall_seconds
+            written = sum(counts.values())
+            log_stage(logger, 'write', f"Extracted, cleaned and saved {written} items to {len(samples)} files "
+                      f"in {self.processed_data_dir} in {elapsed:.3f}s",
+                      files=len(samples), items=written, counts=counts, format=self.output_format,
+                      seconds=round(elapsed, 4), total_seconds=round(time.perf_counter() - start_time, 4))
+        
+        # Only the rebuilt categories are read again for the index and the export
+        rebuilt = [output for output, _, _, _ in stale]
+        self.build_search_index(rebuilt)
+        if self.columnar_format:
+            self.export_columnar(rebuilt)
         
-        amps = self.extract_amps() or []
-        print(f"Amps extracted: {len(amps)}")
-
-        # Clean the data (with safety checks)
-        print("\n=== Cleaning Data ===")
-        cleaned_warframes = [self.clean_warframe_data(wf) for wf in warframes] if warframes else []
-        cleaned_necramechs = [self.clean_warframe_data(nm) for nm in necramechs] if necramechs else []
-        cleaned_primary_weapons = [self.clean_weapon_data(wp) for wp in primary_weapons] if primary_weapons else []
-        cleaned_secondary_weapons = [self.clean_weapon_data(wp) for wp in secondary_weapons] if secondary_weapons else []
-        cleaned_melee_weapons = [self.clean_weapon_data(wp) for wp in melee_weapons] if melee_weapons else []
-        cleaned_zaws = [self.clean_weapon_data(zw) for zw in zaws] if zaws else []
-        cleaned_kitguns = [self.clean_weapon_data(kg) for kg in kitguns] if kitguns else []
-        cleaned_archwings = [self.clean_warframe_data(aw) for aw in archwings] if archwings else []
-        cleaned_arch_guns = [self.clean_weapon_data(ag) for ag in arch_guns] if arch_guns else []
-        cleaned_arch_melees = [self.clean_weapon_data(am) for am in arch_melees] if arch_melees else []
-        cleaned_companions = [self.clean_warframe_data(c) for c in companions] if companions else []
-        cleaned_sentinel_weapons = [self.clean_weapon_data(sw) for sw in sentinel_weapons] if sentinel_weapons else []
-        cleaned_incarnon_weapons = [self.clean_weapon_data(inc) for inc in incarnon_weapons] if incarnon_weapons else []
-        cleaned_amps = [self.clean_weapon_data(amp) for amp in amps] if amps else []
-
-        # Save warframes to file
-        warframes_file = os.path.join(self.processed_data_dir, 'warframes.json')
-        with open(warframes_file, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_warframes, f, indent=2, ensure_ascii=False)
-        print(f"✓ Saved {len(cleaned_warframes)} warframes to warframes.json")
-        
-        # Save necramechs to file
-        necramechs_file = os.path.join(self.processed_data_dir, 'necramechs.json')
-        with open(necramechs_file, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_necramechs, f, indent=2, ensure_ascii=False)
-        print(f"✓ Saved {len(cleaned_necramechs)} necramechs to necramechs.json")
-        
-        # Save primary weapons to file
-        primary_file = os.path.join(self.processed_data_dir, 'primary_weapons.json')
-        with open(primary_file, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_primary_weapons, f, indent=2, ensure_ascii=False)
-        # Save secondary weapons to file
-        secondary_file = os.path.join(self.processed_data_dir, 'secondary_weapons.json')
-        with open(secondary_file, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_secondary_weapons, f, indent=2, ensure_ascii=False)
-        # Save melee weapons to file
-        melee_file = os.path.join(self.processed_data_dir, 'melee_weapons.json')
-        with open(melee_file, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_melee_weapons, f, indent=2, ensure_ascii=False)
-        # Save zaws to file
-        zaws_file = os.path.join(self.processed_data_dir, 'zaws.json')
-        with open(zaws_file, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_zaws, f, indent=2, ensure_ascii=False)
-        # Save kitguns to file
-        kitguns_file = os.path.join(self.processed_data_dir, 'kitguns.json')
-        with open(kitguns_file, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_kitguns, f, indent=2, ensure_ascii=False)
-        # Save archwings to file
-        archwings_file = os.path.join(self.processed_data_dir, 'archwings.json')
-        with open(archwings_file, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_archwings, f, indent=2, ensure_ascii=False)
-        # Save arch-guns to file
-        arch_guns_file = os.path.join(self.processed_data_dir, 'arch_guns.json')
-        with open(arch_guns_file, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_arch_guns, f, indent=2, ensure_ascii=False)
-        # Save arch-melees to file
-        arch_melees_file = os.path.join(self.processed_data_dir, 'arch_melees.json')
-        with open(arch_melees_file, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_arch_melees, f, indent=2, ensure_ascii=False)
-        # Save companions to file
-        companions_file = os.path.join(self.processed_data_dir, 'companions.json')
-        with open(companions_file, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_companions, f, indent=2, ensure_ascii=False)        
-        # Save sentinel weapons to file
-        sentinel_weapons_file = os.path.join(self.processed_data_dir, 'sentinel_weapons.json')
-        with open(sentinel_weapons_file, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_sentinel_weapons, f, indent=2, ensure_ascii=False)
-        # Save incarnon weapons to file
-        incarnon_file = os.path.join(self.processed_data_dir, 'incarnon_weapons.json')
-        with open(incarnon_file, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_incarnon_weapons, f, indent=2, ensure_ascii=False)
-        # Save amps to file
-        amps_file = os.path.join(self.processed_data_dir, 'amps.json')
-        with open(amps_file, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_amps, f, indent=2, ensure_ascii=False)
-        print(f"✓ Saved {len(cleaned_amps)} amps to amps.json")
-
         # Show samples
-        if cleaned_warframes:
-            print("\nSample warframe:")
-            sample = cleaned_warframes[0]
-            for key, value in sample.items():
-                print(f"  {key}: {value}")
-        
-        if cleaned_necramechs:
-            print("\nSample necramech:")
-            sample = cleaned_necramechs[0]
-            for key, value in sample.items():
-                print(f"  {key}: {value}")
-            print(f"  unique_name: {sample.get('unique_name', 'Unknown')}")
-        
-        if cleaned_primary_weapons:
-            print("\nSample primary weapon:")
-            sample = cleaned_primary_weapons[0]
-            for key, value in sample.items():
-                print(f"  {key}: {value}")
-        
-        if cleaned_secondary_weapons:
-            print("\nSample secondary weapon:")
-            sample = cleaned_secondary_weapons[0]
-            for key, value in sample.items():
-                print(f"  {key}: {value}")
-        
-        if cleaned_melee_weapons:
-            print("\nSample melee weapon:")
-            sample = cleaned_melee_weapons[0]
-            for key, value in sample.items():
-                print(f"  {key}: {value}")
-        
-        if cleaned_zaws:
-            print("\nSample zaw component:")
-            sample = cleaned_zaws[0]
-            for key, value in sample.items():
-                print(f"  {key}: {value}")
-        
-        if cleaned_kitguns:
-            print("\nSample kitgun component:")
-            sample = cleaned_kitguns[0]
-            for key, value in sample.items():
-                print(f"  {key}: {value}")
-        
-        if cleaned_archwings:
-            print("\nSample archwing:")
-            sample = cleaned_archwings[0]
-            for key, value in sample.items():
-                print(f"  {key}: {value}")
-        
-        if cleaned_arch_guns:
-            print("\nSample arch-gun:")
-            sample = cleaned_arch_guns[0]
-            for key, value in sample.items():
-                print(f"  {key}: {value}")
-                
-        if cleaned_arch_melees:
-            print("\nSample arch-melee:")
-            sample = cleaned_arch_melees[0]
-            for key, value in sample.items():
-                print(f"  {key}: {value}")
-        
-        if cleaned_companions:
-            print("\nSample companion:")
-            sample = cleaned_companions[0]
-            for key, value in sample.items():
-                print(f"  {key}: {value}")
-        
-        if cleaned_sentinel_weapons:
-            print("\nSample sentinel weapon:")
-            sample = cleaned_sentinel_weapons[0]
-            for key, value in sample.items():
-                print(f"  {key}: {value}")
+        if self.verbosity >= DEBUG:
+            for label, first in samples:
+                if first is not None:
+                    logger.debug(f"\nSample {label}:")
+                    for key, value in first.to_dict().items():
+                        logger.debug(f"  {key}: {value}")
 
-        if cleaned_incarnon_weapons:
-            print("\nSample incarnon weapon:")
-            sample = cleaned_incarnon_weapons[0]
-            for key, value in sample.items():
-                print(f"  {key}: {value}")
-                
-        if cleaned_amps:
-            print("\nSample amp:")
-            sample = cleaned_amps[0]
-            for key, value in sample.items():
-                print(f"  {key}: {value}")
+    def _processed_records(self, outputs: List[Dict[str, Any]] = None,
+                           stats: StageStats = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(output name, cleaned item) pairs of every processed output on disk (or only outputs)"""
+        for output in PROCESSED_OUTPUTS if outputs is None else outputs:
+            path = find_processed_file(self.processed_data_dir, output)
+            if path is not None:
+                if stats is not None:
+                    stats.add(bytes_read=os.path.getsize(path))
+                for item in read_json_stream(path):
+                    yield output_name(output), item
+    
+    @staticmethod
+    def _changed_only(outputs: Optional[List[Dict[str, Any]]]) -> Optional[List[str]]:
+        """Names of the outputs to read again, or None when that is all of them anyway"""
+        if outputs is None:
+            return None
+        names = [output_name(output) for output in outputs]
+        if all(output_name(output) in names for output in PROCESSED_OUTPUTS):
+            return None
+        return names
+    
+    def columnar_path(self) -> str:
+        return os.path.join(self.processed_data_dir, f"{COLUMNAR_FILE}.{self.columnar_format or resolve_format()}")
+    
+    def export_columnar(self, outputs: List[Dict[str, Any]] = None) -> str:
+        """Write every processed item to one columnar file with a category column
+        
+        With outputs, only those are read again; the rows of the other
+        categories are copied from the existing export, if it is readable.
+        """
+        path_base = os.path.join(self.processed_data_dir, COLUMNAR_FILE)
+        changed = self._changed_only(outputs)
+        with self.instrumentation.stage('export') as stage:
+            previous = None
+            if changed is not None and os.path.exists(self.columnar_path()):
+                try:
+                    previous = read_columnar(self.columnar_path())
+                except (OSError, ValueError, KeyError, ImportError) as e:
+                    logger.warning(f"Re-exporting every category, can't read {self.columnar_path()}: {e}")
+            
+            if previous is None:
+                path = write_columnar(path_base, self._processed_records(stats=stage), self.columnar_format or 'auto')
+            else:
+                # Categories keep the PROCESSED_OUTPUTS order a full export has
+                parts = []
+                for output in PROCESSED_OUTPUTS:
+                    name = output_name(output)
+                    if name in changed:
+                        parts.append(records_to_columns(self._processed_records([output], stage)))
+                    else:
+                        parts.append(select_rows(previous, previous['category'] == name))
+                path = write_columns(path_base, merge_columns(parts), self.columnar_format or 'auto')
+            stage.add(bytes_written=os.path.getsize(path))
+        
+        if self.verbosity >= NORMAL:
+            log_stage(logger, 'export', f"Exported the catalogue to {path} in {stage.wall_seconds:.3f}s",
+                      path=path, bytes=stage.bytes_written, seconds=round(stage.wall_seconds, 4))
+        return path
+    
+    def build_search_index(self, outputs: List[Dict[str, Any]] = None) -> SearchIndex:
+        """Index names and descriptions of every processed output into search_index.bin
+        
+        With outputs, only those are read and tokenized again; the other
+        categories come from the saved index, if it is readable.
+        """
+        path = os.path.join(self.processed_data_dir, SEARCH_INDEX_FILE)
+        changed = self._changed_only(outputs)
+        with self.instrumentation.stage('index') as stage:
+            kept = None
+            if changed is not None and os.path.exists(path):
+                try:
+                    kept = {}
+                    for document in SearchIndex.load(path).documents():
+                        kept.setdefault(document[0][2], []).append(document)
+                except (OSError, ValueError, KeyError, EOFError, TypeError) as e:
+                    logger.warning(f"Indexing every category again, can't read {path}: {e}")
+                    kept = None
+            
+            if kept is None:
+                index = SearchIndex.build(self._processed_records(stats=stage))
+            else:
+                def documents():
+                    # Categories keep the PROCESSED_OUTPUTS order a full build has
+                    for output in PROCESSED_OUTPUTS:
+                        name = output_name(output)
+                        if name in changed:
+                            for category, item in self._processed_records([output], stage):
+                                yield analyze(category, item)
+                        else:
+                            yield from kept.get(name, [])
+                index = SearchIndex.from_documents(documents())
+            index.save(path)
+            stage.add(items=len(index.docs), bytes_written=os.path.getsize(path))
+        
+        if self.verbosity >= NORMAL:
+            log_stage(logger, 'index', f"Indexed {len(index.docs)} items ({len(index.vocabulary)} tokens) "
+                      f"for search in {stage.wall_seconds:.3f}s",
+                      items=len(index.docs), tokens=len(index.vocabulary), seconds=round(stage.wall_seconds, 4))
+        return index
 
 def main():
     """Run the simple processor"""
+    configure_logging()
     processor = WarframeDataProcessor()
     processor.process_warframes()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,103 @@
+"""
+Path index over WFCD uniqueName values
+uniqueNames look like /Lotus/Weapons/SolarisUnited/Primary/Barrel/Item,
+so they form a tree. The index answers "everything under this path" and
+"everything inside a folder called X" without scanning whole raw lists.
+"""
+
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional
+
+class PathInfo(NamedTuple):
+    """Per-item facts derived from uniqueName, computed once at index time"""
+    folders: FrozenSet[str]
+    is_pvp: bool
+
+def split_path(unique_name: str) -> List[str]:
+    """Split a uniqueName into its non-empty path segments"""
+    return [segment for segment in unique_name.split('/') if segment]
+
+def path_info(unique_name: str) -> PathInfo:
+    """Folder segments (every segment but the item itself) and the PvP flag"""
+    return PathInfo(frozenset(split_path(unique_name)[:-1]), 'pvp' in unique_name.lower())
+
+class _SourceIndex:
+    """Trie and folder index for the items of one raw category"""
+
+    def __init__(self, items: List[Dict[str, Any]]):
+        # Every trie node keeps the items of its whole subtree, so a prefix
+        # lookup costs one walk down the path plus the size of the result
+        self.root = {'children': {}, 'items': []}
+        self.folders = {}
+        self.info = {}
+
+        for item in items:
+            unique_name = item.get('uniqueName') or ''
+            segments = split_path(unique_name)
+            info = path_info(unique_name)
+            self.info[id(item)] = info
+
+            node = self.root
+            node['items'].append(item)
+            for segment in segments:
+                node = node['children'].setdefault(segment, {'children': {}, 'items': []})
+                node['items'].append(item)
+
+            for folder in info.folders:
+                self.folders.setdefault(folder, []).append(item)
+
+    def under(self, segments: List[str]) -> List[Dict[str, Any]]:
+        node = self.root
+        for segment in segments:
+            node = node['children'].get(segment)
+            if node is None:
+                return []
+        return node['items']
+
+class PathIndex:
+    """Prefix trie and folder index over the uniqueNames of loaded raw categories"""
+
+    def __init__(self):
+        self._sources = {}
+
+    def add_source(self, source: str, items: List[Dict[str, Any]]) -> None:
+        """Index (or re-index) the items of one raw category"""
+        self._sources[source] = _SourceIndex(items)
+
+    def remove_source(self, source: str) -> None:
+        """Forget a raw category, e.g. once its items are no longer needed"""
+        self._sources.pop(source, None)
+
+    def has_source(self, source: str) -> bool:
+        return source in self._sources
+
+    def source_info(self, source: str) -> Dict[int, PathInfo]:
+        """PathInfo of every indexed item of a raw category, keyed by id(item)"""
+        return self._sources[source].info
+
+    def _selected(self, sources: Optional[Iterable[str]]) -> List[_SourceIndex]:
+        if sources is None:
+            return list(self._sources.values())
+        return [self._sources[source] for source in sources if source in self._sources]
+
+    def under(self, prefix: str, sources: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """All items whose uniqueName lies under a path prefix such as /Lotus/Powersuits/EntratiMech/"""
+        segments = split_path(prefix)
+        items = []
+        for index in self._selected(sources):
+            items.extend(index.under(segments))
+        return items
+
+    def with_folder(self, folder: str, sources: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """All items with a folder segment named exactly folder, e.g. 'Barrel'"""
+        items = []
+        for index in self._selected(sources):
+            items.extend(index.folders.get(folder, []))
+        return items
+
+    def item_info(self, item: Dict[str, Any]) -> PathInfo:
+        """Indexed PathInfo of an item, computed on the spot for unindexed items"""
+        for index in self._sources.values():
+            info = index.info.get(id(item))
+            if info is not None:
+                return info
+        return path_info(item.get('uniqueName') or '')
@@ -0,0 +1,58 @@
+"""
+Generator stages for the clean -> write end of the processing pipeline
+
+    count = sink(path)(chain(bucket_stream(processor.classify_source, 'zaws'), [clean(fn)]))
+
+Only the cleaned records and their serialized form are streamed one item
+at a time. The parsed raw categories stay in memory until every output
+reading them is written, and classify_source keeps a list of references
+per bucket for each raw category it has walked.
+"""
+
+import itertools
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping
+
+from api_client.classifier import CLASSIFICATION_RULES, bucket_sources
+from utils.helpers import write_json_stream
+
+Item = Dict[str, Any]
+Stage = Callable[[Iterable[Item]], Iterator[Item]]
+Sink = Callable[[Iterable[Item]], int]
+
+def clean(clean_item: Callable[[Item], Any]) -> Stage:
+    """Stage mapping every item through a clean function such as clean_weapon_data"""
+    def stage(items: Iterable[Item]) -> Iterator[Any]:
+        for item in items:
+            yield clean_item(item)
+
+    return stage
+
+def sink(path: str, fmt: str = 'json') -> Sink:
+    """Terminal stage streaming items to a processed file, returning the item count"""
+    return lambda items: write_json_stream(path, items, fmt)
+
+def chain(items: Iterable[Item], stages: Iterable[Stage]) -> Iterator[Item]:
+    """Apply stages in order, still lazily"""
+    for stage in stages:
+        items = stage(items)
+    return iter(items)
+
+def bucket_stream(classified: Callable[[str], Mapping[str, List[Item]]], bucket: str,
+                  rules: List[Dict[str, Any]] = CLASSIFICATION_RULES) -> Iterator[Item]:
+    """Items of a classification bucket, in the same order as get_bucket collects them
+
+    classified(category) returns the buckets of one raw category, e.g.
+    processor.classify_source, which walks each category once however many
+    buckets read from it. A category is only classified once the stream
+    reaches it.
+    """
+    for category in bucket_sources(bucket, rules):
+        yield from classified(category).get(bucket, [])
+
+def peek(items: Iterable[Item]):
+    """First item (or None) and an iterator that still yields every item"""
+    items = iter(items)
+    first = next(items, None)
+    if first is None:
+        return None, iter(())
+    return first, itertools.chain([first], items)
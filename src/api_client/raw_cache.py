@@ -0,0 +1,102 @@
+"""
+Serializers for the raw WFCD cache in data/raw
+Cache files keep their .json names in every format; readers tell the
+formats apart by their leading bytes, so any serializer can be read back
+without knowing which one wrote the file.
+"""
+
+import gzip
+import json
+import marshal
+import sys
+from typing import Any, Optional
+
+from utils.helpers import atomic_write
+
+GZIP_MAGIC = b'\x1f\x8b'
+MARSHAL_MAGIC = b'WFCDMRSH'
+
+# marshal data is only readable by the Python version that wrote it, so the
+# header records the marshal format and interpreter version after the magic
+MARSHAL_HEADER = MARSHAL_MAGIC + bytes([marshal.version, *sys.version_info[:2]])
+
+class UnreadableCacheError(ValueError):
+    """A cache file that can't be decoded, e.g. marshal data written by another Python version"""
+
+class JsonSerializer:
+    """Plain JSON; keeps the downloaded bytes untouched when they are available"""
+    
+    name = 'json'
+    
+    def dumps(self, data: Any, raw: Optional[bytes] = None) -> bytes:
+        if raw is not None:
+            return raw
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class GzipSerializer(JsonSerializer):
+    """Gzip-compressed JSON, smallest on disk"""
+    
+    name = 'gzip'
+    
+    def __init__(self, compresslevel: int = 6):
+        self.compresslevel = compresslevel
+    
+    def dumps(self, data: Any, raw: Optional[bytes] = None) -> bytes:
+        # mtime=0 keeps the output identical for identical input
+        return gzip.compress(super().dumps(data, raw), compresslevel=self.compresslevel, mtime=0)
+
+class MarshalSerializer:
+    """Python marshal format, fastest to load but only readable from Python"""
+    
+    name = 'marshal'
+    
+    def dumps(self, data: Any, raw: Optional[bytes] = None) -> bytes:
+        return MARSHAL_HEADER + marshal.dumps(data)
+
+SERIALIZERS = {
+    'json': JsonSerializer,
+    'gzip': GzipSerializer,
+    'marshal': MarshalSerializer,
+}
+
+def get_serializer(name: str):
+    """Return a serializer instance by name"""
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown cache format '{name}', expected one of: {', '.join(SERIALIZERS)}")
+    return SERIALIZERS[name]()
+
+def decode_cache_bytes(blob: bytes) -> Any:
+    """Decode cache file contents written by any of the serializers
+    
+    Raises UnreadableCacheError for anything that can't be decoded here,
+    including marshal data from another Python version; callers treat
+    that like a missing file.
+    """
+    if blob.startswith(MARSHAL_MAGIC):
+        if not blob.startswith(MARSHAL_HEADER):
+            raise UnreadableCacheError("marshal cache written by another Python version")
+        try:
+            return marshal.loads(blob[len(MARSHAL_HEADER):])
+        except (ValueError, EOFError, TypeError) as e:
+            raise UnreadableCacheError(f"corrupt marshal cache: {e}") from e
+    try:
+        if blob.startswith(GZIP_MAGIC):
+            blob = gzip.decompress(blob)
+        return json.loads(blob)
+    except (OSError, EOFError, ValueError) as e:
+        raise UnreadableCacheError(f"corrupt cache: {e}") from e
+
+def load_cache_file(path: str) -> Any:
+    """Load a raw cache file, whatever format it was written in"""
+    with open(path, 'rb') as f:
+        return decode_cache_bytes(f.read())
+
+def write_cache_file(path: str, data: Any, raw: Optional[bytes] = None, serializer=None) -> int:
+    """Write a document to the raw cache atomically, returning the bytes written"""
+    serializer = serializer or JsonSerializer()
+    blob = serializer.dumps(data, raw)
+    
+    with atomic_write(path, 'wb') as f:
+        f.write(blob)
+    
+    return len(blob)
@@ -3,23 +3,73 @@ WFCD API Client for fetching Warframe items data
 Uses the warframe-items JSON data from WFCD GitHub repository
 """
 
+import asyncio
+import aiohttp
 import requests
 import json
+import logging
 import os
-from typing import Dict, List, Optional
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
 import time
 
+from api_client.raw_cache import UnreadableCacheError, get_serializer, load_cache_file, write_cache_file
+from utils.helpers import DEBUG, NORMAL, atomic_write, configure_logging, log_stage
+from utils.instrumentation import RunInstrumentation, StageStats
+
+logger = logging.getLogger(__name__)
+
+FETCH_REPORT_FILE = 'fetch_report.json'
+FETCH_OUTCOMES = ['downloaded', 'not_modified', 'cached']
+
 class WFCDClient:
     """Client for fetching Warframe data from WFCD sources"""
     
-    def __init__(self, cache_dir: str = "data/raw"):
+    def __init__(self, cache_dir: str = "data/raw", max_concurrency: int = 6,
+                 max_retries: int = 3, retry_backoff: float = 0.5, cache_format: str = 'json',
+                 verbosity: int = NORMAL, report_file: str = None, metrics_file: str = None,
+                 trace_memory: bool = False):
         self.base_url = "https://raw.githubusercontent.com/WFCD/warframe-items/master/data/json"
         self.cache_dir = cache_dir
         self.session = requests.Session()
         
+        # QUIET runs emit nothing but errors, NORMAL one record per stage, DEBUG everything
+        self.verbosity = verbosity
+        
+        # How downloaded files are stored in the raw cache (json, gzip or marshal)
+        self.cache_serializer = get_serializer(cache_format)
+        
+        # Settings for the async fetch mode
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        
+        # Parsed documents keyed by filename, each stored with the cache
+        # file's (mtime, size) so a file is only parsed again after it changes
+        self._documents = {}
+        self.cache_stats = {'hits': 0, 'misses': 0}
+        
+        # Bytes downloaded, read from and written to the raw cache
+        self.io_stats = {'downloaded': 0, 'read': 0, 'written': 0}
+        
+        # Files of the last fetch that were downloaded, confirmed unchanged by
+        # the server (304), or taken from the cache without asking
+        self.fetch_stats = dict.fromkeys(FETCH_OUTCOMES, 0)
+        
+        # Per-stage timings of the last fetch_all_data run, written to report_file
+        # (and to metrics_file as Prometheus text, if given)
+        self.report_file = report_file or os.path.join(cache_dir, FETCH_REPORT_FILE)
+        self.metrics_file = metrics_file
+        self.trace_memory = trace_memory
+        self.instrumentation = RunInstrumentation('fetch', trace_memory)
+        
         # Ensure cache directory exists
         os.makedirs(cache_dir, exist_ok=True)
         
+        # Sidecar manifest with the ETag/Last-Modified of every cached file
+        self.manifest_file = os.path.join(cache_dir, 'cache_manifest.json')
+        self.manifest = self._load_manifest()
+        
         # Map of item types to their corresponding JSON files
         self.endpoints = {
             'primary': 'Primary.json',
@@ -42,39 +92,268 @@ class WFCDClient:
             'sentinelweapons': 'SentinelWeapons.json',  # Sentinel weapons
         }
     
-    def fetch_json(self, filename: str, force_refresh: bool = False) -> Optional[Dict]:
-        """Fetch JSON data from WFCD repository"""
+    def fetch_json(self, filename: str, force_refresh: bool = False,
+                   revalidate: bool = False) -> Optional[Dict]:
+        """Fetch JSON data from WFCD repository
+        
+        With revalidate=True a cached file is checked against the server with a
+        conditional GET; on 304 Not Modified the cached copy is used as-is.
+        """
         cache_file = os.path.join(self.cache_dir, filename)
         
         # Use cached version if exists and not forcing refresh
-        if os.path.exists(cache_file) and not force_refresh:
-            print(f"Loading cached {filename}")
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        if os.path.exists(cache_file) and not force_refresh and not revalidate:
+            data = self._load_cached(filename)
+            if data is not None:
+                self.fetch_stats['cached'] += 1
+                return data
         
         # Fetch from remote
         url = f"{self.base_url}/{filename}"
-        print(f"Fetching {filename} from {url}")
+        headers = {} if force_refresh else self._conditional_headers(filename)
+        self._debug(f"{'Revalidating' if headers else 'Fetching'} {filename} from {url}")
         
         try:
-            response = self.session.get(url, timeout=30)
+            response = self.session.get(url, headers=headers, timeout=30)
+            
+            if response.status_code == 304:
+                data = self._load_cached(filename)
+                if data is None:
+                    # The cached copy can't be read here, download it again
+                    return self.fetch_json(filename, force_refresh=True)
+                self._debug(f"✓ {filename} not modified")
+                self.fetch_stats['not_modified'] += 1
+                return data
+            
             response.raise_for_status()
+            self.io_stats['downloaded'] += len(response.content)
+            self.fetch_stats['downloaded'] += 1
             
             data = response.json()
             
             # Cache the data
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            self._write_cache(filename, data, response.content)
+            self._record_validators(filename, response.headers)
+            self._remember_document(filename, data, response.headers.get('ETag'))
             
-            print(f"✓ Successfully fetched and cached {filename}")
+            self._debug(f"✓ Successfully fetched and cached {filename}")
             return data
             
         except requests.RequestException as e:
-            print(f"✗ Error fetching {filename}: {e}")
+            logger.error(f"✗ Error fetching {filename}: {e}")
             return None
         except json.JSONDecodeError as e:
-            print(f"✗ Error parsing JSON for {filename}: {e}")
+            logger.error(f"✗ Error parsing JSON for {filename}: {e}")
+            return None
+    
+    def _debug(self, message: str) -> None:
+        """Emit a debug line, only when running at DEBUG verbosity"""
+        if self.verbosity >= DEBUG:
+            logger.debug(message)
+    
+    def _load_cached(self, filename: str) -> Any:
+        """Load a document from the raw cache, reusing the parsed copy if unchanged
+        
+        Returns None if the cache file can't be read, e.g. marshal data written
+        by another Python version, so the caller downloads it again.
+        """
+        data = self._get_document(filename)
+        if data is not None:
+            return data
+        
+        self._debug(f"Loading cached {filename}")
+        cache_file = os.path.join(self.cache_dir, filename)
+        try:
+            data = load_cache_file(cache_file)
+        except UnreadableCacheError as e:
+            return self._cache_miss(filename, e)
+        self.io_stats['read'] += os.path.getsize(cache_file)
+        self._remember_document(filename, data)
+        return data
+    
+    async def _load_cached_async(self, filename: str) -> Any:
+        """_load_cached for the async fetch: the cache file is read and parsed in a worker thread"""
+        data = self._get_document(filename)
+        if data is not None:
+            return data
+        
+        self._debug(f"Loading cached {filename}")
+        cache_file = os.path.join(self.cache_dir, filename)
+        try:
+            data = await asyncio.to_thread(load_cache_file, cache_file)
+        except UnreadableCacheError as e:
+            return self._cache_miss(filename, e)
+        self.io_stats['read'] += os.path.getsize(cache_file)
+        self._remember_document(filename, data)
+        return data
+    
+    def _cache_miss(self, filename: str, error: Exception) -> None:
+        """Forget an unreadable cache file's validators, so it is downloaded unconditionally"""
+        if self.verbosity >= NORMAL:
+            logger.warning(f"✗ Ignoring unreadable cached {filename} ({error})")
+        self.manifest.pop(filename, None)
+        self._documents.pop(filename, None)
+        return None
+    
+    def _load_manifest(self) -> Dict[str, Dict[str, str]]:
+        """Load the ETag/Last-Modified sidecar manifest of the raw cache"""
+        if not os.path.exists(self.manifest_file):
+            return {}
+        
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            if self.verbosity >= NORMAL:
+                logger.warning(f"✗ Ignoring unreadable cache manifest: {e}")
+            return {}
+    
+    def _conditional_headers(self, filename: str) -> Dict[str, str]:
+        """Build If-None-Match/If-Modified-Since headers for a cached file"""
+        entry = self.manifest.get(filename)
+        if not entry or not os.path.exists(os.path.join(self.cache_dir, filename)):
+            return {}
+        
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def _record_validators(self, filename: str, response_headers) -> None:
+        """Store a response's ETag/Last-Modified in the manifest and save it"""
+        self.manifest[filename] = {
+            'etag': response_headers.get('ETag'),
+            'last_modified': response_headers.get('Last-Modified'),
+            'fetched_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        }
+        
+        # Write through a temp file so an interrupted run can't corrupt it
+        with atomic_write(self.manifest_file) as f:
+            json.dump(self.manifest, f, indent=2)
+    
+    def _write_cache(self, filename: str, data: Any, raw: Optional[bytes] = None) -> None:
+        """Write a downloaded document to the raw cache in the configured format"""
+        cache_file = os.path.join(self.cache_dir, filename)
+        self.io_stats['written'] += write_cache_file(cache_file, data, raw, self.cache_serializer)
+    
+    def _file_validator(self, filename: str) -> Optional[tuple]:
+        """Return (mtime, size) of a cache file, or None if it doesn't exist"""
+        try:
+            stat = os.stat(os.path.join(self.cache_dir, filename))
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _get_document(self, filename: str) -> Optional[Any]:
+        """Return a parsed document if its cache file hasn't changed since parsing"""
+        entry = self._documents.get(filename)
+        if entry is None or entry['validator'] != self._file_validator(filename):
             return None
+        
+        self.cache_stats['hits'] += 1
+        return entry['data']
+    
+    def _remember_document(self, filename: str, data: Any, etag: Optional[str] = None) -> None:
+        """Store a freshly loaded document; every load counts as a cache miss"""
+        self.cache_stats['misses'] += 1
+        self._documents[filename] = {
+            'validator': self._file_validator(filename),
+            'etag': etag,
+            'data': data,
+        }
+    
+    def clear_document_cache(self) -> None:
+        """Drop all parsed documents and reset the hit/miss counters"""
+        self._documents = {}
+        self.cache_stats = {'hits': 0, 'misses': 0}
+    
+    async def _fetch_json_async(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                filename: str, force_refresh: bool = False,
+                                revalidate: bool = False) -> Optional[Any]:
+        """Fetch one JSON file with retry/backoff, limited by the shared semaphore"""
+        cache_file = os.path.join(self.cache_dir, filename)
+        
+        # Use cached version if exists and not forcing refresh
+        if os.path.exists(cache_file) and not force_refresh and not revalidate:
+            data = await self._load_cached_async(filename)
+            if data is not None:
+                self.fetch_stats['cached'] += 1
+                return data
+        
+        url = f"{self.base_url}/{filename}"
+        headers = {} if force_refresh else self._conditional_headers(filename)
+        
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with semaphore:
+                    self._debug(f"{'Revalidating' if headers else 'Fetching'} {filename} from {url}")
+                    async with session.get(url, headers=headers) as response:
+                        not_modified = response.status == 304
+                        if not not_modified:
+                            response.raise_for_status()
+                            body = await response.read()
+                            response_headers = response.headers
+                
+                # The cached copy is parsed after the response and the semaphore
+                # are released, so other downloads go on meanwhile
+                if not_modified:
+                    data = await self._load_cached_async(filename)
+                    if data is None:
+                        # The cached copy can't be read here, download it again
+                        return await self._fetch_json_async(session, semaphore, filename, force_refresh=True)
+                    self._debug(f"✓ {filename} not modified")
+                    self.fetch_stats['not_modified'] += 1
+                    return data
+                
+                self.io_stats['downloaded'] += len(body)
+                self.fetch_stats['downloaded'] += 1
+                
+                data = json.loads(body)
+                self._write_cache(filename, data, body)
+                self._record_validators(filename, response_headers)
+                self._remember_document(filename, data, response_headers.get('ETag'))
+                
+                self._debug(f"✓ Successfully fetched and cached {filename}")
+                return data
+                
+            except aiohttp.ClientResponseError as e:
+                # Only rate limiting and server errors can go away on their own;
+                # a 404 or 403 will answer the same however often it is asked
+                if (e.status != 429 and e.status < 500) or attempt == self.max_retries:
+                    logger.error(f"✗ Error fetching {filename}: {e}")
+                    return None
+                await self._backoff(filename, attempt, e)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    logger.error(f"✗ Error fetching {filename}: {e}")
+                    return None
+                await self._backoff(filename, attempt, e)
+            except json.JSONDecodeError as e:
+                logger.error(f"✗ Error parsing JSON for {filename}: {e}")
+                return None
+    
+    async def _backoff(self, filename: str, attempt: int, error: Exception) -> None:
+        """Exponential backoff before the next attempt"""
+        delay = self.retry_backoff * (2 ** attempt)
+        if self.verbosity >= NORMAL:
+            logger.warning(f"  Retrying {filename} in {delay:.1f}s ({error})")
+        await asyncio.sleep(delay)
+    
+    async def fetch_files_async(self, filenames: List[str], force_refresh: bool = False,
+                                revalidate: bool = False) -> Dict[str, Any]:
+        """Fetch several JSON files concurrently, at most max_concurrency at a time"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=30)
+        
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            results = await asyncio.gather(*[
+                self._fetch_json_async(session, semaphore, filename, force_refresh, revalidate)
+                for filename in filenames
+            ])
+        
+        return {filename: data for filename, data in zip(filenames, results) if data is not None}
     
     def fetch_primary_weapons(self) -> List[Dict]:
         """Fetch all primary weapons including kitguns and amps"""
@@ -95,7 +374,7 @@ class WFCDClient:
             else:
                 primaries.append(item)
         
-        print(f"✓ Found {len(primaries)} primary weapons, {len(kitguns)} kitguns, {len(amps)} amps")
+        self._debug(f"✓ Found {len(primaries)} primary weapons, {len(kitguns)} kitguns, {len(amps)} amps")
         return {
             'primary': primaries,
             'kitguns': kitguns, 
@@ -108,7 +387,7 @@ class WFCDClient:
         if not data:
             return []
         
-        print(f"✓ Found {len(data)} secondary weapons")
+        self._debug(f"✓ Found {len(data)} secondary weapons")
         return data
     
     def fetch_melee_weapons(self) -> List[Dict]:
@@ -127,7 +406,7 @@ class WFCDClient:
             else:
                 melee.append(item)
         
-        print(f"✓ Found {len(melee)} melee weapons, {len(zaws)} zaws")
+        self._debug(f"✓ Found {len(melee)} melee weapons, {len(zaws)} zaws")
         return {
             'melee': melee,
             'zaws': zaws
@@ -149,7 +428,7 @@ class WFCDClient:
             else:
                 warframes.append(item)
         
-        print(f"✓ Found {len(warframes)} warframes, {len(voidrigs)} necramechs")
+        self._debug(f"✓ Found {len(warframes)} warframes, {len(voidrigs)} necramechs")
         return {
             'warframes': warframes,
             'voidrigs': voidrigs
@@ -160,7 +439,7 @@ class WFCDClient:
         pets_data = self.fetch_json('Pets.json') or []
         sentinels_data = self.fetch_json('Sentinels.json') or []
         
-        print(f"✓ Found {len(pets_data)} pets, {len(sentinels_data)} sentinels")
+        self._debug(f"✓ Found {len(pets_data)} pets, {len(sentinels_data)} sentinels")
         return {
             'pets': pets_data,
             'sentinels': sentinels_data
@@ -172,7 +451,7 @@ class WFCDClient:
         archguns = self.fetch_json('Arch-Gun.json') or []
         archmelees = self.fetch_json('Arch-Melee.json') or []
         
-        print(f"✓ Found {len(archwings)} archwings, {len(archguns)} arch-guns, {len(archmelees)} arch-melees")
+        self._debug(f"✓ Found {len(archwings)} archwings, {len(archguns)} arch-guns, {len(archmelees)} arch-melees")
         return {
             'archwings': archwings,
             'archguns': archguns,
@@ -185,7 +464,7 @@ class WFCDClient:
         if not data:
             return []
         
-        print(f"✓ Found {len(data)} mods")
+        self._debug(f"✓ Found {len(data)} mods")
         return data
     
     def fetch_misc_items(self) -> Dict[str, List[Dict]]:
@@ -213,7 +492,7 @@ class WFCDClient:
             else:
                 other_misc.append(item)
         
-        print(f"✓ Found {len(robotics)} robotics, {len(vehicles)} vehicles, {len(other_gear)} other gear, {len(other_misc)} other misc")
+        self._debug(f"✓ Found {len(robotics)} robotics, {len(vehicles)} vehicles, {len(other_gear)} other gear, {len(other_misc)} other misc")
         return {
             'robotics': robotics,
             'vehicles': vehicles,
@@ -234,7 +513,7 @@ class WFCDClient:
                 if 'incarnon' in name_lower or 'incarnon' in description:
                     incarnons.append(item)
         
-        print(f"✓ Found {len(incarnons)} incarnon weapons")
+        self._debug(f"✓ Found {len(incarnons)} incarnon weapons")
         return incarnons
     
     def fetch_sentinel_weapons(self) -> List[Dict]:
@@ -243,14 +522,109 @@ class WFCDClient:
         if not data:
             return []
         
-        print(f"✓ Found {len(data)} sentinel weapons")
+        self._debug(f"✓ Found {len(data)} sentinel weapons")
         return data
     
-    def fetch_all_data(self, force_refresh: bool = False) -> Dict[str, any]:
-        """Fetch all Warframe data"""
-        print("=== Starting WFCD Data Fetch ===")
-        start_time = time.time()
+    def fetch_all_data(self, force_refresh: bool = False, use_async: bool = False,
+                       revalidate: bool = False) -> Dict[str, any]:
+        """Fetch all Warframe data
+        
+        With use_async=True every distinct file in self.endpoints is downloaded
+        concurrently first, then split into categories as usual.
+        With revalidate=True cached files are refreshed with conditional GETs.
+        """
+        self.cache_stats = {'hits': 0, 'misses': 0}
+        with self._instrumented_run() as run:
+            all_data = self._fetch_all(run, force_refresh, use_async, revalidate)
+        
+        if self.verbosity >= NORMAL:
+            elapsed_time = self.instrumentation.elapsed()['wall_seconds']
+            counts = {category: len(items) for category, items in all_data.items() if isinstance(items, list)}
+            log_stage(logger, 'fetch', f"Fetched {sum(counts.values())} items in {len(counts)} categories "
+                      f"in {elapsed_time:.2f}s (document cache: {self.cache_stats['hits']} hits, "
+                      f"{self.cache_stats['misses']} misses)",
+                      seconds=round(elapsed_time, 4), counts=counts, cache=dict(self.cache_stats))
         
+        return all_data
+    
+    def fetch_files(self, filenames: List[str], force_refresh: bool = False, use_async: bool = False,
+                    revalidate: bool = False) -> Dict[str, Any]:
+        """Fetch only some raw files, e.g. the ones a few processed categories are built from
+        
+        Cached files are used as-is unless force_refresh or revalidate is set;
+        missing ones are downloaded. Returns the parsed documents by filename;
+        self.fetch_stats tells how many were downloaded, not modified or cached.
+        """
+        self.cache_stats = {'hits': 0, 'misses': 0}
+        downloaded_before = self.io_stats['downloaded']
+        with self._instrumented_run() as run:
+            documents = self._download(run, filenames, force_refresh, use_async, revalidate)
+        
+        if self.verbosity >= NORMAL:
+            stage = run.get('download')
+            downloaded = self.io_stats['downloaded'] - downloaded_before
+            stats = self.fetch_stats
+            log_stage(logger, 'fetch', f"Fetched {len(documents)} of {len(filenames)} files in "
+                      f"{stage.wall_seconds:.2f}s: {stats['downloaded']} downloaded ({downloaded} bytes), "
+                      f"{stats['not_modified']} not modified, {stats['cached']} from cache",
+                      files=sorted(documents), missing=sorted(set(filenames) - set(documents)),
+                      outcomes=dict(stats), bytes_downloaded=downloaded, seconds=round(stage.wall_seconds, 4))
+        return documents
+    
+    @contextmanager
+    def _instrumented_run(self) -> Iterator[RunInstrumentation]:
+        """A fresh instrumented run whose report is written even if the fetch fails"""
+        self.fetch_stats = dict.fromkeys(FETCH_OUTCOMES, 0)
+        self.instrumentation = RunInstrumentation('fetch', self.trace_memory)
+        try:
+            with self.instrumentation as run:
+                yield run
+        finally:
+            self.instrumentation.write_report(self.report_file)
+            if self.metrics_file:
+                self.instrumentation.write_prometheus(self.metrics_file)
+    
+    def _download(self, run: RunInstrumentation, filenames: List[str], force_refresh: bool,
+                  use_async: bool, revalidate: bool) -> Dict[str, Any]:
+        with run.stage('download') as stage, self._count_io(stage):
+            if use_async:
+                documents = asyncio.run(self.fetch_files_async(filenames, force_refresh, revalidate))
+            else:
+                documents = {}
+                for filename in filenames:
+                    data = self.fetch_json(filename, force_refresh=force_refresh, revalidate=revalidate)
+                    if data is not None:
+                        documents[filename] = data
+            stage.add(items=len(documents))
+        return documents
+    
+    def _fetch_all(self, run: RunInstrumentation, force_refresh: bool, use_async: bool,
+                   revalidate: bool) -> Dict[str, Any]:
+        # Refresh every distinct file up front; this leaves each document in the
+        # document cache, so the splitters below only read parsed data
+        filenames = sorted(set(self.endpoints.values()))
+        if use_async or force_refresh or revalidate:
+            self._download(run, filenames, force_refresh, use_async, revalidate)
+        
+        # Cached files not refreshed above are parsed here (and missing ones downloaded)
+        with run.stage('split') as stage, self._count_io(stage):
+            all_data = self._split_categories()
+            stage.add(items=sum(len(items) for items in all_data.values() if isinstance(items, list)))
+        return all_data
+    
+    @contextmanager
+    def _count_io(self, stage: StageStats) -> Iterator[None]:
+        """Add the bytes a block downloaded or read from the cache, and wrote to it, to a stage"""
+        before = dict(self.io_stats)
+        try:
+            yield
+        finally:
+            stage.add(bytes_read=self.io_stats['downloaded'] - before['downloaded']
+                      + self.io_stats['read'] - before['read'],
+                      bytes_written=self.io_stats['written'] - before['written'])
+    
+    def _split_categories(self) -> Dict[str, Any]:
+        """Run every category splitter and merge the results"""
         all_data = {}
         
         # Fetch all categories
@@ -280,21 +654,11 @@ class WFCDClient:
         
         all_data['incarnons'] = self.fetch_incarnon_weapons()
         
-        elapsed_time = time.time() - start_time
-        print(f"\n=== Data Fetch Complete in {elapsed_time:.2f}s ===")
-        
-        # Print summary
-        total_items = sum(len(items) if isinstance(items, list) else 0 for items in all_data.values())
-        print(f"Total items fetched: {total_items}")
-        
-        for category, items in all_data.items():
-            if isinstance(items, list):
-                print(f"  {category}: {len(items)} items")
-        
         return all_data
 
 def main():
     """Test the WFCD client"""
+    configure_logging()
     client = WFCDClient()
     
     # Fetch all data
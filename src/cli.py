@@ -0,0 +1,234 @@
+"""
+Command line interface for the Warframe progress tracker
+
+    python wftracker.py fetch --categories companions
+    python wftracker.py process --categories companions,zaws
+    python wftracker.py load-db --categories companions
+    python wftracker.py refresh --categories companions
+    python wftracker.py serve --port 5000
+
+--categories takes processed category names (see `wftracker.py categories`).
+Each command works out which raw files and outputs those categories need
+and touches nothing else: refreshing companions checks Pets.json and
+Sentinels.json against the server (conditional GETs, so unchanged files
+aren't downloaded again), rebuilds companions.json if they changed, and
+reloads only that category into the database. Without --categories every
+category is used; --use-cache skips the server check.
+"""
+
+import argparse
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+from api_client.data_processor import (PROCESSED_OUTPUTS, RAW_DATA_FILES, WarframeDataProcessor, output_name,
+                                       output_sources, required_raw_files, select_outputs)
+from utils.helpers import DEBUG, JSON_FORMATS, NORMAL, QUIET, configure_logging
+from utils.profiling import DEFAULT_SAMPLE_INTERVAL, PROFILE_MODES, profile_call
+
+def parse_categories(values: Optional[List[str]]) -> Optional[List[str]]:
+    """Flatten repeated and comma-separated --categories values; None means all"""
+    categories = []
+    for value in values or []:
+        categories.extend(name.strip() for name in value.split(',') if name.strip())
+    return categories or None
+
+def _verbosity(args: argparse.Namespace) -> int:
+    return QUIET if args.quiet else DEBUG if args.verbose else NORMAL
+
+def _metrics_path(path: Optional[str], run: str) -> Optional[str]:
+    # refresh writes one metrics file per run: wf.prom -> wf-fetch.prom, wf-process.prom
+    if not path:
+        return None
+    stem, extension = os.path.splitext(path)
+    return f"{stem}-{run}{extension}"
+
+def fetch(args: argparse.Namespace, outputs: List[Dict[str, Any]], metrics_file: str = None) -> bool:
+    """Download the raw files of outputs; False if any of them couldn't be fetched"""
+    from api_client.wfcd_client import WFCDClient
+
+    filenames = required_raw_files(outputs)
+    client = WFCDClient(cache_dir=args.raw_dir, verbosity=_verbosity(args), metrics_file=metrics_file,
+                        trace_memory=args.trace_memory)
+    if args.base_url:
+        client.base_url = args.base_url
+    documents = client.fetch_files(filenames, force_refresh=args.redownload, use_async=args.use_async,
+                                   revalidate=not args.use_cache)
+
+    missing = [filename for filename in filenames if filename not in documents]
+    if missing:
+        print(f"✗ Couldn't fetch {', '.join(missing)}", file=sys.stderr)
+    return not missing
+
+def process(args: argparse.Namespace, outputs: List[Dict[str, Any]],
+            metrics_file: str = None) -> Optional[WarframeDataProcessor]:
+    """Rebuild the stale outputs among outputs; None if their raw files are missing"""
+    missing = [filename for filename in required_raw_files(outputs)
+               if not os.path.exists(os.path.join(args.raw_dir, filename))]
+    if missing:
+        print(f"✗ Missing raw data files in {args.raw_dir}: {', '.join(missing)}", file=sys.stderr)
+        print("Run the fetch command for these categories first.", file=sys.stderr)
+        return None
+
+    processor = WarframeDataProcessor(args.raw_dir, args.processed_dir, verbosity=_verbosity(args),
+                                      output_format=args.format, columnar_format=args.columnar,
+                                      discard_raw_nested=args.discard_raw_nested, metrics_file=metrics_file,
+                                      trace_memory=args.trace_memory,
+                                      profile_stages=bool(getattr(args, 'profile', None)))
+    if getattr(args, 'profile', None):
+        _, summary = profile_call(processor.process_warframes, force=args.force, outputs=outputs,
+                                  mode=args.profile, out=args.profile_out, top=args.profile_top,
+                                  interval=args.profile_interval)
+        print(f"\nProfile ({args.profile}):")
+        print(summary)
+    else:
+        processor.process_warframes(force=args.force, outputs=outputs)
+    return processor
+
+def load_db(args: argparse.Namespace, outputs: List[Dict[str, Any]]) -> Dict[str, int]:
+    from database.models import TrackerDatabase
+
+    with TrackerDatabase(args.db, verbosity=_verbosity(args)) as db:
+        return db.load_processed(args.processed_dir, outputs)
+
+def cmd_categories(args: argparse.Namespace) -> int:
+    for output in PROCESSED_OUTPUTS:
+        files = ', '.join(RAW_DATA_FILES[source] for source in output_sources(output))
+        print(f"{output_name(output):18} {files}")
+    return 0
+
+def cmd_fetch(args: argparse.Namespace) -> int:
+    return 0 if fetch(args, select_outputs(args.categories), args.metrics_file) else 1
+
+def cmd_process(args: argparse.Namespace) -> int:
+    processor = process(args, select_outputs(args.categories), args.metrics_file)
+    if processor is None:
+        return 1
+    if _verbosity(args) >= NORMAL:
+        rebuilt = processor.build_report['rebuilt']
+        print(f"✓ {len(rebuilt)} rebuilt, {len(processor.build_report['skipped'])} up to date "
+              f"in {args.processed_dir}")
+    return 0
+
+def cmd_load_db(args: argparse.Namespace) -> int:
+    load_db(args, select_outputs(args.categories))
+    return 0
+
+def cmd_refresh(args: argparse.Namespace) -> int:
+    """fetch, process and load-db for the chosen categories, each step doing only what changed"""
+    outputs = select_outputs(args.categories)
+    if not args.offline and not fetch(args, outputs, _metrics_path(args.metrics_file, 'fetch')):
+        return 1
+
+    processor = process(args, outputs, _metrics_path(args.metrics_file, 'process'))
+    if processor is None:
+        return 1
+
+    # Reload only the categories that were rebuilt, plus any the database doesn't have yet
+    from database.models import TrackerDatabase
+    with TrackerDatabase(args.db, verbosity=QUIET) as db:
+        loaded = {category['name'] for category in db.categories()}
+    to_load = [output for output in outputs
+               if output['file'] in processor.build_report['rebuilt'] or output_name(output) not in loaded]
+    if to_load:
+        load_db(args, to_load)
+    elif _verbosity(args) >= NORMAL:
+        print(f"✓ {args.db} already up to date")
+    return 0
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    from tracker.app import create_app
+
+    create_app(args.processed_dir, args.db).run(host=args.host, port=args.port, debug=args.debug)
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-v', '--verbose', action='store_true', help="show explore passes and per-item debug output")
+    common.add_argument('-q', '--quiet', action='store_true', help="no output unless something fails")
+    common.add_argument('--log-json', action='store_true', help="emit log records as JSON lines")
+    common.add_argument('--raw-dir', default='data/raw', help="raw WFCD files (default data/raw)")
+    common.add_argument('--processed-dir', default='data/processed',
+                        help="processed outputs (default data/processed)")
+    common.add_argument('--db', default='data/tracker.db', help="tracker database (default data/tracker.db)")
+
+    selection = argparse.ArgumentParser(add_help=False)
+    selection.add_argument('-c', '--categories', action='append', metavar='NAMES',
+                           help="comma-separated categories to work on, e.g. companions,zaws (default all)")
+
+    instrumented = argparse.ArgumentParser(add_help=False)
+    instrumented.add_argument('--metrics-file', help="also write per-stage metrics as a Prometheus text file")
+    instrumented.add_argument('--trace-memory', action='store_true',
+                              help="record each stage's peak tracemalloc memory in the run report (slower)")
+
+    fetching = argparse.ArgumentParser(add_help=False)
+    fetching.add_argument('--redownload', action='store_true', help="download files even if they are cached")
+    fetching.add_argument('--use-cache', action='store_true',
+                          help="use cached files as they are instead of checking them against the server")
+    fetching.add_argument('--async', dest='use_async', action='store_true', help="download files concurrently")
+    fetching.add_argument('--base-url', help="fetch from a mirror of the WFCD data instead")
+
+    processing = argparse.ArgumentParser(add_help=False)
+    processing.add_argument('--force', action='store_true', help="rebuild the outputs even if they are up to date")
+    processing.add_argument('--format', choices=list(JSON_FORMATS), default='json',
+                            help="write processed outputs as compact JSON arrays or JSON Lines")
+    processing.add_argument('--columnar', choices=['auto', 'parquet', 'npz'],
+                            help="also export the catalogue as Parquet (needs pyarrow) or NumPy .npz")
+    processing.add_argument('--discard-raw-nested', action='store_true',
+                            help="drop nested raw fields (drop tables, components) right after loading to save memory")
+
+    profiling = argparse.ArgumentParser(add_help=False)
+    profiling.add_argument('--profile', nargs='?', const='cprofile', choices=PROFILE_MODES,
+                           help="profile the run with cProfile (default) or the low-overhead sampling profiler; "
+                           "the run report then also times classify and clean item by item")
+    profiling.add_argument('--profile-out',
+                           help="where to write the profile (default data/profile.pstats or data/profile.folded)")
+    profiling.add_argument('--profile-top', type=int, default=25, help="hot functions shown in the profile summary")
+    profiling.add_argument('--profile-interval', type=float, default=DEFAULT_SAMPLE_INTERVAL,
+                           help="seconds between samples in sampling mode")
+
+    parser = argparse.ArgumentParser(prog='wftracker', description="Warframe progress tracker")
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND', required=True)
+
+    command = commands.add_parser('categories', parents=[common], help="list categories and their raw files")
+    command.set_defaults(handler=cmd_categories)
+
+    command = commands.add_parser('fetch', parents=[common, selection, fetching, instrumented],
+                                  help="download the raw WFCD files the categories need")
+    command.set_defaults(handler=cmd_fetch)
+
+    command = commands.add_parser('process', parents=[common, selection, processing, instrumented, profiling],
+                                  help="rebuild the categories' processed outputs that are out of date")
+    command.set_defaults(handler=cmd_process)
+
+    command = commands.add_parser('load-db', parents=[common, selection],
+                                  help="load the categories' processed outputs into the database")
+    command.set_defaults(handler=cmd_load_db)
+
+    command = commands.add_parser('refresh', parents=[common, selection, fetching, processing, instrumented],
+                                  help="fetch, process and load-db, skipping whatever is already up to date")
+    command.add_argument('--offline', action='store_true', help="don't fetch, use the raw files on disk")
+    command.set_defaults(handler=cmd_refresh)
+
+    command = commands.add_parser('serve', parents=[common], help="serve the tracker app")
+    command.add_argument('--host', default='127.0.0.1')
+    command.add_argument('--port', type=int, default=5000)
+    command.add_argument('--debug', action='store_true', help="run Flask in debug mode")
+    command.set_defaults(handler=cmd_serve)
+    return parser
+
+def main(argv: List[str] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if hasattr(args, 'categories'):
+        args.categories = parse_categories(args.categories)
+        try:
+            select_outputs(args.categories)
+        except ValueError as e:
+            parser.error(str(e))
+
+    configure_logging(_verbosity(args), structured=args.log_json)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+SQLite item store for the Warframe progress tracker
+Loads the processor output into the tables of schema.sql, so lookups by
+uniqueName, category or mastery rank go through an index instead of
+re-reading and scanning the processed JSON files.
+"""
+
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from api_client.data_processor import PROCESSED_OUTPUTS, find_processed_file, output_name
+from utils.helpers import NORMAL, configure_logging, log_stage, read_json_stream
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_FILE = os.path.join(os.path.dirname(__file__), 'schema.sql')
+
+# Cleaned item key -> value stored when the key is missing or null
+ITEM_COLUMNS = {'name': 'Unknown', 'type': '', 'description': '', 'mastery_rank': 0,
+                'tradable': False, 'vaulted': False}
+WEAPON_STAT_COLUMNS = {'total_damage': 0, 'fire_rate': 0, 'accuracy': 0, 'critical_chance': 0, 'status_chance': 0}
+
+# Progress fields a change may set; fields left out keep their stored value
+PROGRESS_FIELDS = ['mastered', 'owned', 'formas']
+# Stored as 0/1 and summed for completion, so they must be real flags
+PROGRESS_FLAGS = ['mastered', 'owned']
+
+# Inserts new rows with 0 for missing fields, updates existing rows field by field
+UPSERT_PROGRESS = (
+    "INSERT INTO progress (user_id, unique_name, mastered, owned, formas, updated_at) "
+    "VALUES (:user_id, :unique_name, COALESCE(:mastered, 0), COALESCE(:owned, 0), COALESCE(:formas, 0), "
+    ":updated_at) "
+    "ON CONFLICT(user_id, unique_name) DO UPDATE SET "
+    "mastered = COALESCE(:mastered, mastered), owned = COALESCE(:owned, owned), "
+    "formas = COALESCE(:formas, formas), updated_at = :updated_at"
+)
+
+def _column_values(item: Dict[str, Any], columns: Dict[str, Any]) -> tuple:
+    values = []
+    for column, default in columns.items():
+        value = item.get(column)
+        values.append(default if value is None else value)
+    return tuple(values)
+
+def _progress_value(field: str, value: Any) -> int:
+    """A progress field's value as stored; ValueError for anything else"""
+    if field in PROGRESS_FLAGS:
+        # True/False or 0/1 only: a 2 would count twice in completion_by_category
+        if value not in (0, 1) or not isinstance(value, (bool, int)):
+            raise ValueError(f"Expected true or false for '{field}', got {value!r}")
+        return int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError(f"Expected a non-negative whole number for '{field}', got {value!r}")
+    return value
+
+def category_kind(output: Dict[str, Any]) -> str:
+    """'weapon' for outputs cleaned with clean_weapon_data, 'warframe' otherwise"""
+    return 'weapon' if output['clean'] == 'clean_weapon_data' else 'warframe'
+
+class TrackerDatabase:
+    """Items, categories and weapon stats in one SQLite file"""
+
+    def __init__(self, db_path: str = "data/tracker.db", verbosity: int = NORMAL, init_schema: bool = True):
+        """Open db_path, creating the tables and switching to WAL unless init_schema=False
+
+        Pass init_schema=False for short-lived connections to a database that
+        has already been set up, e.g. one per web request.
+        """
+        self.db_path = db_path
+        self.verbosity = verbosity
+
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+
+        # isolation_level=None: transactions are opened explicitly with BEGIN
+        self.conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+
+        # Per-connection settings; WAL mode and the schema persist in the file
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        if init_schema:
+            # WAL lets readers keep going while a bulk load is writing
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.create_schema()
+
+    def create_schema(self) -> None:
+        with open(SCHEMA_FILE, 'r', encoding='utf-8') as f:
+            self.conn.executescript(f.read())
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """One write transaction, committed on success and rolled back on any error"""
+        cursor = self.conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            yield cursor
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+
+    def load_processed(self, processed_data_dir: str = "data/processed",
+                       outputs: List[Dict[str, Any]] = None) -> Dict[str, int]:
+        """Replace the items of every processed output with the current files
+
+        Everything is written with executemany inside one transaction, so
+        readers see either the old items or the complete new set.
+        Returns the number of items loaded per category.
+        """
+        start_time = time.perf_counter()
+        outputs = outputs if outputs is not None else PROCESSED_OUTPUTS
+        counts = {}
+
+        with self.transaction() as cursor:
+            next_id = cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM items").fetchone()[0]
+
+            for output in outputs:
+                path = find_processed_file(processed_data_dir, output)
+                if path is None:
+                    if self.verbosity >= NORMAL:
+                        logger.warning(f"✗ {output['file']} not found in {processed_data_dir}")
+                    continue
+
+                name = output_name(output)
+                kind = category_kind(output)
+                cursor.execute(
+                    "INSERT INTO categories (name, label, kind) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET label = excluded.label, kind = excluded.kind",
+                    (name, output['label'], kind))
+                category_id = cursor.execute("SELECT id FROM categories WHERE name = ?", (name,)).fetchone()[0]
+                cursor.execute("DELETE FROM items WHERE category_id = ?", (category_id,))
+
+                # Ids are assigned here so weapon_stats rows can reference them without a lookup
+                item_rows = []
+                stat_rows = []
+                seen = set()
+                for item in read_json_stream(path):
+                    unique_name = item.get('unique_name', '')
+                    if unique_name in seen:
+                        continue
+                    seen.add(unique_name)
+
+                    item_rows.append((next_id, unique_name, category_id) + _column_values(item, ITEM_COLUMNS))
+                    if kind == 'weapon':
+                        stat_rows.append((next_id,) + _column_values(item, WEAPON_STAT_COLUMNS))
+                    next_id += 1
+
+                cursor.executemany(
+                    f"INSERT INTO items (id, unique_name, category_id, {', '.join(ITEM_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * (len(ITEM_COLUMNS) + 3))})", item_rows)
+                cursor.executemany(
+                    f"INSERT INTO weapon_stats (item_id, {', '.join(WEAPON_STAT_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * (len(WEAPON_STAT_COLUMNS) + 1))})", stat_rows)
+                counts[name] = len(item_rows)
+
+        if self.verbosity >= NORMAL:
+            elapsed = time.perf_counter() - start_time
+            log_stage(logger, 'load-db', f"Loaded {sum(counts.values())} items in {len(counts)} categories "
+                      f"into {self.db_path} in {elapsed:.3f}s",
+                      items=sum(counts.values()), counts=counts, seconds=round(elapsed, 4))
+        return counts
+
+    def categories(self) -> List[Dict[str, Any]]:
+        """Every category with its item count"""
+        rows = self.conn.execute(
+            "SELECT c.id, c.name, c.label, c.kind, COUNT(i.id) AS items "
+            "FROM categories c LEFT JOIN items i ON i.category_id = c.id "
+            "GROUP BY c.id ORDER BY c.name")
+        return [dict(row) for row in rows]
+
+    def get_item(self, unique_name: str) -> Optional[Dict[str, Any]]:
+        """One item by uniqueName, with its category and weapon stats (if any)"""
+        row = self.conn.execute(
+            "SELECT i.*, c.name AS category, s.total_damage, s.fire_rate, s.accuracy, "
+            "s.critical_chance, s.status_chance "
+            "FROM items i JOIN categories c ON c.id = i.category_id "
+            "LEFT JOIN weapon_stats s ON s.item_id = i.id "
+            "WHERE i.unique_name = ? ORDER BY i.id LIMIT 1", (unique_name,)).fetchone()
+        return dict(row) if row else None
+
+    def find_items(self, category: str = None, min_mastery_rank: int = None,
+                   max_mastery_rank: int = None, limit: int = None) -> List[Dict[str, Any]]:
+        """Items filtered by category and mastery rank range, ordered by mastery rank and name"""
+        conditions = []
+        params = []
+        if category is not None:
+            conditions.append("c.name = ?")
+            params.append(category)
+        if min_mastery_rank is not None:
+            conditions.append("i.mastery_rank >= ?")
+            params.append(min_mastery_rank)
+        if max_mastery_rank is not None:
+            conditions.append("i.mastery_rank <= ?")
+            params.append(max_mastery_rank)
+
+        query = "SELECT i.*, c.name AS category FROM items i JOIN categories c ON c.id = i.category_id"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY i.mastery_rank, i.name"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self.conn.execute(query, params)]
+
+    def upsert_progress(self, user_id: str, changes: Iterable[Dict[str, Any]]) -> int:
+        """Apply many progress changes for one user in a single transaction
+
+        Each change has a unique_name and any of mastered, owned (true/false
+        or 0/1) and formas (a count); fields it leaves out keep their stored
+        value (0 for new rows). Any other value raises ValueError.
+        Returns the number of changes applied.
+        """
+        updated_at = time.time()
+        rows = []
+        for change in changes:
+            if not change.get('unique_name'):
+                raise ValueError(f"Progress change without a unique_name: {change}")
+            row = {'user_id': user_id, 'unique_name': change['unique_name'], 'updated_at': updated_at}
+            for field in PROGRESS_FIELDS:
+                value = change.get(field)
+                row[field] = _progress_value(field, value) if value is not None else None
+            rows.append(row)
+
+        with self.transaction() as cursor:
+            cursor.executemany(UPSERT_PROGRESS, rows)
+        return len(rows)
+
+    def get_progress(self, user_id: str, category: str = None) -> List[Dict[str, Any]]:
+        """Stored progress rows of a user, optionally only for items of one category"""
+        if category is None:
+            rows = self.conn.execute(
+                "SELECT * FROM progress WHERE user_id = ? ORDER BY unique_name", (user_id,))
+        else:
+            rows = self.conn.execute(
+                "SELECT p.* FROM progress p "
+                "JOIN items i ON i.unique_name = p.unique_name "
+                "JOIN categories c ON c.id = i.category_id "
+                "WHERE p.user_id = ? AND c.name = ? ORDER BY p.unique_name", (user_id, category))
+        return [dict(row) for row in rows]
+
+    def completion_by_category(self, user_id: str) -> List[Dict[str, Any]]:
+        """Mastered and owned counts and completion % of every category for one user
+
+        One GROUP BY over items, joined to the user's progress through the
+        (user_id, unique_name) primary key.
+        """
+        rows = self.conn.execute(
+            "SELECT c.name AS category, c.label, COUNT(i.id) AS total, "
+            "COALESCE(SUM(p.mastered), 0) AS mastered, COALESCE(SUM(p.owned), 0) AS owned, "
+            "ROUND(100.0 * COALESCE(SUM(p.mastered), 0) / MAX(COUNT(i.id), 1), 2) AS percent "
+            "FROM categories c "
+            "LEFT JOIN items i ON i.category_id = c.id "
+            "LEFT JOIN progress p ON p.user_id = ? AND p.unique_name = i.unique_name "
+            "GROUP BY c.id ORDER BY c.name", (user_id,))
+        return [dict(row) for row in rows]
+
+def main():
+    """Load data/processed into data/tracker.db"""
+    configure_logging()
+    with TrackerDatabase() as db:
+        db.load_processed()
+
+if __name__ == "__main__":
+    main()
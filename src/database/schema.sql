@@ -0,0 +1,49 @@
+-- Item store for the Warframe progress tracker
+-- Filled from data/processed by TrackerDatabase.load_processed (src/database/models.py)
+
+-- One row per processed output (warframes, kitguns, companions, ...)
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,          -- output name, e.g. 'melee_weapons'
+    label TEXT NOT NULL,                -- singular label, e.g. 'melee weapon'
+    kind TEXT NOT NULL                  -- 'weapon' rows have weapon_stats, 'warframe' rows don't
+);
+
+-- Cleaned items, as written by clean_warframe_data / clean_weapon_data
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    unique_name TEXT NOT NULL,
+    category_id INTEGER NOT NULL REFERENCES categories(id),
+    name TEXT NOT NULL,
+    type TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    mastery_rank INTEGER NOT NULL DEFAULT 0,
+    tradable INTEGER NOT NULL DEFAULT 0,
+    vaulted INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (category_id, unique_name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_items_unique_name ON items (unique_name);
+CREATE INDEX IF NOT EXISTS idx_items_category_mastery ON items (category_id, mastery_rank);
+CREATE INDEX IF NOT EXISTS idx_items_mastery_rank ON items (mastery_rank);
+
+-- Stats of weapon items, one row per weapon
+CREATE TABLE IF NOT EXISTS weapon_stats (
+    item_id INTEGER PRIMARY KEY REFERENCES items(id) ON DELETE CASCADE,
+    total_damage REAL NOT NULL DEFAULT 0,
+    fire_rate REAL NOT NULL DEFAULT 0,
+    accuracy REAL NOT NULL DEFAULT 0,
+    critical_chance REAL NOT NULL DEFAULT 0,
+    status_chance REAL NOT NULL DEFAULT 0
+);
+
+-- Per-user progress, keyed by uniqueName so it survives item reloads
+CREATE TABLE IF NOT EXISTS progress (
+    user_id TEXT NOT NULL,
+    unique_name TEXT NOT NULL,
+    mastered INTEGER NOT NULL DEFAULT 0,
+    owned INTEGER NOT NULL DEFAULT 0,
+    formas INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,           -- unix time of the last change
+    PRIMARY KEY (user_id, unique_name)
+) WITHOUT ROWID;
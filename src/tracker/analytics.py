@@ -0,0 +1,184 @@
+"""
+Columnar weapon stats analytics
+Every weapon of every weapon category becomes one row of NumPy column
+arrays, so rankings, percentiles and per-type aggregates run as array
+operations instead of loops over dicts.
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from api_client.data_processor import PROCESSED_OUTPUTS, find_processed_file, output_name
+from utils.helpers import read_json_stream
+
+STAT_COLUMNS = ['total_damage', 'fire_rate', 'accuracy', 'critical_chance', 'status_chance']
+TEXT_COLUMNS = ['name', 'unique_name', 'type', 'category']
+
+# clean_weapon_data doesn't keep the crit multiplier, so derived crit metrics
+# assume this one for every weapon. It is a common base value, not the
+# weapon's own: weapons with a higher multiplier are ranked too low.
+DEFAULT_CRIT_MULTIPLIER = 2.0
+
+# Derived metrics that depend on the assumed crit multiplier
+CRIT_METRICS = ['crit_weighted_damage', 'crit_weighted_dps']
+
+def weapon_outputs() -> List[Dict[str, Any]]:
+    """Processed outputs whose items come from clean_weapon_data"""
+    return [output for output in PROCESSED_OUTPUTS if output['clean'] == 'clean_weapon_data']
+
+class WeaponStats:
+    """Weapon stats as NumPy columns, one row per weapon"""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        self.size = len(columns['name'])
+        # Derived metrics at the default crit multiplier, computed on first use
+        self._derived = None
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, Dict[str, Any]]]) -> 'WeaponStats':
+        """Build the columns from (category, cleaned weapon) pairs"""
+        values = {column: [] for column in TEXT_COLUMNS + ['mastery_rank'] + STAT_COLUMNS}
+        for category, item in records:
+            values['category'].append(category)
+            for column in ['name', 'unique_name', 'type']:
+                values[column].append(item.get(column) or '')
+            values['mastery_rank'].append(item.get('mastery_rank') or 0)
+            for column in STAT_COLUMNS:
+                values[column].append(item.get(column) or 0)
+
+        columns = {column: np.array(values[column], dtype=object) for column in TEXT_COLUMNS}
+        columns['mastery_rank'] = np.array(values['mastery_rank'], dtype=np.int32)
+        for column in STAT_COLUMNS:
+            columns[column] = np.array(values[column], dtype=np.float64)
+        return cls(columns)
+
+    @classmethod
+    def load(cls, processed_data_dir: str = "data/processed") -> 'WeaponStats':
+        """Columns for every weapon output found in processed_data_dir"""
+        def records():
+            for output in weapon_outputs():
+                path = find_processed_file(processed_data_dir, output)
+                if path is not None:
+                    for item in read_json_stream(path):
+                        yield output_name(output), item
+        return cls.from_records(records())
+
+    def column(self, name: str) -> np.ndarray:
+        """A numeric stored or derived column by name"""
+        if name in TEXT_COLUMNS:
+            raise ValueError(f"Column '{name}' isn't numeric")
+        if name in self.columns:
+            return self.columns[name]
+        if self._derived is None:
+            self._derived = self.derived_metrics()
+        derived = self._derived
+        if name not in derived:
+            raise ValueError(f"Unknown column '{name}'")
+        return derived[name]
+
+    def derived_metrics(self, crit_multiplier: float = DEFAULT_CRIT_MULTIPLIER) -> Dict[str, np.ndarray]:
+        """Crit-weighted damage and the per-second figures built on it
+
+        crit_weighted_damage is total_damage scaled by the average crit bonus,
+        1 + critical_chance * (crit_multiplier - 1); critical_chance above 1
+        (orange/red crits) keeps scaling linearly. The same crit_multiplier
+        is assumed for every weapon, see DEFAULT_CRIT_MULTIPLIER.
+        """
+        total_damage = self.columns['total_damage']
+        fire_rate = self.columns['fire_rate']
+        crit_weighted = total_damage * (1.0 + self.columns['critical_chance'] * (crit_multiplier - 1.0))
+        return {
+            'crit_weighted_damage': crit_weighted,
+            'burst_dps': total_damage * fire_rate,
+            'crit_weighted_dps': crit_weighted * fire_rate,
+        }
+
+    def rank(self, column: str, descending: bool = True) -> np.ndarray:
+        """Rank of every weapon by a column, 1 for the best; ties share the better rank"""
+        values = self.column(column)
+        keys = -values if descending else values
+        sorted_keys = np.sort(keys)
+        return np.searchsorted(sorted_keys, keys, side='left') + 1
+
+    def percentile_rank(self, column: str) -> np.ndarray:
+        """Share of weapons (0-100) with a value at or below each weapon's value"""
+        values = self.column(column)
+        if not self.size:
+            return np.zeros(0)
+        return np.searchsorted(np.sort(values), values, side='right') * 100.0 / self.size
+
+    def percentiles(self, column: str, q: Iterable[float] = (25, 50, 75, 90, 99)) -> Dict[float, float]:
+        """Distribution of a column, e.g. {50: median, 90: ...}"""
+        q = list(q)
+        if not self.size:
+            return {p: 0.0 for p in q}
+        return dict(zip(q, np.percentile(self.column(column), q).tolist()))
+
+    def aggregate(self, column: str, by: str = 'type') -> List[Dict[str, Any]]:
+        """Count, mean, min and max of a column for every distinct value of by (type or category)"""
+        if not self.size:
+            return []
+        values = self.column(column)
+        groups, inverse = np.unique(self.columns[by].astype(str), return_inverse=True)
+
+        counts = np.bincount(inverse, minlength=len(groups))
+        sums = np.bincount(inverse, weights=values, minlength=len(groups))
+        minimums = np.full(len(groups), np.inf)
+        maximums = np.full(len(groups), -np.inf)
+        np.minimum.at(minimums, inverse, values)
+        np.maximum.at(maximums, inverse, values)
+
+        return [{by: str(group), 'count': int(count), 'mean': float(total / count),
+                 'min': float(minimum), 'max': float(maximum)}
+                for group, count, total, minimum, maximum in zip(groups, counts, sums, minimums, maximums)]
+
+    def top(self, column: str, limit: int = 10, max_mastery_rank: int = None, category: str = None,
+            descending: bool = True) -> List[Dict[str, Any]]:
+        """Leaderboard of the best weapons by a column, optionally within a mastery rank or category"""
+        values = self.column(column)
+        mask = np.ones(self.size, dtype=bool)
+        if max_mastery_rank is not None:
+            mask &= self.columns['mastery_rank'] <= max_mastery_rank
+        if category is not None:
+            mask &= self.columns['category'] == category
+
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return []
+        keys = -values[candidates] if descending else values[candidates]
+
+        # argpartition picks the top rows without sorting every candidate
+        if len(candidates) > limit:
+            chosen = np.argpartition(keys, limit - 1)[:limit]
+        else:
+            chosen = np.arange(len(candidates))
+        rows = candidates[chosen[np.argsort(keys[chosen], kind='stable')]]
+        return [self.row(i, column, values) for i in rows]
+
+    def best_for_mastery_rank(self, mastery_rank: int, metric: str = 'crit_weighted_dps',
+                              limit: int = 10, category: str = None) -> List[Dict[str, Any]]:
+        """Best weapons a player of a given mastery rank can use"""
+        return self.top(metric, limit, max_mastery_rank=mastery_rank, category=category)
+
+    def row(self, i: int, metric: str = None, values: np.ndarray = None) -> Dict[str, Any]:
+        """One weapon as a dict, with a metric's value when given
+
+        values is the metric's column if the caller already has it.
+        """
+        row = {column: self.columns[column][i] for column in TEXT_COLUMNS}
+        row['mastery_rank'] = int(self.columns['mastery_rank'][i])
+        row.update({column: float(self.columns[column][i]) for column in STAT_COLUMNS})
+        if metric is not None and metric not in row:
+            row[metric] = float((values if values is not None else self.column(metric))[i])
+        return row
+
+    def to_frame(self):
+        """The columns plus derived metrics as a pandas DataFrame (needs pandas)"""
+        # Imported here so loading the tracker doesn't pay for pandas
+        try:
+            import pandas as pd
+        except ImportError as e:
+            raise ImportError("pandas is required for WeaponStats.to_frame") from e
+        return pd.DataFrame({**self.columns, **self.derived_metrics()})
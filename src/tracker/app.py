@@ -0,0 +1,317 @@
+"""
+Flask tracker app serving the processed catalogue and per-user progress
+Category and item bodies are serialized once per dataset version and sent
+with strong ETags; gzip bodies are kept in a small LRU cache.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+if __package__ in (None, ''):
+    # Running as `python src/tracker/app.py`: make the src packages importable
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import Flask, Response, abort, g, jsonify, request
+
+from api_client.build_manifest import BuildManifest, fingerprint
+from api_client.data_processor import BUILD_MANIFEST_FILE, PROCESSED_OUTPUTS, find_processed_file, output_name
+from database.models import TrackerDatabase
+from tracker.analytics import CRIT_METRICS, DEFAULT_CRIT_MULTIPLIER, WeaponStats, weapon_outputs
+from tracker.query import CategoryIndex, parse_query_args
+from utils.helpers import read_json_stream
+from utils.search_index import SEARCH_INDEX_FILE, SearchIndex
+
+JSON_MIMETYPE = 'application/json'
+
+def _serialize(payload: Any) -> Tuple[bytes, str]:
+    """Compact JSON body and its strong ETag"""
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return body, hashlib.sha256(body).hexdigest()[:32]
+
+class Dataset:
+    """Everything served for one version of data/processed
+
+    A dataset is built completely before it is published and is not changed
+    afterwards, except that item bodies are added on first request; a
+    request that took a dataset keeps seeing that version throughout.
+    """
+
+    def __init__(self, version: str, categories: Dict[str, Tuple[Dict[str, Any], List[Dict[str, Any]]]],
+                 items: Dict[str, Tuple[str, Dict[str, Any]]], bodies: Dict[Any, Tuple[bytes, str]],
+                 query_indexes: Dict[str, CategoryIndex], weapon_stats: WeaponStats, search_index: SearchIndex):
+        self.version = version
+        self.categories = categories
+        self.items = items
+        self.bodies = bodies
+        self.query_indexes = query_indexes
+        self.weapon_stats = weapon_stats
+        self.search_index = search_index
+
+    def body(self, key: Any) -> Optional[Tuple[bytes, str]]:
+        """Serialized body and strong ETag of a response, or None if there is no such resource"""
+        cached = self.bodies.get(key)
+        if cached is not None:
+            return cached
+
+        # Item details are serialized on first request and kept for this version;
+        # two requests racing here store the same bytes
+        if isinstance(key, tuple) and key[0] == 'item' and key[1] in self.items:
+            category, item = self.items[key[1]]
+            cached = self.bodies[key] = _serialize(dict(item, category=category))
+            return cached
+        return None
+
+class CatalogueCache:
+    """The current Dataset of data/processed, reloaded when the files change
+
+    The dataset version is derived from the build manifest, so a processor
+    run that rewrites outputs invalidates every cached body at once. A reload
+    builds the new Dataset aside and publishes it with a single assignment.
+    """
+
+    def __init__(self, processed_data_dir: str, gzip_cache_size: int = 64, gzip_level: int = 6):
+        self.processed_data_dir = processed_data_dir
+        self.gzip_cache_size = gzip_cache_size
+        self.gzip_level = gzip_level
+        self._lock = threading.Lock()
+        # (file stats it was loaded from, Dataset), replaced as a whole
+        self._current = None
+        # Keyed by content-derived ETags, so entries stay valid across versions
+        self._gzipped = OrderedDict()
+
+    @property
+    def dataset(self) -> Optional[Dataset]:
+        """The last loaded dataset, without checking the files"""
+        return self._current[1] if self._current else None
+
+    def _stat_key(self) -> Tuple:
+        """Cheap per-request check for a changed dataset: manifest and output file stats"""
+        paths = [os.path.join(self.processed_data_dir, BUILD_MANIFEST_FILE),
+                 os.path.join(self.processed_data_dir, SEARCH_INDEX_FILE)]
+        paths.extend(find_processed_file(self.processed_data_dir, output) or output['file']
+                     for output in PROCESSED_OUTPUTS)
+        key = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                key.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                key.append((path, None, None))
+        return tuple(key)
+
+    def refresh(self) -> Dataset:
+        """The current dataset, reloaded and re-serialized first if the processed data changed"""
+        stat_key = self._stat_key()
+        current = self._current
+        if current is not None and current[0] == stat_key:
+            return current[1]
+
+        with self._lock:
+            current = self._current
+            if current is not None and current[0] == stat_key:
+                return current[1]
+            dataset = self._load(stat_key)
+            self._current = (stat_key, dataset)
+            return dataset
+
+    def _load(self, stat_key: Tuple) -> Dataset:
+        manifest = BuildManifest(os.path.join(self.processed_data_dir, BUILD_MANIFEST_FILE))
+        categories = {}
+        items = {}
+        for output in PROCESSED_OUTPUTS:
+            path = find_processed_file(self.processed_data_dir, output)
+            if path is None:
+                continue
+            category_items = list(read_json_stream(path))
+            categories[output_name(output)] = (output, category_items)
+            for item in category_items:
+                items.setdefault(item.get('unique_name'), (output_name(output), item))
+
+        # Fall back to file stats when there is no manifest (outputs written by hand)
+        version = fingerprint(manifest.outputs or [entry[1:] for entry in stat_key])
+        query_indexes = {name: CategoryIndex(category_items) for name, (_, category_items) in categories.items()}
+
+        weapon_categories = {output_name(output) for output in weapon_outputs()}
+        weapon_stats = WeaponStats.from_records(
+            (name, item) for name, (_, category_items) in categories.items()
+            if name in weapon_categories for item in category_items)
+
+        # The processor saves the index; without a usable one it is built in memory
+        try:
+            search_index = SearchIndex.load(os.path.join(self.processed_data_dir, SEARCH_INDEX_FILE))
+        except (OSError, ValueError, KeyError, EOFError):
+            search_index = SearchIndex.build((name, item) for name, (_, category_items) in categories.items()
+                                             for item in category_items)
+
+        # Listings are what dashboards poll, so serialize them up front
+        bodies = {'categories': _serialize([
+            {'name': name, 'label': output['label'], 'items': len(category_items)}
+            for name, (output, category_items) in categories.items()
+        ])}
+        for name, (_, category_items) in categories.items():
+            bodies[('category', name)] = _serialize(category_items)
+
+        return Dataset(version, categories, items, bodies, query_indexes, weapon_stats, search_index)
+
+    def gzipped(self, etag: str, body: bytes) -> bytes:
+        """Gzip body of an ETag, compressed at most once while it stays in the LRU cache"""
+        with self._lock:
+            if etag in self._gzipped:
+                self._gzipped.move_to_end(etag)
+                return self._gzipped[etag]
+
+        compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        with self._lock:
+            self._gzipped[etag] = compressed
+            while len(self._gzipped) > self.gzip_cache_size:
+                self._gzipped.popitem(last=False)
+        return compressed
+
+def cached_response(cache: CatalogueCache, key: Any) -> Response:
+    """Serve a cached body, answering If-None-Match revalidation with 304"""
+    dataset = cache.refresh()
+    cached = dataset.body(key)
+    if cached is None:
+        abort(404)
+    body, etag = cached
+
+    # The gzip representation has different bytes, so it gets its own strong ETag
+    use_gzip = 'gzip' in request.accept_encodings
+    if use_gzip:
+        etag += '-gzip'
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        data = cache.gzipped(etag, body) if use_gzip else body
+        response = Response(data, mimetype=JSON_MIMETYPE)
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['X-Dataset-Version'] = dataset.version
+    return response
+
+def create_app(processed_data_dir: str = "data/processed", db_path: str = "data/tracker.db",
+               gzip_cache_size: int = 64) -> Flask:
+    """Build the tracker app over a processed data directory and a tracker database"""
+    app = Flask(__name__)
+    cache = CatalogueCache(processed_data_dir, gzip_cache_size)
+    app.extensions['catalogue_cache'] = cache
+
+    # Set the database up once; requests then only open a connection. An
+    # in-memory database is private to its connection, so it is set up every time
+    persistent = db_path != ':memory:'
+    if persistent:
+        TrackerDatabase(db_path, verbosity=0).close()
+
+    def get_db() -> TrackerDatabase:
+        # One connection per request context; SQLite connections shouldn't be shared across threads
+        if 'db' not in g:
+            g.db = TrackerDatabase(db_path, verbosity=0, init_schema=not persistent)
+        return g.db
+
+    @app.teardown_appcontext
+    def close_db(exception=None):
+        db = g.pop('db', None)
+        if db is not None:
+            db.close()
+
+    @app.route('/api/categories')
+    def categories():
+        return cached_response(cache, 'categories')
+
+    @app.route('/api/categories/<name>')
+    def category(name: str):
+        return cached_response(cache, ('category', name))
+
+    @app.route('/api/categories/<name>/items')
+    def query_category(name: str):
+        # Filtered pages depend on the query string, so they are answered from
+        # the sorted indexes instead of the body cache
+        dataset = cache.refresh()
+        index = dataset.query_indexes.get(name)
+        if index is None:
+            abort(404)
+        try:
+            page = index.query(**parse_query_args(request.args.to_dict()))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'category': name, 'dataset_version': dataset.version, **page})
+
+    @app.route('/api/search')
+    def search():
+        # ?q=kuva bra&complete=1 for search-as-you-type, plain ?q=incarnon for token search
+        dataset = cache.refresh()
+        query = request.args.get('q', '')
+        try:
+            limit = max(1, min(int(request.args.get('limit', 20)), 100))
+        except ValueError:
+            return jsonify({'error': "Expected a number for 'limit'"}), 400
+        if request.args.get('complete', '').lower() in ('1', 'true'):
+            results = dataset.search_index.autocomplete(query, limit)
+        else:
+            prefix = request.args.get('prefix', '').lower() in ('1', 'true')
+            results = dataset.search_index.search(query, limit, prefix=prefix)
+        return jsonify({'query': query, 'dataset_version': dataset.version, 'results': results})
+
+    @app.route('/api/leaderboards/<metric>')
+    def leaderboard(metric: str):
+        # e.g. /api/leaderboards/crit_weighted_dps?mastery_rank=8&category=melee_weapons
+        dataset = cache.refresh()
+        try:
+            mastery_rank = request.args.get('mastery_rank')
+            mastery_rank = int(mastery_rank) if mastery_rank is not None else None
+            limit = max(1, min(int(request.args.get('limit', 10)), 100))
+            rows = dataset.weapon_stats.top(metric, limit, max_mastery_rank=mastery_rank,
+                                            category=request.args.get('category'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        payload = {'metric': metric, 'dataset_version': dataset.version, 'weapons': rows}
+        if metric in CRIT_METRICS:
+            # The processed data has no per-weapon crit multiplier
+            payload['assumed_crit_multiplier'] = DEFAULT_CRIT_MULTIPLIER
+        return jsonify(payload)
+
+    @app.route('/api/items/<path:unique_name>')
+    def item(unique_name: str):
+        # uniqueNames start with a slash, which the URL path already supplies
+        return cached_response(cache, ('item', '/' + unique_name))
+
+    @app.route('/api/users/<user_id>/progress', methods=['GET'])
+    def get_progress(user_id: str):
+        db = get_db()
+        return jsonify({
+            'user_id': user_id,
+            'completion': db.completion_by_category(user_id),
+            'progress': db.get_progress(user_id, request.args.get('category')),
+        })
+
+    @app.route('/api/users/<user_id>/progress', methods=['POST'])
+    def update_progress(user_id: str):
+        changes = request.get_json(silent=True)
+        if isinstance(changes, dict):
+            changes = [changes]
+        if not isinstance(changes, list) or not all(isinstance(change, dict) for change in changes):
+            return jsonify({'error': 'expected a JSON list of progress changes'}), 400
+        try:
+            updated = get_db().upsert_progress(user_id, changes)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'user_id': user_id, 'updated': updated})
+
+    return app
+
+def main():
+    """Serve the tracker on localhost"""
+    create_app().run(debug=False)
+
+if __name__ == "__main__":
+    main()
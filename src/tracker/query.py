@@ -0,0 +1,220 @@
+"""
+Filtered, sorted and keyset-paginated queries over one processed category
+Every sortable field gets a sorted index when the category is loaded, so a
+page is found with a binary search instead of sorting the whole list. A
+range on the sort field narrows the scan to a slice of its index; every
+other filter is checked item by item while walking that slice, so a
+selective filter on another field scans until it has filled a page:
+
+    index = CategoryIndex(items)
+    page = index.query({'mastery_rank': {'max': 8}, 'vaulted': {'eq': False}},
+                       sort='critical_chance', descending=True, limit=20)
+    next_page = index.query(..., cursor=page['next_cursor'])
+"""
+
+import base64
+import bisect
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from api_client.data_processor import PROCESSED_OUTPUTS, find_processed_file, output_name
+from utils.helpers import read_json_stream
+
+# Fields of clean_warframe_data / clean_weapon_data items and their value types
+FIELD_TYPES = {
+    'name': str,
+    'unique_name': str,
+    'type': str,
+    'description': str,
+    'mastery_rank': int,
+    'tradable': bool,
+    'vaulted': bool,
+    'total_damage': float,
+    'fire_rate': float,
+    'accuracy': float,
+    'critical_chance': float,
+    'status_chance': float,
+}
+
+SORTABLE_FIELDS = ['name', 'type', 'mastery_rank', 'total_damage', 'fire_rate', 'accuracy',
+                   'critical_chance', 'status_chance']
+
+# Supported filter operators: {'field': {'eq': value, 'min': value, 'max': value}}
+FILTER_OPERATORS = ['eq', 'min', 'max']
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+
+def _sort_key(value: Any) -> Tuple:
+    # Missing values sort first instead of failing to compare with real ones
+    return (value is not None, value if value is not None else 0)
+
+def encode_cursor(key: Tuple, sort: str, descending: bool) -> str:
+    """Opaque cursor for the last row of a page, tied to the order it was produced in"""
+    payload = {'sort': sort, 'descending': descending, 'key': key}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str, sort: str, descending: bool) -> Tuple:
+    """The sort key in a cursor; ValueError if it is malformed or from another sort order"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        (present, value), position = payload['key']
+        cursor_sort, cursor_descending = payload['sort'], payload['descending']
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor '{cursor}'") from e
+    if (cursor_sort, cursor_descending) != (sort, descending):
+        raise ValueError(f"Cursor is for sort={'-' if cursor_descending else ''}{cursor_sort}, "
+                         f"not sort={'-' if descending else ''}{sort}")
+
+    # The key is compared with the index keys, so its value must have the field's type
+    expected = (int, float) if FIELD_TYPES[sort] in (int, float) else FIELD_TYPES[sort]
+    if (not isinstance(present, bool) or not isinstance(position, int)
+            or (present and (not isinstance(value, expected) or isinstance(value, bool)))):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    return ((present, value), position)
+
+def coerce_value(field: str, value: Any) -> Any:
+    """Convert a filter value (e.g. a query-string '8' or 'false') to the field's type"""
+    if field not in FIELD_TYPES:
+        raise ValueError(f"Unknown field '{field}'")
+    field_type = FIELD_TYPES[field]
+    if not isinstance(value, str) or field_type is str:
+        return value
+    if field_type is bool:
+        if value.lower() not in ('true', 'false', '1', '0'):
+            raise ValueError(f"Expected true or false for '{field}', got '{value}'")
+        return value.lower() in ('true', '1')
+    try:
+        return field_type(value)
+    except ValueError as e:
+        raise ValueError(f"Expected a number for '{field}', got '{value}'") from e
+
+def parse_query_args(args: Dict[str, str]) -> Dict[str, Any]:
+    """Turn query-string style arguments into CategoryIndex.query keyword arguments
+
+    field=value filters on equality, field_min / field_max on a range,
+    sort=field or sort=-field picks the order, plus limit and cursor.
+    """
+    filters = {}
+    for arg, value in args.items():
+        if arg in ('sort', 'limit', 'cursor'):
+            continue
+        field, operator = arg, 'eq'
+        for suffix in ('_min', '_max'):
+            if arg.endswith(suffix) and arg[:-len(suffix)] in FIELD_TYPES:
+                field, operator = arg[:-len(suffix)], suffix[1:]
+        filters.setdefault(field, {})[operator] = coerce_value(field, value)
+
+    sort = args.get('sort', 'name')
+    descending = sort.startswith('-')
+    try:
+        limit = int(args.get('limit', DEFAULT_LIMIT))
+    except ValueError as e:
+        raise ValueError(f"Expected a number for 'limit', got '{args.get('limit')}'") from e
+
+    return {'filters': filters, 'sort': sort.lstrip('-'), 'descending': descending,
+            'limit': limit, 'cursor': args.get('cursor')}
+
+class SortedIndex:
+    """Item positions of a category in order of one field"""
+
+    def __init__(self, items: List[Dict[str, Any]], field: str):
+        self.field = field
+        self.keys = sorted((_sort_key(item.get(field)), position) for position, item in enumerate(items))
+
+    def bounds(self, minimum: Any = None, maximum: Any = None) -> Tuple[int, int]:
+        """Index range [lo, hi) of the keys with minimum <= value <= maximum"""
+        # (True,) sorts after every missing value and before every present one,
+        # so items without the field never match a range on it
+        lo = bisect.bisect_left(self.keys, ((True, minimum) if minimum is not None else (True,), -1))
+        hi = len(self.keys)
+        if maximum is not None:
+            hi = bisect.bisect_right(self.keys, ((True, maximum), float('inf')))
+        return lo, hi
+
+class CategoryIndex:
+    """Sorted indexes over the items of one processed category"""
+
+    def __init__(self, items: List[Dict[str, Any]]):
+        self.items = items
+        self.indexes = {field: SortedIndex(items, field) for field in SORTABLE_FIELDS
+                        if any(field in item for item in items)}
+
+    def _matches(self, item: Dict[str, Any], filters: Dict[str, Dict[str, Any]]) -> bool:
+        for field, conditions in filters.items():
+            value = item.get(field)
+            if 'eq' in conditions and value != conditions['eq']:
+                return False
+            if 'min' in conditions and (value is None or value < conditions['min']):
+                return False
+            if 'max' in conditions and (value is None or value > conditions['max']):
+                return False
+        return True
+
+    def query(self, filters: Optional[Dict[str, Dict[str, Any]]] = None, sort: str = 'name',
+              descending: bool = False, limit: int = DEFAULT_LIMIT, cursor: str = None) -> Dict[str, Any]:
+        """One page of items matching filters, in sort order
+
+        Returns {'items': [...], 'next_cursor': str or None}; pass next_cursor
+        back with the same filters and sort to get the following page.
+        Filters on fields other than sort are a linear scan of the sorted
+        slice, see the module docstring. ValueError if the category has
+        items but none of them has the sort field.
+        """
+        filters = dict(filters or {})
+        for field, conditions in filters.items():
+            if field not in FIELD_TYPES:
+                raise ValueError(f"Unknown field '{field}'")
+            unknown = set(conditions) - set(FILTER_OPERATORS)
+            if unknown:
+                raise ValueError(f"Unknown filter operator(s) {', '.join(sorted(unknown))} for '{field}'")
+        if sort not in SORTABLE_FIELDS:
+            raise ValueError(f"Can't sort by '{sort}', expected one of {', '.join(SORTABLE_FIELDS)}")
+        limit = max(1, min(limit, MAX_LIMIT))
+
+        index = self.indexes.get(sort)
+        if index is None:
+            if not self.items:
+                return {'items': [], 'next_cursor': None}
+            raise ValueError(f"Can't sort by '{sort}', no item of this category has it, "
+                             f"expected one of {', '.join(sorted(self.indexes))}")
+
+        # A range on the sort field narrows the scan to a slice of its index
+        lo, hi = 0, len(index.keys)
+        range_conditions = filters.get(sort, {})
+        if 'min' in range_conditions or 'max' in range_conditions:
+            lo, hi = index.bounds(range_conditions.get('min'), range_conditions.get('max'))
+
+        # The cursor is the key of the previous page's last row
+        if cursor:
+            cursor_key = decode_cursor(cursor, sort, descending)
+            if descending:
+                hi = min(hi, bisect.bisect_left(index.keys, cursor_key))
+            else:
+                lo = max(lo, bisect.bisect_right(index.keys, cursor_key))
+
+        positions = range(hi - 1, lo - 1, -1) if descending else range(lo, hi)
+        page = []
+        last_key = None
+        has_more = False
+        for i in positions:
+            key = index.keys[i]
+            item = self.items[key[1]]
+            if not self._matches(item, filters):
+                continue
+            if len(page) == limit:
+                has_more = True
+                break
+            page.append(item)
+            last_key = key
+
+        return {'items': page, 'next_cursor': encode_cursor(last_key, sort, descending) if has_more else None}
+
+def load_category_indexes(processed_data_dir: str = "data/processed") -> Dict[str, CategoryIndex]:
+    """A CategoryIndex for every processed output found in processed_data_dir"""
+    indexes = {}
+    for output in PROCESSED_OUTPUTS:
+        path = find_processed_file(processed_data_dir, output)
+        if path is not None:
+            indexes[output_name(output)] = CategoryIndex(list(read_json_stream(path)))
+    return indexes
@@ -0,0 +1,420 @@
+"""
+Shared helpers for the Warframe progress tracker
+"""
+
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+# Verbosity levels understood by WFCDClient and WarframeDataProcessor
+QUIET = 0    # nothing but errors
+NORMAL = 1   # one summary record per stage
+DEBUG = 2    # explore passes and per-item debug output
+
+def log_stage(logger: logging.Logger, stage: str, message: str, **stats: Any) -> None:
+    """Emit one structured INFO record summarising a pipeline stage
+
+    The stage name and stats travel on the record (record.stage, record.stats),
+    so a StructuredFormatter can write them out as JSON.
+    """
+    logger.info(f"[{stage}] {message}", extra={'stage': stage, 'stats': stats})
+
+class StructuredFormatter(logging.Formatter):
+    """Formats log records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if hasattr(record, 'stage'):
+            entry['stage'] = record.stage
+            entry['stats'] = record.stats
+        return json.dumps(entry, default=str)
+
+def configure_logging(verbosity: int = NORMAL, structured: bool = False) -> None:
+    """Set up console logging for command line entry points"""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(StructuredFormatter() if structured else logging.Formatter('%(message)s'))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(logging.DEBUG if verbosity >= DEBUG else logging.INFO)
+
+@dataclass(slots=True)
+class WarframeRecord:
+    """Cleaned warframe-like item (warframes, necramechs, archwings, companions)
+
+    Slotted, so a record holds its seven values without a per-item dict.
+    """
+    name: str
+    unique_name: str
+    type: str
+    description: str
+    mastery_rank: int
+    tradable: bool
+    vaulted: bool
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'unique_name': self.unique_name,
+            'type': self.type,
+            'description': self.description,
+            'mastery_rank': self.mastery_rank,
+            'tradable': self.tradable,
+            'vaulted': self.vaulted,
+        }
+
+@dataclass(slots=True)
+class WeaponRecord:
+    """Cleaned weapon-like item, with the stats clean_weapon_data keeps"""
+    name: str
+    unique_name: str
+    type: str
+    description: str
+    mastery_rank: int
+    tradable: bool
+    vaulted: bool
+    total_damage: float
+    fire_rate: float
+    accuracy: float
+    critical_chance: float
+    status_chance: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'unique_name': self.unique_name,
+            'type': self.type,
+            'description': self.description,
+            'mastery_rank': self.mastery_rank,
+            'tradable': self.tradable,
+            'vaulted': self.vaulted,
+            'total_damage': self.total_damage,
+            'fire_rate': self.fire_rate,
+            'accuracy': self.accuracy,
+            'critical_chance': self.critical_chance,
+            'status_chance': self.status_chance,
+        }
+
+Record = Union[WarframeRecord, WeaponRecord]
+
+def record_to_dict(value: Any) -> Dict[str, Any]:
+    """JSON encoder hook turning records into plain dicts"""
+    if isinstance(value, (WarframeRecord, WeaponRecord)):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# Permissions open() gives new files under the current umask; atomic_write's
+# temp files are created 0600 and get these before they are renamed into place
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+_NEW_FILE_MODE = 0o666 & ~_UMASK
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w') -> Iterator[IO]:
+    """Open a temp file beside path and rename it into place once the block succeeds
+    
+    Readers see either the old file or the complete new one; if the block
+    raises, the temp file is removed and path is left untouched. Every writer
+    gets its own temp file, and the data is fsynced before the rename, so
+    neither concurrent writers nor a crash can publish a partial file.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    f = tempfile.NamedTemporaryFile(mode, encoding=None if 'b' in mode else 'utf-8', dir=directory or '.',
+                                    prefix=os.path.basename(path) + '.', suffix='.tmp', delete=False)
+    try:
+        with f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(f.name, _NEW_FILE_MODE)
+        os.replace(f.name, path)
+    except BaseException:
+        if os.path.exists(f.name):
+            os.remove(f.name)
+        raise
+
+# Formats understood by write_json_stream, keyed by file extension
+JSON_FORMATS = {'json': '.json', 'jsonl': '.jsonl'}
+
+_compact_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=record_to_dict)
+
+def write_json_stream(path: str, items: Iterable[Union[Dict[str, Any], Record]], fmt: str = 'json') -> int:
+    """Serialize items (dicts or records) one at a time, returning how many were written
+    
+    'json' writes a compact array with one item per line, 'jsonl' writes JSON
+    Lines. The file is written under a temp name and renamed into place, so
+    readers see either the old file or the complete new one.
+    """
+    if fmt not in JSON_FORMATS:
+        raise ValueError(f"Unknown JSON format '{fmt}', expected one of {', '.join(JSON_FORMATS)}")
+    
+    count = 0
+    with atomic_write(path) as f:
+        if fmt == 'jsonl':
+            for item in items:
+                f.write(_compact_encoder.encode(item))
+                f.write('\n')
+                count += 1
+        else:
+            f.write('[')
+            for item in items:
+                f.write(',\n' if count else '\n')
+                f.write(_compact_encoder.encode(item))
+                count += 1
+            f.write('\n]\n' if count else ']\n')
+    return count
+
+def read_json_stream(path: str) -> Iterator[Dict[str, Any]]:
+    """Items of a file written by write_json_stream (or any JSON array file)
+    
+    JSON Lines files are read one line at a time.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(JSON_FORMATS['jsonl']):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+# Roughly how many items each WFCD file holds today; generate_wfcd_corpus
+# multiplies these by its scale
+WFCD_ITEM_COUNTS = {
+    'Warframes.json': 110,
+    'Primary.json': 420,
+    'Secondary.json': 320,
+    'Melee.json': 560,
+    'Misc.json': 2300,
+    'Archwing.json': 10,
+    'Arch-Gun.json': 30,
+    'Arch-Melee.json': 12,
+    'Pets.json': 50,
+    'Sentinels.json': 12,
+    'SentinelWeapons.json': 25,
+    'Mods.json': 1600,
+    'Gear.json': 120,
+}
+
+# Distinct and all three letters long, so different syllable sequences always
+# spell different names
+_NAME_SYLLABLES = ['bra', 'ton', 'kar', 'ris', 'sol', 'mag', 'vec', 'tis', 'lan', 'gor', 'gon', 'hek', 'nik',
+                   'kan', 'ign', 'tor', 'sek', 'arc', 'val', 'kyr', 'raz', 'zan', 'vol', 'dex', 'mir']
+
+def _corpus_name(rng: random.Random, index: int) -> str:
+    """A made-up item name like 'Vectis' or 'Karris Prime', unique for every index
+    
+    Indexes are numbered through all two-syllable names, then all three-syllable
+    ones and so on, so no two indexes share a name; within each length they are
+    shuffled by multiplying with a number coprime to the block size.
+    """
+    base = len(_NAME_SYLLABLES)
+    length = 2
+    while index >= base ** length:
+        index -= base ** length
+        length += 1
+    index = (index * 7919 + 12345) % base ** length
+    syllables = []
+    for _ in range(length):
+        index, digit = divmod(index, base)
+        syllables.append(_NAME_SYLLABLES[digit])
+    name = ''.join(syllables).capitalize()
+    if rng.random() < 0.2:
+        name += rng.choice([' Prime', ' Vandal', ' Wraith'])
+    return name
+
+def _corpus_components(rng: random.Random, name: str) -> List[Dict[str, Any]]:
+    """Blueprint components with drop tables, the nested bulk of real WFCD items"""
+    components = []
+    for part in rng.sample(['Blueprint', 'Barrel', 'Receiver', 'Stock', 'Neuroptics', 'Chassis', 'Systems'], 3):
+        drops = [{'location': f"Void Relic {rng.choice('ALMN')}{rng.randint(1, 20)}",
+                  'type': f"{name} {part}", 'chance': round(rng.uniform(0.02, 0.25), 4),
+                  'rarity': rng.choice(['Common', 'Uncommon', 'Rare'])}
+                 for _ in range(rng.randint(1, 4))]
+        components.append({'uniqueName': f"/Lotus/Types/Recipes/{name.replace(' ', '')}{part}",
+                           'name': part, 'itemCount': rng.randint(1, 3), 'tradable': part != 'Blueprint',
+                           'drops': drops})
+    return components
+
+def _corpus_item(rng: random.Random, name: str, unique_name: str, item_type: str,
+                 weapon: bool = False, nested: bool = True) -> Dict[str, Any]:
+    """One raw item with the fields WFCD files carry"""
+    item = {
+        'name': name,
+        'uniqueName': unique_name,
+        'type': item_type,
+        'description': f"{name} {rng.choice(['fires', 'wields', 'channels'])} "
+                       f"{rng.choice(['void', 'tenno', 'grineer', 'corpus'])} technology. " * rng.randint(1, 3),
+        'category': item_type,
+        'imageName': name.lower().replace(' ', '-') + '.png',
+        'masteryReq': rng.randint(0, 16),
+        'tradable': rng.random() < 0.4,
+    }
+    if name.endswith(' Prime'):
+        item['vaulted'] = rng.random() < 0.5
+    if weapon:
+        damage = {kind: round(rng.uniform(0, 120), 1) for kind in rng.sample(
+            ['impact', 'puncture', 'slash', 'heat', 'cold', 'electricity', 'toxin'], 3)}
+        item.update({
+            'totalDamage': round(sum(damage.values()), 1),
+            'fireRate': round(rng.uniform(0.5, 15), 3),
+            'accuracy': round(rng.uniform(5, 100), 1),
+            'criticalChance': round(rng.uniform(0.02, 0.5), 2),
+            'criticalMultiplier': round(rng.uniform(1.5, 3.2), 1),
+            'statusChance': round(rng.uniform(0.02, 0.5), 2),
+            'damage': damage,
+        })
+    if nested:
+        item['components'] = _corpus_components(rng, name)
+        item['patchlogs'] = [{'name': f"Update {rng.randint(20, 38)}", 'date': '2024-01-01T00:00:00Z',
+                              'changes': f"{name} stats adjusted."} for _ in range(rng.randint(0, 3))]
+    return item
+
+def _weapon_kinds(folder: str, item_type: str, kitgun_path: str = None) -> List[Tuple[float, Callable]]:
+    """Regular, PvP and kitgun barrel variants of one weapon file"""
+    kinds = [
+        (0.85, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Weapons/Tenno/{folder}/{name.replace(' ', '')}/{name.replace(' ', '')}",
+            item_type, weapon=True)),
+        (0.05, lambda rng, name: _corpus_item(
+            rng, f"Conclave {name}", f"/Lotus/Weapons/Tenno/{folder}/PvPVariants/{name.replace(' ', '')}",
+            item_type, weapon=True, nested=False)),
+    ]
+    if kitgun_path:
+        kinds += [
+            (0.08, lambda rng, name: _corpus_item(
+                rng, name, f"{kitgun_path}/Barrel/{name.replace(' ', '')}Barrel", item_type, weapon=True)),
+            (0.02, lambda rng, name: _corpus_item(
+                rng, name, f"{kitgun_path}/PvPBarrel/Barrel/{name.replace(' ', '')}PvPBarrel", item_type,
+                weapon=True, nested=False)),
+        ]
+    return kinds
+
+# File -> [(share of the file's items, builder(rng, name) -> item)]; the paths
+# follow the real uniqueName layout so every classification rule has both
+# matches and near misses (Necramechs under EntratiMech, kitgun Barrel folders,
+# amp prisms whose Barrel folder sits under OperatorAmplifiers, Zaw Tip
+# folders, PvP variants)
+_CORPUS_KINDS = {
+    'Warframes.json': [
+        (0.92, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Powersuits/{name.split()[0]}/{name.replace(' ', '')}", 'Warframe')),
+        (0.08, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Powersuits/EntratiMech/{name.replace(' ', '')}", 'Warframe')),
+    ],
+    'Primary.json': _weapon_kinds('LongGuns', 'Rifle', '/Lotus/Weapons/SolarisUnited/Primary/SUModularPrimarySet1'),
+    'Secondary.json': _weapon_kinds('Pistols', 'Pistol',
+                                    '/Lotus/Weapons/SolarisUnited/Secondary/SUModularSecondarySet1'),
+    'Melee.json': [
+        (0.8, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Weapons/Tenno/Melee/{rng.choice(['Swords', 'Axe', 'Staff', 'Glaive'])}/"
+                       f"{name.replace(' ', '')}", 'Melee', weapon=True)),
+        (0.08, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Weapons/Ostron/Melee/ModularMelee01/Tip/Tip{name.replace(' ', '')}",
+            'Zaw Component', weapon=True)),
+        (0.02, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Weapons/Ostron/Melee/ModularMelee01/PvPVariants/Tip/Tip{name.replace(' ', '')}",
+            'Zaw Component', weapon=True, nested=False)),
+        (0.06, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Weapons/Ostron/Melee/ModularMelee01/Handle/Handle{name.replace(' ', '')}",
+            'Zaw Component', nested=False)),
+        (0.04, lambda rng, name: _corpus_item(
+            rng, f"Conclave {name}", f"/Lotus/Weapons/Tenno/Melee/PvPVariants/{name.replace(' ', '')}",
+            'Melee', weapon=True, nested=False)),
+    ],
+    'Misc.json': [
+        (0.9, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Types/Items/MiscItems/{name.replace(' ', '')}", 'Misc', nested=False)),
+        (0.03, lambda rng, name: _corpus_item(
+            rng, f"{name} Incarnon Genesis", f"/Lotus/Upgrades/CosmeticEnhancers/Evolution/{name.replace(' ', '')}",
+            'Equipment Adapter', nested=False)),
+        (0.02, lambda rng, name: _corpus_item(
+            rng, f"{name} Prism", f"/Lotus/Weapons/Sentients/OperatorAmplifiers/Set1/Barrel/{name.replace(' ', '')}",
+            'Amp', weapon=True)),
+        (0.04, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Weapons/SolarisUnited/Secondary/SUModularSecondarySet2/Barrel/"
+                       f"{name.replace(' ', '')}Barrel", 'Misc', weapon=True)),
+        (0.01, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Weapons/SolarisUnited/PvPVariants/Barrel/{name.replace(' ', '')}Barrel",
+            'Misc', weapon=True, nested=False)),
+    ],
+    'Archwing.json': [
+        (1.0, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Powersuits/Archwing/{name.replace(' ', '')}/{name.replace(' ', '')}", 'Archwing')),
+    ],
+    'Arch-Gun.json': [
+        (0.9, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Weapons/Tenno/Archwing/Primary/{name.replace(' ', '')}", 'Arch-Gun', weapon=True)),
+        (0.1, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Weapons/Tenno/Archwing/Primary/PvPVariants/{name.replace(' ', '')}", 'Arch-Gun',
+            weapon=True, nested=False)),
+    ],
+    'Arch-Melee.json': [
+        (1.0, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Weapons/Tenno/Archwing/Melee/{name.replace(' ', '')}", 'Arch-Melee', weapon=True)),
+    ],
+    'Pets.json': [
+        (0.9, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Types/Game/KubrowPet/{name.replace(' ', '')}", 'Pets')),
+        (0.1, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Types/Game/KubrowPet/Resources/{name.replace(' ', '')}", 'Pet Resource',
+            nested=False)),
+    ],
+    'Sentinels.json': [
+        (1.0, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Types/Sentinels/SentinelPowersuits/{name.replace(' ', '')}", 'Sentinel')),
+    ],
+    'SentinelWeapons.json': [
+        (1.0, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Types/Sentinels/SentinelWeapons/{name.replace(' ', '')}", 'Primary', weapon=True)),
+    ],
+    'Mods.json': [
+        (1.0, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Upgrades/Mods/{rng.choice(['Rifle', 'Pistol', 'Melee', 'Warframe'])}/"
+                       f"{name.replace(' ', '')}Mod", 'Mod', nested=False)),
+    ],
+    'Gear.json': [
+        (1.0, lambda rng, name: _corpus_item(
+            rng, name, f"/Lotus/Types/Restoratives/{name.replace(' ', '')}", 'Gear', nested=False)),
+    ],
+}
+
+def generate_wfcd_corpus(output_dir: str, scale: float = 1.0, seed: int = 0,
+                         files: List[str] = None) -> Dict[str, int]:
+    """Write synthetic WFCD-shaped raw files, returning the item count of each
+    
+    Every file gets WFCD_ITEM_COUNTS times scale items (at least one of each
+    kind), so scale=10 or 100 stands in for a catalogue 10x or 100x the real
+    one. The same seed always produces the same files.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    counts = {}
+    for filename in files or list(WFCD_ITEM_COUNTS):
+        if filename not in _CORPUS_KINDS:
+            raise ValueError(f"No corpus generator for '{filename}'")
+        # Seeded per file, so one file's content doesn't depend on which others are generated
+        rng = random.Random(f"{seed}:{filename}")
+        total = WFCD_ITEM_COUNTS[filename] * scale
+        items = []
+        for share, build in _CORPUS_KINDS[filename]:
+            start = len(items)
+            items.extend(build(rng, _corpus_name(rng, start + i)) for i in range(max(1, round(total * share))))
+        rng.shuffle(items)
+        
+        with open(os.path.join(output_dir, filename), 'w', encoding='utf-8') as f:
+            json.dump(items, f, ensure_ascii=False, separators=(',', ':'))
+        counts[filename] = len(items)
+    return counts
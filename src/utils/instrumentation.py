@@ -0,0 +1,258 @@
+"""
+Per-stage timing, throughput and memory instrumentation for pipeline runs
+A run is a list of stages, each recording wall and CPU time, items, bytes
+read and written, and memory. The report is written as JSON and optionally
+as a Prometheus text file (for node_exporter's textfile collector):
+
+    run = RunInstrumentation('process')
+    with run.stage('load') as stage:
+        data = load()
+        stage.add(items=len(data), bytes_read=size)
+    run.write_report('run_report.json')
+    run.write_prometheus('wf_pipeline.prom')
+
+Memory is the process's peak RSS by default, which costs nothing to read.
+trace_memory=True also records each stage's tracemalloc peak, which is
+exact per stage but slows allocation-heavy code down noticeably.
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from utils.helpers import atomic_write
+
+# Peak RSS comes from the resource module on Unix and from psutil, when it is
+# installed, elsewhere; without either, reports leave it out
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+RUN_REPORT_VERSION = 1
+
+# Prometheus metric -> (stage field, help text)
+PROMETHEUS_METRICS = {
+    'wf_stage_wall_seconds': ('wall_seconds', "Wall-clock seconds spent in a pipeline stage"),
+    'wf_stage_cpu_seconds': ('cpu_seconds', "Process CPU seconds spent in a pipeline stage"),
+    'wf_stage_items': ('items', "Items processed by a pipeline stage"),
+    'wf_stage_bytes_read': ('bytes_read', "Bytes read by a pipeline stage"),
+    'wf_stage_bytes_written': ('bytes_written', "Bytes written by a pipeline stage"),
+    'wf_stage_peak_traced_bytes': ('peak_traced_bytes', "Peak tracemalloc memory during a pipeline stage"),
+    'wf_stage_max_rss_bytes': ('max_rss_bytes', "Process peak RSS at the end of a pipeline stage"),
+}
+
+def max_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far, or None where it can't be read"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS and KiB elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
+    if psutil is not None:
+        memory = psutil.Process().memory_info()
+        # Windows reports the peak working set; other platforms only the current RSS
+        return getattr(memory, 'peak_wset', memory.rss)
+    return None
+
+class StageStats:
+    """What one stage of a run did"""
+
+    def __init__(self, name: str, parent: str = None, labels: Dict[str, Any] = None):
+        self.name = name
+        self.parent = parent
+        self.labels = dict(labels or {})
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.items = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.peak_traced_bytes = None
+        self.max_rss_bytes = None
+
+    def add(self, items: int = 0, bytes_read: int = 0, bytes_written: int = 0) -> None:
+        self.items += items
+        self.bytes_read += bytes_read
+        self.bytes_written += bytes_written
+
+    @contextmanager
+    def measure(self) -> Iterator['StageStats']:
+        """Add the wall and CPU time of a block to this stage"""
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield self
+        finally:
+            self.wall_seconds += time.perf_counter() - start_wall
+            self.cpu_seconds += time.process_time() - start_cpu
+
+    def exclude(self, other: 'StageStats') -> None:
+        """Subtract the time of a stage whose work is included in this one's"""
+        self.wall_seconds = max(0.0, self.wall_seconds - other.wall_seconds)
+        self.cpu_seconds = max(0.0, self.cpu_seconds - other.cpu_seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'parent': self.parent,
+            'labels': self.labels,
+            'wall_seconds': round(self.wall_seconds, 6),
+            'cpu_seconds': round(self.cpu_seconds, 6),
+            'items': self.items,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'peak_traced_bytes': self.peak_traced_bytes,
+            'max_rss_bytes': self.max_rss_bytes,
+        }
+
+class RunInstrumentation:
+    """The stages of one fetch or process run, in the order they started"""
+
+    def __init__(self, run: str, trace_memory: bool = False):
+        self.run = run
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.started_at = time.time()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+        self._open = []
+        self._started_tracing = False
+        self._elapsed = None
+
+    @contextmanager
+    def stage(self, name: str, **labels: Any) -> Iterator[StageStats]:
+        """Time a block as one stage; nested stages record their parent"""
+        stats = StageStats(name, self._open[-1].name if self._open else None, labels)
+        self.stages.append(stats)
+
+        tracing = self.trace_memory and self._start_tracing()
+        if tracing:
+            # Each stage measures its own peak, so fold the enclosing stage's
+            # peak so far into it before resetting
+            if self._open:
+                self._fold_peak(self._open[-1])
+            tracemalloc.reset_peak()
+
+        self._open.append(stats)
+        try:
+            with stats.measure():
+                yield stats
+        finally:
+            self._open.pop()
+            if tracing:
+                self._fold_peak(stats)
+                if self._open:
+                    parent = self._open[-1]
+                    parent.peak_traced_bytes = max(parent.peak_traced_bytes or 0, stats.peak_traced_bytes)
+            stats.max_rss_bytes = max_rss_bytes()
+
+    def add_stage(self, name: str, **labels: Any) -> StageStats:
+        """A stage whose time is filled in piecewise, by measure() or timed()"""
+        stats = StageStats(name, self._open[-1].name if self._open else None, labels)
+        self.stages.append(stats)
+        return stats
+
+    def _start_tracing(self) -> bool:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return True
+
+    @staticmethod
+    def _fold_peak(stats: StageStats) -> None:
+        _, peak = tracemalloc.get_traced_memory()
+        stats.peak_traced_bytes = max(stats.peak_traced_bytes or 0, peak)
+
+    def elapsed(self) -> Dict[str, float]:
+        """Wall and CPU seconds of the whole run, frozen once it is closed"""
+        if self._elapsed is not None:
+            return self._elapsed
+        return {'wall_seconds': round(time.perf_counter() - self._start_wall, 6),
+                'cpu_seconds': round(time.process_time() - self._start_cpu, 6)}
+
+    def close(self) -> None:
+        """End the run, stopping tracemalloc if this run started it"""
+        if self._elapsed is None:
+            self._elapsed = self.elapsed()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self) -> 'RunInstrumentation':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get(self, name: str) -> Optional[StageStats]:
+        """The first stage with a name, or None"""
+        return next((stats for stats in self.stages if stats.name == name), None)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'version': RUN_REPORT_VERSION,
+            'run': self.run,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.started_at)),
+            **self.elapsed(),
+            'max_rss_bytes': max_rss_bytes(),
+            'trace_memory': self.trace_memory,
+            'stages': [stats.to_dict() for stats in self.stages],
+        }
+
+    def write_report(self, path: str) -> None:
+        """Write the JSON run report through a temp file"""
+        with atomic_write(path) as f:
+            f.write(json.dumps(self.report(), indent=2) + '\n')
+
+    def prometheus_text(self) -> str:
+        """The stages in the Prometheus text exposition format"""
+        lines = []
+        for metric, (field, help_text) in PROMETHEUS_METRICS.items():
+            samples = [(stats, getattr(stats, field)) for stats in self.stages if getattr(stats, field) is not None]
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for stats, value in samples:
+                lines.append(f"{metric}{{{_prometheus_labels(self.run, stats)}}} {value}")
+        lines.append("# HELP wf_run_started_seconds Unix time the run started")
+        lines.append("# TYPE wf_run_started_seconds gauge")
+        lines.append(f"wf_run_started_seconds{{run=\"{self.run}\"}} {self.started_at:.3f}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the Prometheus text file; textfile collectors expect the atomic rename"""
+        with atomic_write(path) as f:
+            f.write(self.prometheus_text())
+
+def timed(items: Iterable[Any], stats: StageStats) -> Iterator[Any]:
+    """Pass items through, adding the time spent producing each one to stats
+
+    The time includes every generator upstream of this one; exclude() the
+    upstream stage afterwards to get this stage's own share.
+    """
+    iterator = iter(items)
+    while True:
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            stats.wall_seconds += time.perf_counter() - start_wall
+            stats.cpu_seconds += time.process_time() - start_cpu
+        stats.items += 1
+        yield item
+
+def _prometheus_labels(run: str, stats: StageStats) -> str:
+    labels = {'run': run, 'stage': stats.name, **{key: str(value) for key, value in stats.labels.items()}}
+    return ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,151 @@
+"""
+Profiling hooks for pipeline runs
+profile_call runs a function under cProfile (exact call counts, noticeable
+overhead) or under a sampling profiler (a background thread that records
+the calling thread's stack every few milliseconds, cheap enough for long
+runs). Either way a file is written for later inspection and a top-N
+summary of the hot functions is returned:
+
+    result, summary = profile_call(processor.process_warframes, mode='sample',
+                                   out='data/profile.folded')
+
+cProfile output is a pstats file (python -m pstats, snakeviz); sampling
+output is folded stacks, one 'root;...;leaf count' line per distinct
+stack, which flamegraph.pl and speedscope read directly. Only the calling
+thread is profiled; work in pool threads or processes shows up as waiting.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from typing import Any, Callable, Tuple
+
+PROFILE_MODES = ['cprofile', 'sample']
+DEFAULT_PROFILE_FILES = {'cprofile': 'data/profile.pstats', 'sample': 'data/profile.folded'}
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+def _frame_key(code) -> Tuple[str, int, str]:
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+def _describe(key: Tuple[str, int, str]) -> str:
+    filename, line, name = key
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+class SamplingProfiler:
+    """Counts the stacks of one thread, sampled every interval seconds"""
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL, thread_id: int = None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._switch_interval = None
+
+    def start(self) -> None:
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        # The sampler only runs when the profiled thread hands over the GIL,
+        # which it otherwise mostly does at I/O calls; a short switch interval
+        # makes it hand over at ordinary bytecode boundaries too, so samples
+        # aren't biased towards writes
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 10))
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._switch_interval is not None:
+            sys.setswitchinterval(self._switch_interval)
+            self._switch_interval = None
+
+    def __enter__(self) -> 'SamplingProfiler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_key(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                # Stored root first, like folded stacks
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def write_folded(self, path: str) -> None:
+        """Write 'root;...;leaf count' lines for flame graph tools"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(';'.join(_describe(key) for key in stack))
+                f.write(f" {count}\n")
+
+    def summary(self, top: int = 25) -> str:
+        """Hottest functions by share of samples, where they ran (self) and anywhere on the stack (total)"""
+        self_counts = Counter()
+        total_counts = Counter()
+        for stack, count in self.stacks.items():
+            self_counts[stack[-1]] += count
+            # A recursive function counts once per sample
+            for key in set(stack):
+                total_counts[key] += count
+
+        samples = max(self.samples, 1)
+        lines = [f"{self.samples} samples every {self.interval * 1000:g} ms",
+                 f"{'self %':>8} {'total %':>8}  function"]
+        for key, count in self_counts.most_common(top):
+            lines.append(f"{count * 100.0 / samples:8.1f} {total_counts[key] * 100.0 / samples:8.1f}  {_describe(key)}")
+        return '\n'.join(lines)
+
+def cprofile_summary(profile: cProfile.Profile, top: int = 25) -> str:
+    """Top functions by own time, then by cumulative time"""
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stats.strip_dirs().sort_stats('tottime').print_stats(top)
+    stats.sort_stats('cumulative').print_stats(top)
+    return stream.getvalue()
+
+def profile_call(fn: Callable[..., Any], *args: Any, mode: str = 'cprofile', out: str = None, top: int = 25,
+                 interval: float = DEFAULT_SAMPLE_INTERVAL, **kwargs: Any) -> Tuple[Any, str]:
+    """Run fn(*args, **kwargs) under a profiler, returning its result and a hot-function summary
+
+    The profile is written to out (DEFAULT_PROFILE_FILES[mode] if not given),
+    even when fn raises.
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{mode}', expected one of {', '.join(PROFILE_MODES)}")
+    out = out or DEFAULT_PROFILE_FILES[mode]
+    directory = os.path.dirname(out)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if mode == 'cprofile':
+        profile = cProfile.Profile()
+        try:
+            result = profile.runcall(fn, *args, **kwargs)
+        finally:
+            profile.dump_stats(out)
+        return result, cprofile_summary(profile, top)
+
+    sampler = SamplingProfiler(interval)
+    try:
+        with sampler:
+            result = fn(*args, **kwargs)
+    finally:
+        sampler.write_folded(out)
+    return result, sampler.summary(top)
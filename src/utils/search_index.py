@@ -0,0 +1,174 @@
+"""
+Inverted index over the names and descriptions of processed items
+Built after processing, saved next to the processed outputs and loaded by
+the tracker app for token search and search-as-you-type autocomplete.
+"""
+
+import bisect
+import heapq
+import marshal
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+
+from utils.helpers import atomic_write
+
+SEARCH_INDEX_FILE = 'search_index.bin'
+SEARCH_INDEX_MAGIC = b'WFSRCH01'
+
+# A token found in the name counts for more than one in the description
+NAME_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# What the index keeps of one item: ((unique_name, name, category), token -> weight, name tokens)
+Document = Tuple[Tuple[str, str, str], Dict[str, int], List[str]]
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric words of a text"""
+    return _TOKEN_PATTERN.findall((text or '').lower())
+
+def analyze(category: str, item: Dict[str, Any]) -> Document:
+    """The document of one cleaned item"""
+    weights = {}
+    for token in tokenize(item.get('description')):
+        weights[token] = DESCRIPTION_WEIGHT
+    name_tokens = tokenize(item.get('name'))
+    for token in name_tokens:
+        weights[token] = NAME_WEIGHT
+    return (item.get('unique_name', ''), item.get('name', ''), category), weights, name_tokens
+
+class SearchIndex:
+    """Token -> item postings with a sorted vocabulary for prefix lookups"""
+
+    def __init__(self, docs: List[Tuple[str, str, str]], postings: Dict[str, List[Tuple[int, int]]],
+                 name_postings: Dict[str, List[int]], vocabulary: List[str] = None,
+                 name_vocabulary: List[str] = None):
+        # docs[doc_id] = (unique_name, name, category)
+        self.docs = docs
+        # postings[token] = [(doc_id, weight), ...] in doc_id order
+        self.postings = postings
+        self.vocabulary = vocabulary if vocabulary is not None else sorted(postings)
+        # Name tokens only, much smaller, for autocomplete
+        self.name_postings = name_postings
+        self.name_vocabulary = name_vocabulary if name_vocabulary is not None else sorted(name_postings)
+
+    @classmethod
+    def build(cls, records: Iterable[Tuple[str, Dict[str, Any]]]) -> 'SearchIndex':
+        """Index (category, cleaned item) pairs"""
+        return cls.from_documents(analyze(category, item) for category, item in records)
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Document]) -> 'SearchIndex':
+        """Index analyzed documents, e.g. fresh ones mixed with another index's documents()"""
+        docs = []
+        postings = {}
+        name_postings = {}
+        for doc, weights, name_tokens in documents:
+            doc_id = len(docs)
+            docs.append(doc)
+            for token in name_tokens:
+                if not name_postings.get(token) or name_postings[token][-1] != doc_id:
+                    name_postings.setdefault(token, []).append(doc_id)
+            for token, weight in weights.items():
+                postings.setdefault(token, []).append((doc_id, weight))
+        return cls(docs, postings, name_postings)
+
+    def documents(self) -> List[Document]:
+        """Every indexed item as analyze() saw it, in doc_id order
+
+        Rebuilding from these is much cheaper than reading and tokenizing
+        the processed outputs again, so an update only re-reads the
+        categories that changed.
+        """
+        weights = [{} for _ in self.docs]
+        for token, entries in self.postings.items():
+            for doc_id, weight in entries:
+                weights[doc_id][token] = weight
+        name_tokens = [[] for _ in self.docs]
+        for token, doc_ids in self.name_postings.items():
+            for doc_id in doc_ids:
+                name_tokens[doc_id].append(token)
+        return list(zip(self.docs, weights, name_tokens))
+
+    @staticmethod
+    def _prefix_tokens(vocabulary: List[str], prefix: str) -> List[str]:
+        """Tokens of a sorted vocabulary starting with prefix, found by binary search"""
+        start = bisect.bisect_left(vocabulary, prefix)
+        end = bisect.bisect_left(vocabulary, prefix + '\uffff', start)
+        return vocabulary[start:end]
+
+    def _scores(self, tokens: List[str]) -> Dict[int, int]:
+        """Best weight per document among the postings of several tokens"""
+        scores = {}
+        for token in tokens:
+            for doc_id, weight in self.postings.get(token, ()):
+                if weight > scores.get(doc_id, 0):
+                    scores[doc_id] = weight
+        return scores
+
+    def search(self, query: str, limit: int = 20, prefix: bool = False) -> List[Dict[str, Any]]:
+        """Items containing every query token, best matches first
+
+        With prefix=True the last token only has to start a word, which is
+        what search-as-you-type needs ("kuva bra" finds Kuva Bramma).
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        total = None
+        for position, token in enumerate(tokens):
+            if prefix and position == len(tokens) - 1:
+                scores = self._scores(self._prefix_tokens(self.vocabulary, token))
+            else:
+                scores = self._scores([token])
+            if total is None:
+                total = scores
+            else:
+                total = {doc_id: score + scores[doc_id] for doc_id, score in total.items() if doc_id in scores}
+            if not total:
+                return []
+
+        best = sorted(total.items(), key=lambda entry: (-entry[1], self.docs[entry[0]][1]))[:limit]
+        return [{'unique_name': self.docs[doc_id][0], 'name': self.docs[doc_id][1],
+                 'category': self.docs[doc_id][2], 'score': score} for doc_id, score in best]
+
+    def autocomplete(self, text: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Items whose name has every typed word, the last one possibly incomplete
+
+        Only name postings are consulted, which keeps each keystroke cheap.
+        """
+        tokens = tokenize(text)
+        if not tokens:
+            return []
+
+        matches = set()
+        for token in self._prefix_tokens(self.name_vocabulary, tokens[-1]):
+            matches.update(self.name_postings[token])
+        for token in tokens[:-1]:
+            matches.intersection_update(self.name_postings.get(token, ()))
+            if not matches:
+                return []
+
+        best = heapq.nsmallest(limit, matches, key=lambda doc_id: (len(self.docs[doc_id][1]), self.docs[doc_id][1]))
+        return [{'unique_name': self.docs[doc_id][0], 'name': self.docs[doc_id][1],
+                 'category': self.docs[doc_id][2]} for doc_id in best]
+
+    def save(self, path: str) -> None:
+        """Write the index as marshal data behind a magic header, through a temp file"""
+        payload = {'docs': self.docs, 'postings': self.postings, 'vocabulary': self.vocabulary,
+                   'name_postings': self.name_postings, 'name_vocabulary': self.name_vocabulary}
+        with atomic_write(path, 'wb') as f:
+            f.write(SEARCH_INDEX_MAGIC)
+            f.write(marshal.dumps(payload))
+
+    @classmethod
+    def load(cls, path: str) -> 'SearchIndex':
+        with open(path, 'rb') as f:
+            blob = f.read()
+        if not blob.startswith(SEARCH_INDEX_MAGIC):
+            raise ValueError(f"{path} is not a search index file")
+        payload = marshal.loads(blob[len(SEARCH_INDEX_MAGIC):])
+        return cls(payload['docs'], payload['postings'], payload['name_postings'],
+                   payload['vocabulary'], payload['name_vocabulary'])
@@ -0,0 +1,145 @@
+"""
+Fixtures for the behaviour tests: a small generated WFCD corpus, the
+processed outputs built from it and a local server standing in for the
+WFCD raw data host
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from api_client.data_processor import WarframeDataProcessor
+from api_client.wfcd_client import WFCDClient
+from utils.helpers import generate_wfcd_corpus
+
+# A fifth of the real catalogue: a few hundred items, every kind at least once
+CORPUS_SCALE = 0.2
+
+
+@pytest.fixture(scope='session')
+def corpus_dir(tmp_path_factory):
+    """Generated raw files shared by every test; copy them before changing anything"""
+    directory = str(tmp_path_factory.mktemp('raw'))
+    generate_wfcd_corpus(directory, CORPUS_SCALE)
+    return directory
+
+
+@pytest.fixture(scope='session')
+def processed_dir(corpus_dir, tmp_path_factory):
+    """Every processed output of the corpus, built once"""
+    directory = str(tmp_path_factory.mktemp('processed'))
+    WarframeDataProcessor(corpus_dir, directory, verbosity=0).process_warframes()
+    return directory
+
+
+@pytest.fixture
+def raw_dir(corpus_dir, tmp_path):
+    """A private copy of the corpus for tests that modify raw files"""
+    directory = str(tmp_path / 'raw')
+    shutil.copytree(corpus_dir, directory)
+    return directory
+
+
+class WFCDHandler(BaseHTTPRequestHandler):
+    """Serves the files of server.directory with ETag/Last-Modified validators"""
+
+    def do_GET(self):
+        server = self.server
+        filename = self.path.lstrip('/')
+        with server.lock:
+            server.requests.append((filename, dict(self.headers)))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            status = server.failures.get(filename, []).pop(0) if server.failures.get(filename) else None
+        try:
+            time.sleep(server.latency)
+            self._respond(filename, status)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _respond(self, filename, status):
+        path = os.path.join(self.server.directory, filename)
+        if status is None and not os.path.isfile(path):
+            status = 404
+        if status is not None:
+            self.send_response(status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(os.path.getmtime(path), usegmt=True))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WFCDServer(ThreadingHTTPServer):
+    """Local WFCD host; fail(filename, 503, ...) makes its next requests answer those statuses"""
+
+    def __init__(self, directory: str, latency: float = 0.0):
+        super().__init__(('127.0.0.1', 0), WFCDHandler)
+        self.directory = directory
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = []
+        self.failures = {}
+        self.active = 0
+        self.max_active = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def fail(self, filename: str, *statuses: int) -> None:
+        self.failures[filename] = list(statuses)
+
+    def requested(self, filename: str) -> int:
+        return sum(1 for name, _ in self.requests if name == filename)
+
+
+@pytest.fixture
+def wfcd_server(corpus_dir):
+    server = WFCDServer(corpus_dir)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def make_client(wfcd_server, tmp_path):
+    """Makes WFCDClients fetching from the local server into a fresh cache directory"""
+    def make(cache_dir: str = None, **kwargs):
+        kwargs.setdefault('retry_backoff', 0)
+        client = WFCDClient(cache_dir=cache_dir or str(tmp_path / 'cache'), verbosity=0, **kwargs)
+        client.base_url = wfcd_server.base_url
+        return client
+    return make
@@ -0,0 +1,104 @@
+"""
+Vectorized weapon stats: rankings, percentiles, aggregates and
+leaderboards must agree with plain Python over the same rows
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from tracker.analytics import DEFAULT_CRIT_MULTIPLIER, WeaponStats
+from tracker.app import create_app
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+WEAPONS = [
+    ('melee_weapons', {'name': 'Skana', 'unique_name': '/W/Skana', 'type': 'Sword', 'mastery_rank': 0,
+                       'total_damage': 100.0, 'fire_rate': 1.0, 'critical_chance': 0.1, 'status_chance': 0.1}),
+    ('melee_weapons', {'name': 'Nikana', 'unique_name': '/W/Nikana', 'type': 'Nikana', 'mastery_rank': 6,
+                       'total_damage': 200.0, 'fire_rate': 1.0, 'critical_chance': 0.2, 'status_chance': 0.1}),
+    ('melee_weapons', {'name': 'Orthos', 'unique_name': '/W/Orthos', 'type': 'Polearm', 'mastery_rank': 4,
+                       'total_damage': 200.0, 'fire_rate': 1.0, 'critical_chance': 0.0, 'status_chance': 0.2}),
+    ('arch_guns', {'name': 'Imperator', 'unique_name': '/W/Imperator', 'type': 'Arch-Gun', 'mastery_rank': 12,
+                   'total_damage': 50.0, 'fire_rate': 10.0, 'critical_chance': 0.5, 'status_chance': None}),
+]
+
+
+@pytest.fixture(scope='module')
+def stats():
+    return WeaponStats.from_records(WEAPONS)
+
+
+def test_derived_metrics_assume_the_default_crit_multiplier(stats):
+    expected = [item['total_damage'] * (1 + item['critical_chance'] * (DEFAULT_CRIT_MULTIPLIER - 1))
+                for _, item in WEAPONS]
+    assert stats.column('crit_weighted_damage').tolist() == pytest.approx(expected)
+    assert stats.column('burst_dps').tolist() == [100.0, 200.0, 200.0, 500.0]
+    assert stats.derived_metrics(crit_multiplier=3.0)['crit_weighted_damage'][1] == pytest.approx(280.0)
+
+
+def test_rank_shares_the_better_rank_on_ties(stats):
+    assert stats.rank('total_damage').tolist() == [3, 1, 1, 4]
+    assert stats.rank('total_damage', descending=False).tolist() == [2, 3, 3, 1]
+    assert stats.percentile_rank('total_damage').tolist() == [50.0, 100.0, 100.0, 25.0]
+
+
+def test_aggregate_by_category(stats):
+    groups = {group['category']: group for group in stats.aggregate('total_damage', by='category')}
+    assert groups['melee_weapons'] == {'category': 'melee_weapons', 'count': 3, 'mean': pytest.approx(500 / 3),
+                                       'min': 100.0, 'max': 200.0}
+    assert groups['arch_guns']['count'] == 1
+    assert stats.percentiles('fire_rate', q=[50]) == {50: 1.0}
+
+
+def test_top_respects_mastery_rank_and_category(stats):
+    assert [row['name'] for row in stats.top('crit_weighted_dps', limit=2)] == ['Imperator', 'Nikana']
+    assert [row['name'] for row in stats.best_for_mastery_rank(5)] == ['Orthos', 'Skana']
+    assert [row['name'] for row in stats.top('total_damage', category='arch_guns')] == ['Imperator']
+    assert stats.top('total_damage', category='nonsense') == []
+    with pytest.raises(ValueError):
+        stats.top('name')
+    with pytest.raises(ValueError):
+        stats.top('nonsense')
+
+
+def test_empty_stats():
+    stats = WeaponStats.from_records([])
+    assert stats.top('crit_weighted_dps') == []
+    assert stats.aggregate('total_damage') == []
+    assert stats.percentile_rank('total_damage').tolist() == []
+
+
+def test_top_matches_sorting_the_corpus(processed_dir):
+    stats = WeaponStats.load(processed_dir)
+    assert stats.size
+    values = stats.column('crit_weighted_dps')
+    allowed = np.flatnonzero(stats.columns['mastery_rank'] <= 8)
+    expected = sorted(values[allowed].tolist(), reverse=True)[:10]
+    assert [row['crit_weighted_dps'] for row in stats.best_for_mastery_rank(8)] == expected
+
+
+def test_to_frame(stats):
+    pytest.importorskip('pandas')
+    frame = stats.to_frame()
+    assert len(frame) == len(WEAPONS)
+    assert frame['burst_dps'].tolist() == stats.column('burst_dps').tolist()
+
+
+def test_importing_the_tracker_does_not_import_pandas():
+    code = "import sys; import tracker.app; print('pandas' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            env=dict(os.environ, PYTHONPATH=SRC_DIR))
+    assert result.stdout.strip() == 'False'
+
+
+def test_leaderboard_route_reports_the_assumed_crit_multiplier(processed_dir, tmp_path):
+    client = create_app(processed_dir, str(tmp_path / 'tracker.db')).test_client()
+    crit = client.get('/api/leaderboards/crit_weighted_dps?mastery_rank=8&limit=3').get_json()
+    assert crit['assumed_crit_multiplier'] == DEFAULT_CRIT_MULTIPLIER
+    assert len(crit['weapons']) == 3
+    assert 'assumed_crit_multiplier' not in client.get('/api/leaderboards/burst_dps').get_json()
+    assert client.get('/api/leaderboards/nonsense').status_code == 400
@@ -0,0 +1,71 @@
+"""
+Tracker app responses: strong ETags, 304 revalidation, gzip bodies and
+progress validation
+"""
+
+import gzip
+import json
+
+import pytest
+
+from tracker.app import create_app
+
+
+@pytest.fixture
+def client(processed_dir, tmp_path):
+    return create_app(processed_dir, str(tmp_path / 'tracker.db')).test_client()
+
+
+@pytest.mark.parametrize('path', ['/api/categories', '/api/categories/companions'])
+def test_revalidation_answers_304(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    revalidated = client.get(path, headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+    assert revalidated.headers['ETag'] == etag
+
+    assert client.get(path, headers={'If-None-Match': '"something else"'}).status_code == 200
+
+
+def test_gzip_body_has_its_own_etag(client):
+    plain = client.get('/api/categories/melee_weapons')
+    zipped = client.get('/api/categories/melee_weapons', headers={'Accept-Encoding': 'gzip'})
+
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(zipped.data) == plain.data
+    assert zipped.headers['ETag'] != plain.headers['ETag']
+    assert zipped.headers['Vary'] == 'Accept-Encoding'
+
+    # Each representation only revalidates against its own ETag
+    headers = {'Accept-Encoding': 'gzip', 'If-None-Match': plain.headers['ETag']}
+    assert client.get('/api/categories/melee_weapons', headers=headers).status_code == 200
+    headers['If-None-Match'] = zipped.headers['ETag']
+    assert client.get('/api/categories/melee_weapons', headers=headers).status_code == 304
+
+
+def test_item_and_unknown_resources(client):
+    unique_name = json.loads(client.get('/api/categories/companions').data)[0]['unique_name']
+
+    response = client.get('/api/items' + unique_name)
+    assert response.status_code == 200
+    assert json.loads(response.data)['unique_name'] == unique_name
+    assert client.get('/api/categories/nonsense').status_code == 404
+    assert client.get('/api/items/Lotus/Nothing/Here').status_code == 404
+
+
+def test_progress_round_trip(client):
+    unique_name = json.loads(client.get('/api/categories/companions').data)[0]['unique_name']
+
+    response = client.post('/api/users/tenno/progress', json=[{'unique_name': unique_name, 'mastered': True}])
+    assert response.status_code == 200
+    assert response.get_json()['updated'] == 1
+    assert [row['unique_name'] for row in client.get('/api/users/tenno/progress').get_json()['progress']] == \
+        [unique_name]
+
+
+@pytest.mark.parametrize('body', [{'unique_name': '/Lotus/X', 'mastered': 2}, 'not a list', [1, 2]])
+def test_bad_progress_is_400(client, body):
+    assert client.post('/api/users/tenno/progress', json=body).status_code == 400
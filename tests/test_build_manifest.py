@@ -0,0 +1,158 @@
+"""
+Incremental processing: outputs are rebuilt only when one of their raw
+files, their rules or the output format changed
+"""
+
+import json
+import os
+
+from api_client.build_manifest import BuildManifest
+from api_client.columnar import read_columnar
+from api_client.data_processor import (BUILD_MANIFEST_FILE, PROCESSED_OUTPUTS, RUN_REPORT_FILE, WarframeDataProcessor,
+                                       output_sources, select_outputs)
+from utils.search_index import SEARCH_INDEX_FILE, SearchIndex
+
+
+def process(raw_dir, out_dir, **kwargs):
+    processor = WarframeDataProcessor(raw_dir, out_dir, verbosity=0, **kwargs)
+    processor.process_warframes()
+    return processor.build_report
+
+
+def test_second_run_skips_everything(raw_dir, tmp_path):
+    out_dir = str(tmp_path / 'processed')
+    assert len(process(raw_dir, out_dir)['rebuilt']) == len(PROCESSED_OUTPUTS)
+
+    report = process(raw_dir, out_dir)
+    assert report['rebuilt'] == {}
+    assert sorted(report['skipped']) == sorted(output['file'] for output in PROCESSED_OUTPUTS)
+
+
+def test_changed_input_rebuilds_only_its_outputs(raw_dir, tmp_path):
+    out_dir = str(tmp_path / 'processed')
+    process(raw_dir, out_dir)
+
+    path = os.path.join(raw_dir, 'Pets.json')
+    with open(path, encoding='utf-8') as f:
+        pets = json.load(f)
+    pets.append(dict(pets[0], uniqueName=pets[0]['uniqueName'] + 'Copy', name='Copied Kubrow'))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(pets, f)
+
+    report = process(raw_dir, out_dir)
+    expected = [output['file'] for output in PROCESSED_OUTPUTS if 'pets' in output_sources(output)]
+    assert sorted(report['rebuilt']) == sorted(expected)
+    assert all('Pets.json changed' in reason for reason in report['rebuilt'].values())
+
+
+def test_touched_input_with_same_content_is_not_stale(raw_dir, tmp_path):
+    out_dir = str(tmp_path / 'processed')
+    process(raw_dir, out_dir)
+
+    path = os.path.join(raw_dir, 'Pets.json')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert process(raw_dir, out_dir)['rebuilt'] == {}
+
+
+def test_format_change_rebuilds_everything(raw_dir, tmp_path):
+    out_dir = str(tmp_path / 'processed')
+    process(raw_dir, out_dir)
+
+    report = process(raw_dir, out_dir, output_format='jsonl')
+    assert sorted(report['rebuilt']) == sorted(output['file'] for output in PROCESSED_OUTPUTS)
+    assert os.path.exists(os.path.join(out_dir, 'companions.jsonl'))
+    assert process(raw_dir, out_dir, output_format='jsonl')['rebuilt'] == {}
+
+
+def test_missing_output_is_rebuilt(raw_dir, tmp_path):
+    out_dir = str(tmp_path / 'processed')
+    process(raw_dir, out_dir)
+    os.remove(os.path.join(out_dir, 'zaws.json'))
+
+    assert process(raw_dir, out_dir)['rebuilt'] == {'zaws.json': "output missing"}
+
+
+def test_stale_reason(tmp_path):
+    output_path = tmp_path / 'companions.json'
+    output_path.write_text('[]')
+    manifest = BuildManifest(str(tmp_path / 'manifest.json'))
+    assert manifest.stale_reason('companions.json', str(output_path), {'Pets.json': 'a'}, 'r1') == "not built before"
+
+    manifest.record_output('companions.json', {'Pets.json': 'a'}, 'r1', 0)
+    manifest.save()
+    manifest = BuildManifest(str(tmp_path / 'manifest.json'))
+    assert manifest.stale_reason('companions.json', str(output_path), {'Pets.json': 'a'}, 'r1') is None
+    assert manifest.stale_reason('companions.json', str(output_path), {'Pets.json': 'a'}, 'r2') == "rules changed"
+    assert manifest.stale_reason('companions.json', str(output_path), {'Pets.json': 'b'}, 'r1') == "Pets.json changed"
+    assert manifest.dependencies('companions.json') == ['Pets.json']
+
+
+def test_selected_outputs_leave_others_alone(raw_dir, tmp_path):
+    out_dir = str(tmp_path / 'processed')
+    processor = WarframeDataProcessor(raw_dir, out_dir, verbosity=0)
+    processor.process_warframes(outputs=select_outputs(['companions']))
+
+    assert list(processor.build_report['rebuilt']) == ['companions.json']
+    assert not os.path.exists(os.path.join(out_dir, 'zaws.json'))
+
+
+def test_build_metadata_stays_out_of_the_category_files(raw_dir, tmp_path):
+    out_dir = str(tmp_path / 'processed')
+    process(raw_dir, out_dir)
+
+    categories = sorted(name for name in os.listdir(out_dir) if name.endswith('.json'))
+    assert categories == sorted(output['file'] for output in PROCESSED_OUTPUTS)
+    assert os.path.exists(os.path.join(out_dir, BUILD_MANIFEST_FILE))
+    assert os.path.exists(os.path.join(out_dir, RUN_REPORT_FILE))
+
+
+def test_companions_refresh_touches_nothing_else(raw_dir, tmp_path):
+    out_dir = str(tmp_path / 'processed')
+    process(raw_dir, out_dir, columnar_format='npz')
+    others = [output['file'] for output in PROCESSED_OUTPUTS if output['file'] != 'companions.json']
+    mtimes = {name: os.stat(os.path.join(out_dir, name)).st_mtime_ns for name in others}
+
+    path = os.path.join(raw_dir, 'Pets.json')
+    with open(path, encoding='utf-8') as f:
+        pets = json.load(f)
+    pets.append(dict(pets[0], uniqueName=pets[0]['uniqueName'] + 'Copy', name='Copied Kubrow'))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(pets, f)
+
+    processor = WarframeDataProcessor(raw_dir, out_dir, verbosity=0, columnar_format='npz')
+    processor.process_warframes()
+    assert list(processor.build_report['rebuilt']) == ['companions.json']
+    assert {name: os.stat(os.path.join(out_dir, name)).st_mtime_ns for name in others} == mtimes
+
+    # The index and the export read only companions.json again...
+    companions_size = os.path.getsize(os.path.join(out_dir, 'companions.json'))
+    assert processor.instrumentation.get('index').bytes_read == companions_size
+    assert processor.instrumentation.get('export').bytes_read == companions_size
+
+    # ...and still match what a full rebuild produces
+    full_dir = str(tmp_path / 'full')
+    process(raw_dir, full_dir, columnar_format='npz')
+    index = SearchIndex.load(os.path.join(out_dir, SEARCH_INDEX_FILE))
+    full_index = SearchIndex.load(os.path.join(full_dir, SEARCH_INDEX_FILE))
+    assert (index.docs, index.postings, index.name_postings) == \
+        (full_index.docs, full_index.postings, full_index.name_postings)
+    assert [result['name'] for result in index.autocomplete('copied')] == ['Copied Kubrow']
+    columns = read_columnar(os.path.join(out_dir, 'catalogue.npz'))
+    full_columns = read_columnar(os.path.join(full_dir, 'catalogue.npz'))
+    assert {name: values.tolist() for name, values in columns.items()} == \
+        {name: values.tolist() for name, values in full_columns.items()}
+
+
+def test_unreadable_index_is_rebuilt_in_full(raw_dir, tmp_path):
+    out_dir = str(tmp_path / 'processed')
+    process(raw_dir, out_dir)
+    with open(os.path.join(out_dir, SEARCH_INDEX_FILE), 'wb') as f:
+        f.write(b'garbage')
+    os.remove(os.path.join(out_dir, 'zaws.json'))
+
+    processor = WarframeDataProcessor(raw_dir, out_dir, verbosity=0)
+    processor.process_warframes()
+    index = SearchIndex.load(os.path.join(out_dir, SEARCH_INDEX_FILE))
+    assert {category for _, _, category in index.docs} >= {'zaws', 'companions', 'melee_weapons'}
+    assert processor.instrumentation.get('index').bytes_read > os.path.getsize(os.path.join(out_dir, 'zaws.json'))
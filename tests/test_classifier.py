@@ -0,0 +1,100 @@
+"""
+The rule-table classifier must put the same items, in the same order, in
+every output as the hand-written extract_* filters it replaced
+"""
+
+import pytest
+
+from api_client.classifier import classify_items, rules_for_source
+from api_client.data_processor import PROCESSED_OUTPUTS, WarframeDataProcessor, output_name
+
+NECRAMECH_PATH = '/Lotus/Powersuits/EntratiMech/'
+
+
+def is_pvp(item):
+    return 'pvp' in item.get('uniqueName', '').lower()
+
+
+def is_barrel(item):
+    unique_name = item.get('uniqueName', '')
+    return (('/Barrel/' in unique_name or '/Barrels/' in unique_name)
+            and '/OperatorAmplifiers/' not in unique_name and not is_pvp(item))
+
+
+def typed_non_pvp(items):
+    return [item for item in items if item.get('type') and not is_pvp(item)]
+
+
+# What each extract_* method returned before the rule table, given raw_data
+LEGACY_EXTRACTS = {
+    'warframes': lambda raw: [item for item in raw.get('warframes', [])
+                              if NECRAMECH_PATH not in item.get('uniqueName', '') and item.get('type') == 'Warframe'],
+    'necramechs': lambda raw: [item for item in raw.get('warframes', [])
+                               if NECRAMECH_PATH in item.get('uniqueName', '')],
+    'primary_weapons': lambda raw: [],
+    'secondary_weapons': lambda raw: [],
+    'melee_weapons': lambda raw: [item for item in raw.get('melee', [])
+                                  if item.get('type') and item.get('type') != 'Zaw Component'],
+    'zaws': lambda raw: [item for item in raw.get('melee', [])
+                         if item.get('type') == 'Zaw Component' and not is_pvp(item)
+                         and any(part in item.get('uniqueName', '') for part in ['/Tip/', '/Tips/'])],
+    'kitguns': lambda raw: [item for category in ['misc', 'primary', 'secondary']
+                            for item in raw.get(category, []) if is_barrel(item)],
+    'archwings': lambda raw: [],
+    'arch_guns': lambda raw: typed_non_pvp(raw.get('arch-gun', [])),
+    'arch_melees': lambda raw: typed_non_pvp(raw.get('arch-melee', [])),
+    'companions': lambda raw: ([item for item in raw.get('pets', []) if item.get('type') == 'Pets' and not is_pvp(item)]
+                               + typed_non_pvp(raw.get('sentinels', []))),
+    'sentinel_weapons': lambda raw: list(raw.get('sentinelweapons', [])),
+    'incarnon_weapons': lambda raw: [item for item in raw.get('misc', [])
+                                     if item.get('type', '').lower() == 'equipment adapter'
+                                     and 'incarnon' in item.get('name', '').lower()],
+    'amps': lambda raw: [item for item in raw.get('misc', [])
+                         if item.get('type', '').lower() == 'amp' and 'prism' in item.get('name', '').lower()],
+}
+
+
+@pytest.fixture(scope='module')
+def processor(corpus_dir, tmp_path_factory):
+    processor = WarframeDataProcessor(corpus_dir, str(tmp_path_factory.mktemp('out')), verbosity=0)
+    processor.load_raw_data(parallel=False)
+    return processor
+
+
+def test_every_output_has_a_legacy_extract():
+    assert sorted(LEGACY_EXTRACTS) == sorted(output_name(output) for output in PROCESSED_OUTPUTS)
+
+
+@pytest.mark.parametrize('output', PROCESSED_OUTPUTS, ids=output_name)
+def test_stream_output_matches_legacy_extract(processor, output):
+    raw = {category: processor.raw_data[category] for category in processor.raw_data}
+    expected = [item['uniqueName'] for item in LEGACY_EXTRACTS[output_name(output)](raw)]
+    assert [item['uniqueName'] for item in processor.stream_output(output)] == expected
+
+
+def test_corpus_exercises_the_exclusions(processor):
+    # Without these the comparison above would pass trivially
+    melee = processor.raw_data['melee']
+    misc = processor.raw_data['misc']
+    assert any(item.get('type') == 'Zaw Component' for item in melee)
+    assert any(item.get('type') == 'Zaw Component' and not LEGACY_EXTRACTS['zaws']({'melee': [item]})
+               for item in melee)
+    assert any(is_barrel(item) for item in misc)
+    assert any(NECRAMECH_PATH in item.get('uniqueName', '') for item in processor.raw_data['warframes'])
+
+
+def test_necramech_path_matches_anywhere_in_unique_name():
+    # Like the old extract_necramechs, the path may appear after another prefix
+    items = [
+        {'name': 'Voidrig', 'type': 'Warframe', 'uniqueName': '/Lotus/Powersuits/EntratiMech/ThanoTech'},
+        {'name': 'Bonewidow', 'type': 'Warframe',
+         'uniqueName': '/Lotus/Types/Game/Lotus/Powersuits/EntratiMech/BonewidowSuit'},
+        {'name': 'Excalibur', 'type': 'Warframe', 'uniqueName': '/Lotus/Powersuits/Excalibur/Excalibur'},
+    ]
+    buckets = classify_items(items, rules_for_source('warframes'))
+
+    assert [item['name'] for item in buckets['necramechs']] == ['Voidrig', 'Bonewidow']
+    assert [item['name'] for item in buckets['warframes']] == ['Excalibur']
+    raw = {'warframes': items}
+    assert buckets['necramechs'] == LEGACY_EXTRACTS['necramechs'](raw)
+    assert buckets['warframes'] == LEGACY_EXTRACTS['warframes'](raw)
@@ -0,0 +1,65 @@
+"""
+--categories selection: each command touches only the raw files, outputs
+and database categories of the categories it was given
+"""
+
+import os
+
+import pytest
+
+from api_client.data_processor import PROCESSED_OUTPUTS, required_raw_files, select_outputs
+from cli import main, parse_categories
+from database.models import TrackerDatabase
+
+
+def run(*args):
+    return main(list(args) + ['-q'])
+
+
+@pytest.fixture
+def dirs(raw_dir, tmp_path):
+    return ['--raw-dir', raw_dir, '--processed-dir', str(tmp_path / 'processed'), '--db', str(tmp_path / 'tracker.db')]
+
+
+def test_parse_categories():
+    assert parse_categories(['companions,zaws', ' amps ', '']) == ['companions', 'zaws', 'amps']
+    assert parse_categories(None) is None
+    assert parse_categories([',']) is None
+
+
+def test_select_outputs():
+    assert [output['file'] for output in select_outputs(['zaws', 'companions'])] == ['zaws.json', 'companions.json']
+    assert select_outputs(None) == PROCESSED_OUTPUTS
+    assert required_raw_files(select_outputs(['companions'])) == ['Pets.json', 'Sentinels.json']
+    with pytest.raises(ValueError, match='nonsense'):
+        select_outputs(['companions', 'nonsense'])
+
+
+def test_unknown_category_is_a_usage_error(dirs, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        run('process', '--categories', 'nonsense', *dirs)
+    assert exit_info.value.code == 2
+    assert 'nonsense' in capsys.readouterr().err
+
+
+def test_process_builds_only_the_selected_outputs(dirs, tmp_path):
+    assert run('process', '-c', 'companions,zaws', *dirs) == 0
+    written = os.listdir(tmp_path / 'processed')
+    built = [output['file'] for output in PROCESSED_OUTPUTS if output['file'] in written]
+    assert built == ['zaws.json', 'companions.json']
+
+
+def test_process_needs_only_the_selected_raw_files(dirs, raw_dir):
+    os.remove(os.path.join(raw_dir, 'Misc.json'))
+    assert run('process', '-c', 'companions', *dirs) == 0
+    assert run('process', '-c', 'amps', *dirs) == 1
+
+
+def test_refresh_offline_loads_only_the_selected_categories(dirs, tmp_path):
+    assert run('refresh', '--offline', '-c', 'companions', *dirs) == 0
+    with TrackerDatabase(str(tmp_path / 'tracker.db'), verbosity=0) as db:
+        assert [category['name'] for category in db.categories()] == ['companions']
+
+    assert run('refresh', '--offline', '-c', 'zaws', *dirs) == 0
+    with TrackerDatabase(str(tmp_path / 'tracker.db'), verbosity=0) as db:
+        assert [category['name'] for category in db.categories()] == ['companions', 'zaws']
@@ -0,0 +1,80 @@
+"""
+Columnar export: every processed item comes back from the file, column by
+column, with missing fields as the zero value of their type
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from api_client.columnar import COLUMNAR_SCHEMA, parquet_available, read_columnar, resolve_format, write_columnar
+from api_client.data_processor import PROCESSED_OUTPUTS, WarframeDataProcessor, output_name
+from utils.helpers import read_json_stream
+
+RECORDS = [
+    ('warframes', {'name': 'Excalibur', 'unique_name': '/Lotus/Powersuits/Excalibur', 'type': 'Warframe',
+                   'description': 'A balanced fighter.', 'mastery_rank': 0, 'tradable': False, 'vaulted': None}),
+    ('melee_weapons', {'name': 'Dual Kamas Prime', 'unique_name': '/Lotus/Weapons/DualKamasPrime',
+                       'type': 'Melee', 'description': None, 'mastery_rank': 10, 'tradable': True, 'vaulted': True,
+                       'total_damage': 187.5, 'critical_chance': 0.3}),
+    ('melee_weapons', {'name': 'Ōkina', 'unique_name': '/Lotus/Weapons/Okina', 'type': 'Melee',
+                       'description': 'Tenno blades — «quick».', 'mastery_rank': 8}),
+]
+
+
+def assert_round_trip(path):
+    columns = read_columnar(path)
+    assert sorted(columns) == sorted(COLUMNAR_SCHEMA)
+    assert columns['category'].tolist() == ['warframes', 'melee_weapons', 'melee_weapons']
+    assert columns['name'].tolist() == ['Excalibur', 'Dual Kamas Prime', 'Ōkina']
+    assert columns['description'].tolist() == ['A balanced fighter.', '', 'Tenno blades — «quick».']
+    assert columns['mastery_rank'].tolist() == [0, 10, 8]
+    assert columns['vaulted'].tolist() == [False, True, False]
+    assert columns['total_damage'].tolist() == [0.0, 187.5, 0.0]
+    assert columns['critical_chance'].dtype == np.float64
+
+
+def test_npz_round_trip(tmp_path):
+    path = write_columnar(str(tmp_path / 'catalogue'), RECORDS, 'npz')
+    assert path.endswith('catalogue.npz')
+    assert_round_trip(path)
+
+
+def test_npz_reads_only_the_requested_columns(tmp_path):
+    path = write_columnar(str(tmp_path / 'catalogue'), RECORDS, 'npz')
+    assert sorted(read_columnar(path, ['name', 'mastery_rank'])) == ['mastery_rank', 'name']
+    with pytest.raises(ValueError, match='nonsense'):
+        read_columnar(path, ['name', 'nonsense'])
+
+
+def test_empty_export(tmp_path):
+    columns = read_columnar(write_columnar(str(tmp_path / 'catalogue'), [], 'npz'))
+    assert all(len(values) == 0 for values in columns.values())
+
+
+@pytest.mark.skipif(not parquet_available(), reason="needs pandas with a Parquet engine")
+def test_parquet_round_trip(tmp_path):
+    path = write_columnar(str(tmp_path / 'catalogue'), RECORDS, 'parquet')
+    assert path.endswith('catalogue.parquet')
+    assert_round_trip(path)
+
+
+def test_resolve_format():
+    assert resolve_format('npz') == 'npz'
+    assert resolve_format('auto') == ('parquet' if parquet_available() else 'npz')
+    with pytest.raises(ValueError):
+        resolve_format('csv')
+    if not parquet_available():
+        with pytest.raises(ImportError, match='pyarrow'):
+            resolve_format('parquet')
+
+
+def test_processor_exports_every_processed_item(corpus_dir, tmp_path):
+    out_dir = str(tmp_path / 'processed')
+    WarframeDataProcessor(corpus_dir, out_dir, verbosity=0, columnar_format='npz').process_warframes()
+
+    expected = [(output_name(output), item['unique_name']) for output in PROCESSED_OUTPUTS
+                for item in read_json_stream(os.path.join(out_dir, output['file']))]
+    columns = read_columnar(os.path.join(out_dir, 'catalogue.npz'), ['category', 'unique_name'])
+    assert list(zip(columns['category'].tolist(), columns['unique_name'].tolist())) == expected
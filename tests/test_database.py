@@ -0,0 +1,77 @@
+"""
+Loading processed outputs into the tracker database, progress upserts and
+completion counts
+"""
+
+import pytest
+
+from api_client.data_processor import select_outputs
+from database.models import TrackerDatabase
+
+
+@pytest.fixture
+def db(processed_dir, tmp_path):
+    with TrackerDatabase(str(tmp_path / 'tracker.db'), verbosity=0) as db:
+        db.load_processed(processed_dir)
+        yield db
+
+
+def unique_names(db, category):
+    return [item['unique_name'] for item in db.find_items(category=category)]
+
+
+def completion(db, user_id, category):
+    return next(row for row in db.completion_by_category(user_id) if row['category'] == category)
+
+
+def test_reload_replaces_items(db, processed_dir):
+    before = {category['name']: category['items'] for category in db.categories()}
+    counts = db.load_processed(processed_dir, select_outputs(['companions']))
+
+    assert counts == {'companions': before['companions']}
+    assert {category['name']: category['items'] for category in db.categories()} == before
+
+
+def test_upsert_keeps_fields_left_out(db):
+    name = unique_names(db, 'companions')[0]
+    assert db.upsert_progress('tenno', [{'unique_name': name, 'mastered': True, 'formas': 2}]) == 1
+    db.upsert_progress('tenno', [{'unique_name': name, 'owned': 1}])
+
+    [row] = db.get_progress('tenno')
+    assert (row['mastered'], row['owned'], row['formas']) == (1, 1, 2)
+    assert db.get_progress('tenno', 'companions') == [row]
+    assert db.get_progress('tenno', 'zaws') == []
+
+
+def test_completion_by_category(db):
+    names = unique_names(db, 'melee_weapons')
+    db.upsert_progress('tenno', [{'unique_name': name, 'mastered': True, 'owned': True} for name in names[:3]]
+                       + [{'unique_name': names[3], 'owned': True}])
+    # Setting a flag again must not count the item twice
+    db.upsert_progress('tenno', [{'unique_name': names[0], 'mastered': True}])
+
+    row = completion(db, 'tenno', 'melee_weapons')
+    assert (row['total'], row['mastered'], row['owned']) == (len(names), 3, 4)
+    assert row['percent'] == round(100.0 * 3 / len(names), 2)
+    assert completion(db, 'someone else', 'melee_weapons')['mastered'] == 0
+
+
+@pytest.mark.parametrize('change', [
+    {'mastered': 2},
+    {'owned': 'yes'},
+    {'formas': -1},
+    {'formas': True},
+    {'formas': 1.5},
+])
+def test_upsert_rejects_bad_values(db, change):
+    name = unique_names(db, 'companions')[0]
+    with pytest.raises(ValueError):
+        db.upsert_progress('tenno', [dict(change, unique_name=name)])
+    assert db.get_progress('tenno') == []
+
+
+def test_upsert_is_all_or_nothing(db):
+    names = unique_names(db, 'companions')
+    with pytest.raises(ValueError):
+        db.upsert_progress('tenno', [{'unique_name': names[0], 'mastered': True}, {'mastered': True}])
+    assert db.get_progress('tenno') == []
@@ -0,0 +1,140 @@
+"""
+Shared helpers: atomic writes, the streaming JSON writer and the synthetic
+WFCD corpus generator
+"""
+
+import json
+import os
+import threading
+
+import pytest
+
+from api_client.classifier import CLASSIFICATION_RULES, classify_items, rules_for_source
+from api_client.data_processor import RAW_DATA_FILES
+from utils.helpers import WFCD_ITEM_COUNTS, atomic_write, generate_wfcd_corpus, read_json_stream, write_json_stream
+
+ITEMS = [{'name': 'Kuva Bramma', 'mastery_rank': 13, 'critical_chance': 0.35},
+         {'name': 'Ñikana Prime', 'mastery_rank': 0, 'critical_chance': None}]
+
+
+@pytest.mark.parametrize('fmt', ['json', 'jsonl'])
+def test_stream_round_trip(tmp_path, fmt):
+    path = str(tmp_path / f'melee.{fmt}')
+    assert write_json_stream(path, (item for item in ITEMS), fmt) == len(ITEMS)
+    assert list(read_json_stream(path)) == ITEMS
+
+
+def test_json_output_is_a_plain_array(tmp_path):
+    path = str(tmp_path / 'melee.json')
+    write_json_stream(path, iter(ITEMS))
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == ITEMS
+
+    write_json_stream(path, iter([]))
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == []
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        write_json_stream(str(tmp_path / 'melee.xml'), ITEMS, 'xml')
+
+
+def test_failed_stream_leaves_the_old_file(tmp_path):
+    path = str(tmp_path / 'melee.json')
+    write_json_stream(path, ITEMS)
+
+    def failing():
+        yield ITEMS[0]
+        raise RuntimeError("clean failed")
+
+    with pytest.raises(RuntimeError):
+        write_json_stream(path, failing())
+    assert list(read_json_stream(path)) == ITEMS
+    assert os.listdir(str(tmp_path)) == ['melee.json']
+
+
+def test_concurrent_writers_each_publish_a_complete_file(tmp_path):
+    path = str(tmp_path / 'melee.json')
+    barrier = threading.Barrier(4)
+    errors = []
+
+    def write(index):
+        try:
+            with atomic_write(path) as f:
+                f.write('[')
+                barrier.wait()
+                f.write(json.dumps({'writer': index}) + ']')
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)[0]['writer'] in range(4)
+    assert os.listdir(str(tmp_path)) == ['melee.json']
+
+
+def test_atomic_write_creates_readable_files(tmp_path):
+    path = str(tmp_path / 'nested' / 'report.json')
+    with atomic_write(path) as f:
+        f.write('{}')
+    umask = os.umask(0)
+    os.umask(umask)
+    assert os.stat(path).st_mode & 0o777 == 0o666 & ~umask
+
+
+def corpus_bytes(directory):
+    contents = {}
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), 'rb') as f:
+            contents[name] = f.read()
+    return contents
+
+
+def test_corpus_is_deterministic_per_seed(tmp_path):
+    first = generate_wfcd_corpus(str(tmp_path / 'a'), 0.2, seed=7)
+    assert generate_wfcd_corpus(str(tmp_path / 'b'), 0.2, seed=7) == first
+    generate_wfcd_corpus(str(tmp_path / 'c'), 0.2, seed=8)
+    assert corpus_bytes(str(tmp_path / 'a')) == corpus_bytes(str(tmp_path / 'b'))
+    assert corpus_bytes(str(tmp_path / 'a')) != corpus_bytes(str(tmp_path / 'c'))
+
+    # A file's content doesn't depend on which other files are generated
+    generate_wfcd_corpus(str(tmp_path / 'd'), 0.2, seed=7, files=['Melee.json'])
+    assert corpus_bytes(str(tmp_path / 'd'))['Melee.json'] == corpus_bytes(str(tmp_path / 'a'))['Melee.json']
+
+
+def test_corpus_counts_scale(tmp_path):
+    small = generate_wfcd_corpus(str(tmp_path / 'small'), 1)
+    large = generate_wfcd_corpus(str(tmp_path / 'large'), 3, files=['Warframes.json', 'Mods.json'])
+    assert sorted(small) == sorted(WFCD_ITEM_COUNTS)
+    for filename, count in small.items():
+        assert abs(count - WFCD_ITEM_COUNTS[filename]) <= 5, filename
+    assert large == {filename: pytest.approx(3 * small[filename], abs=5) for filename in large}
+    with pytest.raises(ValueError, match='Nonsense'):
+        generate_wfcd_corpus(str(tmp_path / 'bad'), 1, files=['Nonsense.json'])
+
+
+def test_corpus_names_are_unique(corpus_dir):
+    for filename in os.listdir(corpus_dir):
+        items = list(read_json_stream(os.path.join(corpus_dir, filename)))
+        assert len({item['name'] for item in items}) == len(items), filename
+        assert len({item['uniqueName'] for item in items}) == len(items), filename
+
+
+def test_tiny_corpus_still_fills_every_bucket(tmp_path):
+    # Every kind gets at least one item, so each classification rule has matches at any scale
+    directory = str(tmp_path / 'raw')
+    generate_wfcd_corpus(directory, 0.001)
+    buckets = set()
+    for category, filename in RAW_DATA_FILES.items():
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            classified = classify_items(list(read_json_stream(path)), rules_for_source(category))
+            buckets.update(bucket for bucket, items in classified.items() if items)
+    assert buckets == {rule['bucket'] for rule in CLASSIFICATION_RULES}
@@ -0,0 +1,90 @@
+"""
+Run reports and Prometheus metrics: every stage of a process run with the
+items and bytes it handled, and per-item stage timing only when profiling
+"""
+
+import json
+import os
+import time
+
+from api_client.data_processor import PROCESSED_OUTPUTS, RUN_REPORT_FILE, WarframeDataProcessor
+from utils.instrumentation import RunInstrumentation, StageStats, timed
+
+
+def process(raw_dir, tmp_path, **kwargs):
+    processor = WarframeDataProcessor(raw_dir, str(tmp_path / 'processed'), verbosity=0, **kwargs)
+    processor.process_warframes()
+    with open(processor.report_file, encoding='utf-8') as f:
+        return processor, json.load(f)
+
+
+def stages(report):
+    return {stage['name']: stage for stage in report['stages']}
+
+
+def test_run_report_records_every_stage(corpus_dir, tmp_path):
+    processor, report = process(corpus_dir, tmp_path)
+    assert processor.report_file == str(tmp_path / 'processed' / RUN_REPORT_FILE)
+    assert report['run'] == 'process'
+    assert report['trace_memory'] is False
+
+    by_name = stages(report)
+    assert list(by_name) == ['plan', 'load', 'build', 'write', 'index']
+    assert by_name['plan']['items'] == len(PROCESSED_OUTPUTS)
+    assert by_name['load']['bytes_read'] > 0
+    assert by_name['write']['parent'] == 'build'
+    written = sum(os.path.getsize(os.path.join(processor.processed_data_dir, output['file']))
+                  for output in PROCESSED_OUTPUTS)
+    assert by_name['write']['bytes_written'] == by_name['build']['bytes_written'] == written
+    assert by_name['write']['items'] == by_name['build']['items'] > 0
+    assert by_name['build']['wall_seconds'] >= by_name['write']['wall_seconds']
+    assert all(stage['peak_traced_bytes'] is None for stage in report['stages'])
+
+
+def test_profile_stages_splits_the_build(corpus_dir, tmp_path):
+    _, report = process(corpus_dir, tmp_path, profile_stages=True, trace_memory=True)
+    by_name = stages(report)
+    assert [name for name, stage in by_name.items() if stage['parent'] == 'build'] == ['classify', 'clean', 'write']
+    assert by_name['classify']['items'] == by_name['clean']['items'] == by_name['write']['items']
+    # Each share excludes the stages upstream of it, so together they fit in the build
+    shares = sum(by_name[name]['wall_seconds'] for name in ('classify', 'clean', 'write'))
+    assert shares <= by_name['build']['wall_seconds'] + 1e-3
+    assert by_name['build']['peak_traced_bytes'] > 0
+
+
+def test_timed_counts_items_and_time():
+    stats = StageStats('slow')
+
+    def slow():
+        for i in range(3):
+            time.sleep(0.01)
+            yield i
+
+    assert list(timed(slow(), stats)) == [0, 1, 2]
+    assert stats.items == 3
+    assert stats.wall_seconds >= 0.03
+
+    stats.exclude(StageStats('upstream'))
+    assert stats.wall_seconds >= 0.03
+    other = StageStats('more')
+    other.wall_seconds = 10.0
+    stats.exclude(other)
+    assert stats.wall_seconds == 0.0
+
+
+def test_prometheus_text(tmp_path):
+    run = RunInstrumentation('fetch')
+    with run.stage('download', file='Mods "new".json') as stage:
+        stage.add(items=2, bytes_read=1024)
+    run.close()
+    path = str(tmp_path / 'wf.prom')
+    run.write_prometheus(path)
+
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert '# TYPE wf_stage_items gauge' in lines
+    assert 'wf_stage_items{run="fetch",stage="download",file="Mods \\"new\\".json"} 2' in lines
+    assert 'wf_stage_bytes_read{run="fetch",stage="download",file="Mods \\"new\\".json"} 1024' in lines
+    # Metrics no stage recorded are left out
+    assert not any(line.startswith('wf_stage_peak_traced_bytes') for line in lines)
+    assert lines[-1].startswith('wf_run_started_seconds{run="fetch"} ')
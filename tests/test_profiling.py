@@ -0,0 +1,101 @@
+"""
+profile_call under cProfile and the sampling profiler, and the --profile
+options of run_data_processor.py and wftracker process
+"""
+
+import json
+import os
+import pstats
+import shutil
+import subprocess
+import sys
+import time
+
+import pytest
+
+from api_client.data_processor import RUN_REPORT_FILE
+from cli import main
+from utils.profiling import SamplingProfiler, profile_call
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def busy_loop(seconds):
+    total = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+def test_cprofile_mode(tmp_path):
+    out = str(tmp_path / 'profiles' / 'run.pstats')
+    result, summary = profile_call(busy_loop, 0.05, mode='cprofile', out=out, top=5)
+
+    assert result > 0
+    assert 'busy_loop' in summary
+    stats = pstats.Stats(out)
+    assert any(name == 'busy_loop' for _, _, name in stats.stats)
+
+
+def test_sample_mode(tmp_path):
+    out = str(tmp_path / 'run.folded')
+    switch_interval = sys.getswitchinterval()
+    result, summary = profile_call(busy_loop, 0.3, mode='sample', out=out, interval=0.002)
+
+    assert result > 0
+    assert sys.getswitchinterval() == switch_interval
+    with open(out, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    stacks = [line.rsplit(' ', 1) for line in lines]
+    assert all(int(count) > 0 for _, count in stacks)
+    # Most samples land in the loop (or in sum(), which it calls)
+    in_loop = sum(int(count) for stack, count in stacks if 'busy_loop' in stack)
+    assert in_loop > sum(int(count) for _, count in stacks) / 2
+    assert summary.splitlines()[0].endswith('samples every 2 ms')
+    assert 'busy_loop' in summary
+
+
+def test_profile_is_written_when_the_call_fails(tmp_path):
+    def failing():
+        raise RuntimeError("processing failed")
+
+    for mode in ('cprofile', 'sample'):
+        out = str(tmp_path / f'failed.{mode}')
+        with pytest.raises(RuntimeError):
+            profile_call(failing, mode=mode, out=out)
+        assert os.path.exists(out)
+    with pytest.raises(ValueError, match='nonsense'):
+        profile_call(failing, mode='nonsense')
+
+
+def test_sampler_only_samples_its_thread():
+    with SamplingProfiler(0.002) as sampler:
+        busy_loop(0.1)
+    assert sampler.samples > 0
+    assert sum(sampler.stacks.values()) == sampler.samples
+    assert not any(name == '_run' for stack in sampler.stacks for _, _, name in stack)
+
+
+def test_run_data_processor_profile(corpus_dir, tmp_path):
+    shutil.copytree(corpus_dir, str(tmp_path / 'data' / 'raw'))
+    script = os.path.join(ROOT_DIR, 'run_data_processor.py')
+    result = subprocess.run([sys.executable, script, '-q', '--profile', 'sample', '--profile-out', 'run.folded'],
+                            cwd=str(tmp_path), capture_output=True, text=True, check=True)
+
+    assert 'Profile (sample):' in result.stdout
+    assert 'Error' not in result.stdout
+    assert os.path.getsize(tmp_path / 'run.folded') > 0
+    assert os.path.exists(tmp_path / 'data' / 'processed' / 'melee_weapons.json')
+    with open(tmp_path / 'data' / 'processed' / RUN_REPORT_FILE, encoding='utf-8') as f:
+        names = [stage['name'] for stage in json.load(f)['stages']]
+    # Profiled runs also split the build into classify, clean and write
+    assert {'classify', 'clean', 'write'} <= set(names)
+
+
+def test_wftracker_process_profile(raw_dir, tmp_path, capsys):
+    out = str(tmp_path / 'process.pstats')
+    assert main(['process', '-c', 'companions', '--raw-dir', raw_dir, '--processed-dir', str(tmp_path / 'processed'),
+                 '-q', '--profile', '--profile-out', out, '--profile-top', '3']) == 0
+    assert 'Profile (cprofile):' in capsys.readouterr().out
+    assert pstats.Stats(out).total_calls > 0
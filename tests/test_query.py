@@ -0,0 +1,109 @@
+"""
+Keyset pagination over a processed category: following next_cursor visits
+every matching item exactly once, in sort order
+"""
+
+import os
+
+import pytest
+
+from tracker.app import create_app
+from tracker.query import CategoryIndex, parse_query_args
+from utils.helpers import read_json_stream
+
+FILTERS = [
+    {},
+    {'mastery_rank': {'max': 8}},
+    {'mastery_rank': {'min': 4}, 'vaulted': {'eq': False}},
+    {'critical_chance': {'min': 0.1, 'max': 0.3}},
+]
+
+
+@pytest.fixture(scope='module')
+def items(processed_dir):
+    return list(read_json_stream(os.path.join(processed_dir, 'melee_weapons.json')))
+
+
+def expected_order(items, filters, sort, descending):
+    """Brute force: filter everything, then sort by value with ties in file order"""
+    index = CategoryIndex(items)
+    matching = [(position, item) for position, item in enumerate(items) if index._matches(item, filters)]
+    matching.sort(key=lambda entry: ((entry[1].get(sort) is not None, entry[1].get(sort) or 0), entry[0]),
+                  reverse=descending)
+    return [item['unique_name'] for _, item in matching]
+
+
+def all_pages(index, filters, sort, descending, limit):
+    names, cursor, pages = [], None, 0
+    while True:
+        page = index.query(filters, sort=sort, descending=descending, limit=limit, cursor=cursor)
+        names.extend(item['unique_name'] for item in page['items'])
+        pages += 1
+        cursor = page['next_cursor']
+        if cursor is None:
+            return names, pages
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+@pytest.mark.parametrize('sort', ['name', 'mastery_rank', 'critical_chance'])
+@pytest.mark.parametrize('descending', [False, True], ids=['ascending', 'descending'])
+def test_paging_visits_every_item_once(items, filters, sort, descending):
+    expected = expected_order(items, filters, sort, descending)
+    assert expected, "the filter should match part of the corpus"
+
+    names, pages = all_pages(CategoryIndex(items), filters, sort, descending, limit=7)
+    assert names == expected
+    assert pages == max(1, -(-len(expected) // 7))
+
+
+def test_cursor_from_another_order_is_rejected(items):
+    index = CategoryIndex(items)
+    cursor = index.query(sort='mastery_rank', limit=3)['next_cursor']
+
+    with pytest.raises(ValueError):
+        index.query(sort='mastery_rank', descending=True, cursor=cursor)
+    with pytest.raises(ValueError):
+        index.query(sort='name', cursor=cursor)
+    with pytest.raises(ValueError):
+        index.query(sort='mastery_rank', cursor='not-a-cursor')
+
+
+def test_parse_query_args():
+    assert parse_query_args({'mastery_rank_max': '8', 'vaulted': 'false', 'sort': '-critical_chance',
+                             'limit': '5'}) == {
+        'filters': {'mastery_rank': {'max': 8}, 'vaulted': {'eq': False}},
+        'sort': 'critical_chance', 'descending': True, 'limit': 5, 'cursor': None,
+    }
+    with pytest.raises(ValueError):
+        parse_query_args({'mastery_rank': 'eight'})
+    with pytest.raises(ValueError):
+        parse_query_args({'vaulted': 'maybe'})
+
+
+def test_items_route_pages_and_rejects_bad_cursors(processed_dir, tmp_path, items):
+    client = create_app(processed_dir, str(tmp_path / 'tracker.db')).test_client()
+    names, cursor = [], None
+    while True:
+        url = '/api/categories/melee_weapons/items?sort=-mastery_rank&mastery_rank_max=8&limit=5'
+        page = client.get(url + (f'&cursor={cursor}' if cursor else '')).get_json()
+        names.extend(item['unique_name'] for item in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert names == expected_order(items, {'mastery_rank': {'max': 8}}, 'mastery_rank', True)
+
+    first = client.get('/api/categories/melee_weapons/items?sort=name&limit=5').get_json()
+    mismatched = client.get(f"/api/categories/melee_weapons/items?sort=-name&cursor={first['next_cursor']}")
+    assert mismatched.status_code == 400
+    assert client.get('/api/categories/nonsense/items').status_code == 404
+
+
+def test_sorting_by_a_field_the_category_lacks_is_rejected(processed_dir, tmp_path):
+    companions = list(read_json_stream(os.path.join(processed_dir, 'companions.json')))
+    with pytest.raises(ValueError, match='critical_chance'):
+        CategoryIndex(companions).query(sort='critical_chance')
+    assert CategoryIndex([]).query(sort='critical_chance') == {'items': [], 'next_cursor': None}
+
+    client = create_app(processed_dir, str(tmp_path / 'tracker.db')).test_client()
+    assert client.get('/api/categories/companions/items?sort=critical_chance').status_code == 400
+    assert client.get('/api/categories/primary_weapons/items').status_code == 200
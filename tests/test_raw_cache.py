@@ -0,0 +1,73 @@
+"""
+Raw cache serializers: every format reads back the same document, and a
+file that can't be decoded here is downloaded again instead of failing
+"""
+
+import json
+import marshal
+import os
+
+import pytest
+
+from api_client.raw_cache import (MARSHAL_HEADER, MARSHAL_MAGIC, SERIALIZERS, UnreadableCacheError, get_serializer,
+                                  load_cache_file, write_cache_file)
+
+DOCUMENT = [{'name': 'Kuva Bramma', 'uniqueName': '/Lotus/Weapons/KuvaBramma', 'masteryReq': 13,
+             'criticalChance': 0.35, 'tradable': False, 'drops': [{'location': 'Lich', 'chance': None}]}]
+
+
+@pytest.mark.parametrize('name', list(SERIALIZERS))
+def test_every_format_reads_back(tmp_path, name):
+    path = str(tmp_path / 'Melee.json')
+    size = write_cache_file(path, DOCUMENT, serializer=get_serializer(name))
+
+    assert size == os.path.getsize(path)
+    assert load_cache_file(path) == DOCUMENT
+
+
+def test_json_keeps_downloaded_bytes(tmp_path):
+    path = str(tmp_path / 'Melee.json')
+    raw = json.dumps(DOCUMENT, indent=2).encode('utf-8')
+    write_cache_file(path, DOCUMENT, raw)
+    with open(path, 'rb') as f:
+        assert f.read() == raw
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError, match='marshal'):
+        get_serializer('pickle')
+
+
+@pytest.mark.parametrize('blob', [
+    MARSHAL_MAGIC + bytes([0, 2, 7]) + marshal.dumps(DOCUMENT),
+    MARSHAL_MAGIC + marshal.dumps(DOCUMENT),
+    MARSHAL_HEADER + b'\xff',
+    b'\x1f\x8b truncated gzip',
+    b'{"not": json',
+], ids=['other-python', 'unversioned', 'corrupt-marshal', 'corrupt-gzip', 'corrupt-json'])
+def test_undecodable_files(tmp_path, blob):
+    path = tmp_path / 'Melee.json'
+    path.write_bytes(blob)
+    with pytest.raises(UnreadableCacheError):
+        load_cache_file(str(path))
+
+
+@pytest.mark.parametrize('revalidate', [False, True], ids=['cached', 'revalidated'])
+@pytest.mark.parametrize('use_async', [False, True], ids=['sequential', 'async'])
+def test_client_downloads_unreadable_cache_again(make_client, wfcd_server, corpus_dir, revalidate, use_async):
+    make_client(cache_format='marshal').fetch_files(['Pets.json'])
+    path = os.path.join(make_client().cache_dir, 'Pets.json')
+    with open(path, 'rb') as f:
+        blob = f.read()
+    # As if the file had been written by another Python version
+    with open(path, 'wb') as f:
+        f.write(MARSHAL_MAGIC + bytes([0, 2, 7]) + blob[len(MARSHAL_HEADER):])
+
+    client = make_client(cache_format='marshal')
+    documents = client.fetch_files(['Pets.json'], use_async=use_async, revalidate=revalidate)
+    with open(os.path.join(corpus_dir, 'Pets.json'), encoding='utf-8') as f:
+        assert documents == {'Pets.json': json.load(f)}
+    assert client.fetch_stats['downloaded'] == 1
+    # The download was unconditional, and the file is readable again
+    assert 'If-None-Match' not in wfcd_server.requests[-1][1]
+    assert load_cache_file(path) == documents['Pets.json']
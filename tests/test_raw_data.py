@@ -0,0 +1,93 @@
+"""
+Loading raw WFCD files: parallel preloading with its thread fallback, and
+lazy per-category loading
+"""
+
+import json
+import os
+
+import pytest
+
+from api_client import data_processor
+from api_client.data_processor import RAW_DATA_FILES, LazyRawData
+
+
+def corpus(corpus_dir):
+    """Every raw category of the corpus; files it has no generator for load as []"""
+    documents = {}
+    for key, filename in RAW_DATA_FILES.items():
+        path = os.path.join(corpus_dir, filename)
+        if not os.path.exists(path):
+            documents[key] = []
+            continue
+        with open(path, encoding='utf-8') as f:
+            documents[key] = json.load(f)
+    return documents
+
+
+@pytest.mark.parametrize('parallel, process_pool_min_bytes', [(False, 0), (True, 0), (True, 1 << 40)],
+                         ids=['sequential', 'processes', 'threads'])
+def test_preload_reads_every_file(corpus_dir, parallel, process_pool_min_bytes):
+    raw_data = LazyRawData(corpus_dir, process_pool_min_bytes=process_pool_min_bytes, verbosity=0)
+    raw_data.preload(parallel=parallel)
+
+    documents = corpus(corpus_dir)
+    assert {key: raw_data[key] for key in RAW_DATA_FILES} == documents
+    assert set(raw_data.load_timings) == {key for key, items in documents.items() if items}
+
+
+def test_preload_falls_back_to_threads(corpus_dir, monkeypatch):
+    class UnavailablePool:
+        def __init__(self, *args, **kwargs):
+            raise OSError("no worker processes here")
+
+    monkeypatch.setattr(data_processor, 'ProcessPoolExecutor', UnavailablePool)
+    raw_data = LazyRawData(corpus_dir, process_pool_min_bytes=0, verbosity=0)
+    raw_data.preload(['misc', 'melee'])
+
+    assert raw_data['misc'] == corpus(corpus_dir)['misc']
+    assert raw_data['melee'] == corpus(corpus_dir)['melee']
+
+
+def test_preload_discards_nested_fields_in_workers(corpus_dir):
+    raw_data = LazyRawData(corpus_dir, process_pool_min_bytes=0, verbosity=0, discard_raw_nested=True)
+    raw_data.preload(['misc'])
+    assert raw_data['misc']
+    assert not any(isinstance(value, (list, dict)) for item in raw_data['misc'] for value in item.values())
+
+
+def test_missing_file_loads_as_empty(tmp_path):
+    raw_data = LazyRawData(str(tmp_path), verbosity=0)
+    raw_data.preload(['pets'])
+    assert raw_data['pets'] == []
+
+
+def test_categories_load_on_first_access(corpus_dir):
+    raw_data = LazyRawData(corpus_dir, verbosity=0)
+    assert 'pets' in raw_data and not raw_data.is_loaded('pets')
+    assert len(raw_data) == len(RAW_DATA_FILES)
+
+    pets = raw_data['pets']
+    assert pets == corpus(corpus_dir)['pets']
+    assert raw_data['pets'] is pets
+    assert [key for key in RAW_DATA_FILES if raw_data.is_loaded(key)] == ['pets']
+
+    # get() behaves like the plain dict raw_data used to be
+    assert raw_data.get('nonsense') is None
+    with pytest.raises(KeyError):
+        raw_data['nonsense']
+
+
+def test_forgotten_category_is_read_again(corpus_dir):
+    raw_data = LazyRawData(corpus_dir, verbosity=0)
+    pets = raw_data['pets']
+    del raw_data['pets']
+    assert not raw_data.is_loaded('pets')
+    assert raw_data['pets'] == pets and raw_data['pets'] is not pets
+
+
+def test_processing_some_outputs_reads_only_their_files(corpus_dir, tmp_path):
+    processor = data_processor.WarframeDataProcessor(corpus_dir, str(tmp_path), verbosity=0)
+    processor.process_warframes(outputs=data_processor.select_outputs(['companions']))
+    # Categories are dropped once no output needs them, load_timings records every read
+    assert sorted(processor.raw_data.load_timings) == ['pets', 'sentinels']
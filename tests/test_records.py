@@ -0,0 +1,65 @@
+"""
+Slotted records from the clean functions, and dropping nested raw fields:
+neither may change a single byte of the processed outputs
+"""
+
+import dataclasses
+import os
+
+import pytest
+
+from api_client.data_processor import PROCESSED_OUTPUTS, WarframeDataProcessor, discard_nested
+from utils.helpers import WarframeRecord, WeaponRecord, record_to_dict
+
+RAW_WEAPON = {'name': 'Kuva Bramma', 'uniqueName': '/Lotus/Weapons/KuvaBramma', 'type': 'Bow', 'masteryReq': 13,
+              'tradable': False, 'totalDamage': 462, 'fireRate': 1.0, 'accuracy': 13.3, 'criticalChance': 0.35,
+              'statusChance': 0.15, 'drops': [{'location': 'Lich'}], 'patchlogs': [], 'damage': {'blast': 462}}
+
+
+@pytest.fixture
+def processor(tmp_path):
+    return WarframeDataProcessor(str(tmp_path / 'raw'), str(tmp_path / 'processed'), verbosity=0)
+
+
+@pytest.mark.parametrize('record_class', [WarframeRecord, WeaponRecord])
+def test_records_are_slotted(record_class):
+    values = {field.name: None for field in dataclasses.fields(record_class)}
+    record = record_class(**values)
+    assert not hasattr(record, '__dict__')
+    with pytest.raises(AttributeError):
+        record.drops = []
+    # to_dict keeps the field order the processed files have always had
+    assert record.to_dict() == dataclasses.asdict(record)
+    assert list(record.to_dict()) == list(values)
+
+
+def test_clean_weapon_data(processor):
+    record = processor.clean_weapon_data(RAW_WEAPON)
+    assert isinstance(record, WeaponRecord)
+    assert record_to_dict(record) == {
+        'name': 'Kuva Bramma', 'unique_name': '/Lotus/Weapons/KuvaBramma', 'type': 'Bow', 'description': '',
+        'mastery_rank': 13, 'tradable': False, 'vaulted': False, 'total_damage': 462, 'fire_rate': 1.0,
+        'accuracy': 13.3, 'critical_chance': 0.35, 'status_chance': 0.15,
+    }
+    warframe = processor.clean_warframe_data({'name': 'Excalibur', 'uniqueName': '/Lotus/Powersuits/Excalibur'})
+    assert warframe.to_dict() == {'name': 'Excalibur', 'unique_name': '/Lotus/Powersuits/Excalibur', 'type': '',
+                                  'description': '', 'mastery_rank': 0, 'tradable': False, 'vaulted': False}
+    with pytest.raises(TypeError):
+        record_to_dict(object())
+
+
+def test_discard_nested_keeps_only_scalar_fields():
+    items = discard_nested([dict(RAW_WEAPON), 'not an item'])
+    assert sorted(items[0]) == sorted(key for key in RAW_WEAPON if key not in ('drops', 'patchlogs', 'damage'))
+    assert items[1] == 'not an item'
+
+
+def test_discarding_nested_fields_leaves_the_outputs_unchanged(corpus_dir, processed_dir, tmp_path):
+    out_dir = str(tmp_path / 'processed')
+    processor = WarframeDataProcessor(corpus_dir, out_dir, verbosity=0, discard_raw_nested=True)
+    processor.process_warframes()
+
+    for output in PROCESSED_OUTPUTS:
+        with open(os.path.join(processed_dir, output['file']), 'rb') as expected, \
+                open(os.path.join(out_dir, output['file']), 'rb') as actual:
+            assert actual.read() == expected.read(), output['file']
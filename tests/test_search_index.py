@@ -0,0 +1,84 @@
+"""
+Token search and search-as-you-type autocomplete over processed items
+"""
+
+import pytest
+
+from tracker.app import create_app
+from utils.search_index import SearchIndex
+
+RECORDS = [
+    ('melee_weapons', {'unique_name': '/Lotus/Weapons/KuvaBramma', 'name': 'Kuva Bramma',
+                       'description': 'A bow that fires cluster bombs.'}),
+    ('melee_weapons', {'unique_name': '/Lotus/Weapons/Bo', 'name': 'Bo',
+                       'description': 'A staff. Kuva forged variants exist.'}),
+    ('incarnon_weapons', {'unique_name': '/Lotus/Upgrades/BoIncarnon', 'name': 'Bo Incarnon Genesis',
+                          'description': 'Adapter for the Bo.'}),
+    ('warframes', {'unique_name': '/Lotus/Powersuits/Braton', 'name': 'Bramble', 'description': None}),
+]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return SearchIndex.build(RECORDS)
+
+
+def names(results):
+    return [result['name'] for result in results]
+
+
+def test_name_matches_rank_above_description_matches(index):
+    assert names(index.search('kuva')) == ['Kuva Bramma', 'Bo']
+    assert index.search('kuva')[0]['category'] == 'melee_weapons'
+
+
+def test_every_token_must_match(index):
+    assert names(index.search('bo incarnon')) == ['Bo Incarnon Genesis']
+    assert index.search('bo bramma') == []
+    assert index.search('') == []
+
+
+def test_prefix_search(index):
+    assert names(index.search('kuva bra', prefix=True)) == ['Kuva Bramma']
+    assert index.search('kuva bra') == []
+
+
+def test_autocomplete_uses_names_only(index):
+    # Shortest names first
+    assert names(index.autocomplete('bra')) == ['Bramble', 'Kuva Bramma']
+    assert names(index.autocomplete('kuva b')) == ['Kuva Bramma']
+    assert names(index.autocomplete('bo', limit=1)) == ['Bo']
+    assert index.autocomplete('cluster') == []
+
+
+def test_save_and_load(index, tmp_path):
+    path = str(tmp_path / 'search_index.bin')
+    index.save(path)
+    loaded = SearchIndex.load(path)
+    assert loaded.search('kuva') == index.search('kuva')
+    assert loaded.autocomplete('bra') == index.autocomplete('bra')
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'search_index.bin'
+    path.write_bytes(b'not an index')
+    with pytest.raises(ValueError):
+        SearchIndex.load(str(path))
+
+
+def test_search_route(processed_dir, tmp_path):
+    client = create_app(processed_dir, str(tmp_path / 'tracker.db')).test_client()
+    item = client.get('/api/categories/companions').get_json()[0]
+    word = item['name'].split()[0]
+
+    results = client.get(f'/api/search?q={word}&limit=100').get_json()['results']
+    assert item['unique_name'] in [result['unique_name'] for result in results]
+    completed = client.get(f'/api/search?q={word[:2]}&complete=1&limit=100').get_json()['results']
+    assert item['unique_name'] in [result['unique_name'] for result in completed]
+    assert client.get('/api/search?q=x&limit=many').status_code == 400
+
+
+def test_rebuilding_from_documents_gives_the_same_index(index):
+    rebuilt = SearchIndex.from_documents(index.documents())
+    assert (rebuilt.docs, rebuilt.postings, rebuilt.name_postings) == (index.docs, index.postings, index.name_postings)
+    assert rebuilt.search('kuva') == index.search('kuva')
@@ -0,0 +1,128 @@
+"""
+WFCDClient fetching from a local stand-in of the WFCD host: concurrent
+downloads, retries, the per-run document cache and conditional revalidation
+"""
+
+import json
+import os
+
+import pytest
+
+RAW_FILES = ['Pets.json', 'Sentinels.json', 'Melee.json', 'Misc.json']
+
+
+def corpus_document(corpus_dir, filename):
+    with open(os.path.join(corpus_dir, filename), encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize('use_async', [False, True], ids=['sequential', 'async'])
+def test_fetch_files_downloads_every_file(make_client, corpus_dir, use_async):
+    client = make_client()
+    documents = client.fetch_files(RAW_FILES, use_async=use_async)
+
+    assert documents == {filename: corpus_document(corpus_dir, filename) for filename in RAW_FILES}
+    assert client.fetch_stats == {'downloaded': len(RAW_FILES), 'not_modified': 0, 'cached': 0}
+    assert all(os.path.exists(os.path.join(client.cache_dir, filename)) for filename in RAW_FILES)
+
+
+def test_async_fetch_respects_max_concurrency(make_client, wfcd_server):
+    wfcd_server.latency = 0.05
+    client = make_client(max_concurrency=2)
+    assert len(client.fetch_files(RAW_FILES, use_async=True)) == len(RAW_FILES)
+    assert wfcd_server.max_active == 2
+
+
+def test_async_fetch_retries_server_errors(make_client, wfcd_server, corpus_dir):
+    wfcd_server.fail('Pets.json', 503, 429)
+    documents = make_client(max_retries=3).fetch_files(['Pets.json'], use_async=True)
+
+    assert documents['Pets.json'] == corpus_document(corpus_dir, 'Pets.json')
+    assert wfcd_server.requested('Pets.json') == 3
+
+
+def test_async_fetch_gives_up_after_max_retries(make_client, wfcd_server):
+    wfcd_server.fail('Pets.json', 503, 503, 503)
+    assert make_client(max_retries=2).fetch_files(['Pets.json'], use_async=True) == {}
+    assert wfcd_server.requested('Pets.json') == 3
+
+
+def test_async_fetch_does_not_retry_client_errors(make_client, wfcd_server):
+    documents = make_client(max_retries=3).fetch_files(['Pets.json', 'Nothing.json'], use_async=True)
+
+    assert list(documents) == ['Pets.json']
+    assert wfcd_server.requested('Nothing.json') == 1
+
+
+def test_fetch_all_data_async_matches_sequential(make_client, tmp_path):
+    sequential = make_client(cache_dir=str(tmp_path / 'sequential')).fetch_all_data()
+    concurrent = make_client(cache_dir=str(tmp_path / 'async')).fetch_all_data(use_async=True)
+    assert concurrent == sequential
+
+
+def test_fetch_all_data_requests_each_file_once(make_client, wfcd_server):
+    client = make_client()
+    client.fetch_all_data(use_async=True)
+
+    filenames = set(client.endpoints.values())
+    assert sorted(name for name, _ in wfcd_server.requests) == sorted(filenames)
+
+
+def test_fetch_all_data_parses_each_cached_file_once(make_client):
+    make_client().fetch_all_data()
+    client = make_client()
+    client.fetch_all_data()
+
+    # Primary.json feeds four categories but is only parsed the first time
+    assert client.cache_stats['misses'] == len(set(client.endpoints.values()))
+    assert client.cache_stats['hits'] > 0
+
+
+def test_changed_cache_file_is_parsed_again(make_client, corpus_dir):
+    client = make_client()
+    client.fetch_files(['Pets.json'])
+    path = os.path.join(client.cache_dir, 'Pets.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([{'name': 'Replaced'}], f)
+
+    assert client.fetch_json('Pets.json') == [{'name': 'Replaced'}]
+    client.clear_document_cache()
+    assert client.cache_stats == {'hits': 0, 'misses': 0}
+
+
+@pytest.mark.parametrize('use_async', [False, True], ids=['sequential', 'async'])
+def test_revalidation_uses_cache_on_304(make_client, wfcd_server, corpus_dir, use_async):
+    make_client().fetch_files(RAW_FILES, use_async=use_async)
+    wfcd_server.requests.clear()
+
+    client = make_client()
+    documents = client.fetch_files(RAW_FILES, use_async=use_async, revalidate=True)
+    assert documents == {filename: corpus_document(corpus_dir, filename) for filename in RAW_FILES}
+    assert client.fetch_stats == {'downloaded': 0, 'not_modified': len(RAW_FILES), 'cached': 0}
+    assert client.io_stats['downloaded'] == 0
+    for _, headers in wfcd_server.requests:
+        assert headers['If-None-Match'].startswith('"')
+        assert 'If-Modified-Since' in headers
+
+
+@pytest.mark.parametrize('use_async', [False, True], ids=['sequential', 'async'])
+def test_revalidation_downloads_changed_files(make_client, wfcd_server, raw_dir, use_async):
+    wfcd_server.directory = raw_dir
+    make_client().fetch_files(['Pets.json', 'Sentinels.json'], use_async=use_async)
+    with open(os.path.join(raw_dir, 'Pets.json'), 'w', encoding='utf-8') as f:
+        json.dump([{'name': 'New Kubrow'}], f)
+
+    client = make_client()
+    documents = client.fetch_files(['Pets.json', 'Sentinels.json'], use_async=use_async, revalidate=True)
+    assert documents['Pets.json'] == [{'name': 'New Kubrow'}]
+    assert client.fetch_stats == {'downloaded': 1, 'not_modified': 1, 'cached': 0}
+
+
+def test_without_revalidation_the_cache_is_used_as_is(make_client, wfcd_server):
+    make_client().fetch_files(RAW_FILES)
+    wfcd_server.requests.clear()
+
+    client = make_client()
+    assert len(client.fetch_files(RAW_FILES, use_async=True)) == len(RAW_FILES)
+    assert client.fetch_stats['cached'] == len(RAW_FILES)
+    assert wfcd_server.requests == []
@@ -0,0 +1,15 @@
+"""
+Command line entry point: fetch, process, load-db, refresh and serve
+Run `python wftracker.py --help` for the commands.
+"""
+
+import os
+import sys
+
+# Add the src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())